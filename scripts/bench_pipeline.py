@@ -0,0 +1,186 @@
+"""
+End-to-end benchmark of the extraction pipeline against the local mock
+LLM (mock_openai_server.py), so runs cost nothing and are repeatable.
+
+Each case runs one profile over one full corpus in a fresh subprocess,
+in a scratch directory with the response cache disabled. It reports
+chunks/s, entries/s, peak RSS, and the time spent chunking, pre-parsing,
+looking up cached answers and saved rows, aligning answers to the text
+(coverage check, cut-off answers), writing, and waiting on the (mock)
+API: the wall time the other stages leave. Results are saved as JSON; pass an earlier
+file to --compare to see what changed between commits.
+
+    python scripts/bench_pipeline.py [--latency 0.2] [--compare data/bench/<old>.json]
+    python scripts/bench_pipeline.py --profile generic --files data/text/kaplan.txt
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import threading
+import contextlib
+import subprocess
+
+from mock_openai_server import make_server
+
+# (profile, corpus) pairs run by default: each bibliography's own text.
+CASES = [
+    ("kaplan_upi", "data/text/kaplan_uAPI.txt"),
+    ("briscoe_upi", "data/text/briscoe_uAPI.txt"),
+    ("matthews_upi", "data/text/matthews_uAPI.txt"),
+    ("matthews_sanitized", "data/text/matthews.txt"),
+    ("generic", "data/text/kaplan.txt"),
+    ("americans_of_color", "data/text/stuhr-rommerein_1980.txt"),
+    ("americans_of_color", "data/text/sturh_iwabuchi.txt"),
+]
+
+# pipeline.stage_times stages; "api" is what's left of the wall time
+STAGES = ["chunk", "preparse", "lookup", "align", "write"]
+
+RESULTS_DIR = os.path.join("data", "bench")
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_case(profile_name, input_file):
+    """Runs inside the child process; returns the measurements for one case."""
+    from bibextract import pipeline
+    from bibextract.profiles import load_profile
+
+    profile = load_profile(profile_name)
+    input_file = os.path.abspath(input_file)
+    _, progress_file = profile.paths(input_file)
+    manifest_file = os.path.splitext(progress_file)[0] + ".manifest.jsonl"
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="bench-") as scratch:
+        os.chdir(scratch)
+        try:
+            start = time.perf_counter()
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                pipeline.run(profile, input_file)
+            wall = time.perf_counter() - start
+
+            chunks = entries = 0
+            with open(manifest_file, "r", encoding="utf-8") as f:
+                for line in f:
+                    chunks += 1
+                    entries += json.loads(line)["entries"]
+        finally:
+            # Leave the directory before it is removed
+            os.chdir(cwd)
+    stage_s = {stage: round(pipeline.stage_times[stage], 3) for stage in STAGES}
+    stage_s["api"] = round(max(0.0, wall - sum(pipeline.stage_times[stage] for stage in STAGES)), 3)
+    return {
+        "profile": profile_name,
+        "input": os.path.relpath(input_file, REPO_ROOT),
+        "mb": round(os.path.getsize(input_file) / 1e6, 3),
+        "chunks": chunks,
+        "entries": entries,
+        "wall_s": round(wall, 3),
+        "chunks_per_s": round(chunks / wall, 1),
+        "entries_per_s": round(entries / wall, 1),
+        "stage_s": stage_s,
+        # ru_maxrss is KiB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True, cwd=REPO_ROOT).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, previous=None):
+    before = {(r["profile"], r["input"]): r for r in (previous or {}).get("cases", [])}
+    print(f"{'profile':<20} {'input':<36} {'chunks':>6} {'chunks/s':>9} {'entries/s':>10} "
+          + "".join(f"{stage + ' s':>11}" for stage in STAGES + ["api"]) + f" {'RSS MB':>7}")
+    for r in results:
+        line = (f"{r['profile']:<20} {r['input']:<36} {r['chunks']:>6} {r['chunks_per_s']:>9} "
+                f"{r['entries_per_s']:>10}"
+                + "".join(f"{r['stage_s'].get(stage, '-'):>11}" for stage in STAGES + ["api"])
+                + f" {r['peak_rss_mb']:>7}")
+        old = before.get((r["profile"], r["input"]))
+        if old:
+            change = (r["chunks_per_s"] - old["chunks_per_s"]) / old["chunks_per_s"] * 100
+            line += f"   {change:+.1f}% chunks/s, RSS {old['peak_rss_mb']} -> {r['peak_rss_mb']}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the extraction pipeline against the mock LLM.")
+    parser.add_argument("--profile", help="Run only this profile (on --files, or its default cases).")
+    parser.add_argument("--files", nargs="+", help="Corpora to run --profile over.")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Seconds the mock server waits before each answer.")
+    parser.add_argument("--concurrency", type=int, default=None)
+    parser.add_argument("--out", help="Where to save the JSON results (default: data/bench/).")
+    parser.add_argument("--compare", help="Earlier results JSON to compare against.")
+    parser.add_argument("--case", nargs=2, metavar=("PROFILE", "FILE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(run_case(*args.case)))
+        return 0
+
+    cases = CASES
+    if args.profile:
+        cases = [(args.profile, f) for f in args.files] if args.files else \
+                [c for c in CASES if c[0] == args.profile]
+    missing = [f for _, f in cases if not os.path.exists(f)]
+    for f in missing:
+        print(f"Skipping missing {f}")
+    cases = [c for c in cases if c[1] not in missing]
+
+    server = make_server(port=0, latency=args.latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    env = dict(
+        os.environ,
+        OPENAI_BASE_URL=f"http://127.0.0.1:{server.server_address[1]}/v1",
+        OPENAI_API_KEY="mock",
+        EXTRACT_CACHE_MB="0",
+        # The mock has no limits; measure the pipeline, not the scheduler's budget
+        EXTRACT_RPM="1000000",
+        EXTRACT_TPM="1000000000",
+    )
+    if args.concurrency:
+        env["EXTRACT_CONCURRENCY"] = str(args.concurrency)
+
+    results = []
+    try:
+        for profile_name, input_file in cases:
+            print(f"Running {profile_name} on {input_file}...")
+            proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--case", profile_name, input_file],
+                                  env=env, capture_output=True, text=True)
+            if proc.returncode != 0:
+                print(proc.stderr)
+                continue
+            results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    previous = None
+    if args.compare:
+        with open(args.compare, "r") as f:
+            previous = json.load(f)
+    print_results(results, previous)
+
+    commit = git_commit()
+    out = args.out or os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{commit or 'nogit'}.json")
+    if os.path.dirname(out):
+        os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump({"commit": commit, "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                   "latency": args.latency, "cases": results}, f, indent=2)
+    print(f"Saved {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""
+Micro-benchmark: bibextract.sanitize against the original per-character
+implementations it replaced. For each corpus, reports MB/s for every
+sanitizer and every profile's noise patterns, and checks that old and
+new produce identical text (whole file and line by line, as the pipeline
+calls them).
+
+    python scripts/bench_sanitize.py [text files...]   (default: data/text/*.txt)
+"""
+import re
+import sys
+import glob
+import time
+import argparse
+import unicodedata
+
+from bibextract import sanitize
+from bibextract.profiles import load_profile, list_profiles
+
+
+def legacy_sanitize_text(text):
+    return "".join(ch for ch in text if ch == '\n' or ch == '\t' or ch >= ' ')
+
+
+def legacy_clean_for_api(s):
+    if not s:
+        return ""
+    s = unicodedata.normalize("NFKC", s)
+    s = re.sub(r"[\x00-\x08\x0B\x0C\x0E-\x1F\x7F-\x9F]", "", s)
+    s = "".join(ch for ch in s if unicodedata.category(ch) != "Cf")
+    return s.encode("utf-8", "replace").decode("utf-8")
+
+
+def legacy_remove_noise(text, patterns):
+    for pattern in patterns:
+        text = re.sub(pattern, "", text)
+    return text
+
+
+def timed(fn, inputs, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = [fn(x) for x in inputs]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return out, best
+
+
+def compare(label, old, new, text, repeat):
+    """Time old vs new on the whole text and per line; return True if outputs match."""
+    mb = len(text.encode("utf-8")) / 1e6
+    ok = True
+    for mode, inputs in (("whole", [text]), ("lines", text.split("\n"))):
+        old_out, old_t = timed(old, inputs, repeat)
+        new_out, new_t = timed(new, inputs, repeat)
+        same = old_out == new_out
+        ok = ok and same
+        print(f"  {label:<28} {mode:<5} old {mb / old_t:8.1f} MB/s   new {mb / new_t:8.1f} MB/s"
+              f"   x{old_t / new_t:5.1f}   {'same' if same else 'DIFFERENT'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the text sanitizers.")
+    parser.add_argument("files", nargs="*")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    files = args.files or sorted(glob.glob("data/text/*.txt"))
+    noise = {}
+    for name in list_profiles():
+        patterns = load_profile(name).noise_patterns
+        if patterns:
+            noise[name] = patterns
+
+    ok = True
+    for path in files:
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        print(f"{path} ({len(text.encode('utf-8')) / 1e6:.1f} MB)")
+        ok &= compare("control_chars", legacy_sanitize_text, sanitize.sanitize_text, text, args.repeat)
+        ok &= compare("clean_for_api", legacy_clean_for_api, sanitize.clean_for_api, text, args.repeat)
+        for name, patterns in noise.items():
+            ok &= compare(f"noise:{name}",
+                          lambda t, p=patterns: legacy_remove_noise(t, p),
+                          lambda t, p=patterns: sanitize.remove_noise(t, p),
+                          text, args.repeat)
+    if not ok:
+        print("Outputs differ from the original implementations!")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Shared machinery for the bibliography extraction scripts in scripts/."""
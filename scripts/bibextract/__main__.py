@@ -0,0 +1,5 @@
+import sys
+
+from bibextract.cli import main
+
+sys.exit(main())
@@ -0,0 +1,180 @@
+import os
+import json
+import time
+
+from bibextract.prompts import add_usage
+
+# How often to ask the Batch API whether a submitted job has finished.
+POLL_INTERVAL = float(os.environ.get("EXTRACT_BATCH_POLL", "30"))
+
+TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+def write_batch_file(requests, path):
+    """Write {custom_id: request} as an OpenAI Batch API JSONL input file."""
+    with open(path, "w", encoding="utf-8") as f:
+        for custom_id, request in requests.items():
+            line = {
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": request,
+            }
+            f.write(json.dumps(line) + "\n")
+
+
+def submit_batch(client, path):
+    with open(path, "rb") as f:
+        batch_file = client.files.create(file=f, purpose="batch")
+    batch = client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+    return batch.id
+
+
+def wait_for_batch(client, batch_id, poll_interval=None):
+    poll_interval = POLL_INTERVAL if poll_interval is None else poll_interval
+    while True:
+        batch = client.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        done = f" ({counts.completed}/{counts.total} done, {counts.failed} failed)" if counts else ""
+        print(f"  Batch {batch_id}: {batch.status}{done}")
+        if batch.status in TERMINAL_STATUSES:
+            return batch
+        time.sleep(poll_interval)
+
+
+def iter_batch_results(client, batch, usage=None):
+    """
+    Yield (custom_id, entries_or_None, error) for every line of the
+    output and error files, adding each response's token usage to the
+    usage Counter if given.
+    """
+    for file_id in (batch.output_file_id, batch.error_file_id):
+        if not file_id:
+            continue
+        content = client.files.content(file_id)
+        for line in content.text.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            i = record["custom_id"]
+            response = record.get("response") or {}
+            if record.get("error") or response.get("status_code") != 200:
+                yield i, None, record.get("error") or response.get("body")
+                continue
+            if usage is not None:
+                add_usage(usage, response.get("body", {}).get("usage"))
+            try:
+                choice = response["body"]["choices"][0]
+                if choice.get("finish_reason") == "length":
+                    yield i, None, "response hit the output token limit"
+                    continue
+                yield i, json.loads(choice["message"]["content"]).get("entries", []), None
+            except (KeyError, IndexError, ValueError) as e:
+                yield i, None, e
+
+
+def run_batch(chunks, build_request, on_result, state_file, client, start_chunk=0,
+              cache=None, dead_letter=None, poll_interval=None, usage=None, decode=None, key=None,
+              verify=None):
+    """
+    Batch API counterpart of engine.run_in_order.
+
+    Every chunk from start_chunk on that is not already cached is written
+    to one JSONL file and submitted as a single batch job. build_request
+    returns the chat completion request for a chunk, or None to skip it.
+    The batch id is kept in state_file, so an interrupted run resumes
+    polling the same job instead of submitting (and paying for) it twice.
+    on_result(i, entries) is then called in chunk order, as with
+    run_in_order; chunks the batch could not answer go to dead_letter.
+    Token usage is added to the usage Counter if given, and each answer's
+    entries are passed through decode (which may raise ValueError) and
+    then verify(chunk, entries), which may add entries the answer skipped,
+    before they are cached; a chunk either of them fails goes to
+    dead_letter.
+
+    Answers are matched back to chunks by custom_id, built from key(chunk)
+    (the chunk's index by default). A resumed job was submitted before the
+    crash, when the chunks were numbered from an earlier start, so key
+    must name a chunk the same way on every run, e.g. by its absolute
+    position in the input.
+    """
+    key = key or (lambda chunk: None)
+    requests = {}
+    ids = {}
+    texts = {}
+    results = {}
+    for i, chunk in enumerate(chunks):
+        if i < start_chunk:
+            continue
+        request = build_request(chunk)
+        if request is None:
+            results[i] = []
+            continue
+        cached = cache.get(request) if cache else None
+        if cached is not None:
+            results[i] = cached
+        else:
+            requests[i] = request
+            texts[i] = chunk
+            name = key(chunk)
+            ids[f"chunk-{i if name is None else name}"] = i
+
+    batch_path = os.path.splitext(state_file)[0] + ".jsonl"
+    if requests:
+        if os.path.exists(state_file):
+            with open(state_file, "r") as f:
+                batch_id = json.load(f)["batch_id"]
+            print(f"Resuming batch {batch_id}...")
+        else:
+            write_batch_file({custom_id: requests[i] for custom_id, i in ids.items()}, batch_path)
+            batch_id = submit_batch(client, batch_path)
+            with open(state_file, "w") as f:
+                json.dump({"batch_id": batch_id, "input_file": batch_path}, f)
+            print(f"Submitted {len(requests)} chunk(s) as batch {batch_id}.")
+
+        batch = wait_for_batch(client, batch_id, poll_interval)
+        errors = {}
+        for custom_id, entries, error in iter_batch_results(client, batch, usage):
+            i = ids.get(custom_id)
+            if i is None:
+                continue
+            if entries is None:
+                errors[i] = error
+                continue
+            if decode:
+                try:
+                    entries = decode(entries)
+                except ValueError as e:
+                    errors[i] = e
+                    continue
+            if verify:
+                try:
+                    entries = verify(texts[i], entries)
+                except Exception as e:
+                    errors[i] = e
+                    continue
+            if cache:
+                cache.put(requests[i], entries)
+            results[i] = entries
+
+        # Failed requests, and anything an expired/cancelled job never
+        # answered, are kept for the next run rather than silently dropped.
+        for i in requests:
+            if i in results:
+                continue
+            error = errors.get(i, f"batch {batch.status}")
+            if dead_letter is None:
+                raise RuntimeError(f"Batch request for chunk {i + 1} failed: {error}")
+            print(f"  Chunk {i + 1} failed in batch ({error}); recorded in {dead_letter.path}")
+            dead_letter.add(i, texts[i], RuntimeError(str(error)))
+
+    for i in sorted(set(results) | set(requests)):
+        on_result(i, results.get(i, []))
+
+    for path in (state_file, batch_path):
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,112 @@
+import os
+import json
+import hashlib
+import threading
+
+# Shared by every extractor: the key covers the model and the full prompt,
+# so identical chunks hit regardless of which input file they came from.
+DEFAULT_CACHE_DIR = os.environ.get("EXTRACT_CACHE_DIR", os.path.join("data", "cache", "responses"))
+DEFAULT_CACHE_MB = int(os.environ.get("EXTRACT_CACHE_MB", "512"))
+
+
+def request_key(request):
+    """sha256 over the model and every message of a chat completion request."""
+    h = hashlib.sha256()
+    h.update(request.get("model", "").encode("utf-8"))
+    for message in request.get("messages", []):
+        h.update(b"\x00" + message.get("role", "").encode("utf-8"))
+        h.update(b"\x00" + message.get("content", "").encode("utf-8"))
+    return h.hexdigest()
+
+
+class ResponseCache:
+    """
+    On-disk cache of parsed `entries` lists keyed by request_key().
+
+    One JSON file per response, fanned out by the first two hex digits.
+    A hit touches the file's mtime, and once the directory grows past
+    max_mb the least recently used files are removed first.
+    Set EXTRACT_CACHE_MB=0 to disable caching.
+    """
+
+    def __init__(self, directory=None, max_mb=None):
+        self.directory = directory or DEFAULT_CACHE_DIR
+        self.max_bytes = (DEFAULT_CACHE_MB if max_mb is None else max_mb) * 1024 * 1024
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.total_bytes = None
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    def get(self, request):
+        if not self.max_bytes:
+            return None
+        path = self._path(request_key(request))
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            with self.lock:
+                self.misses += 1
+            return None
+        with self.lock:
+            self.hits += 1
+        return entries
+
+    def put(self, request, entries):
+        if not self.max_bytes:
+            return
+        path = self._path(request_key(request))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = json.dumps(entries).encode("utf-8")
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        with self.lock:
+            # An answer put again (e.g. after a cache-missing rerun) replaces the old file
+            try:
+                replaced = os.path.getsize(path)
+            except OSError:
+                replaced = 0
+            os.replace(tmp_path, path)
+            if self.total_bytes is None:
+                self.total_bytes = self._scan_size()
+            else:
+                self.total_bytes += len(data) - replaced
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+
+    def _files(self):
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith(".json"):
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    yield st.st_mtime, st.st_size, path
+
+    def _scan_size(self):
+        return sum(size for _, size, _ in self._files())
+
+    def _evict(self):
+        # Trim to 90% so we don't rescan the directory on every put.
+        target = self.max_bytes * 0.9
+        files = sorted(self._files())
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+        self.total_bytes = total
+
+    def stats(self):
+        return f"cache: {self.hits} hits, {self.misses} misses"
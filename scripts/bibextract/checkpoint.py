@@ -0,0 +1,81 @@
+import os
+import json
+
+
+def sync(f):
+    """Flush a file object all the way to disk."""
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def file_size(path):
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def truncate_file(path, size):
+    if os.path.exists(path) and os.path.getsize(path) > size:
+        with open(path, "r+b") as f:
+            f.truncate(size)
+            sync(f)
+
+
+class Checkpoint:
+    """
+    Exactly-once resume for a run that only ever appends to its files.
+
+    Every output is append-only and fsynced before commit(), which then
+    records the run's state (e.g. chunks done) together with the current
+    size of each tracked file, written to a temp file and renamed over the
+    old checkpoint. The rename is the commit point: restore() cuts every
+    file back to its committed size, so whatever a crash left half
+    written is dropped and redone rather than duplicated. Resuming costs
+    one small read however long the run.
+
+    The first file is the primary output. If it is shorter than its
+    checkpoint (deleted or replaced by hand) the run starts over.
+    An old plain-integer progress file is read as {"chunks": n}.
+    """
+
+    def __init__(self, path, files):
+        self.path = path
+        self.files = list(files)
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, "r") as f:
+            text = f.read().strip()
+        try:
+            state = json.loads(text)
+        except ValueError:
+            return {}
+        if isinstance(state, int):
+            return {"chunks": state}
+        return state if isinstance(state, dict) else {}
+
+    def restore(self):
+        """Truncate the tracked files to the last commit and return its state ({} to start fresh)."""
+        state = self.load()
+        sizes = state.pop("files", None)
+        if sizes is None:
+            return state
+        if file_size(self.files[0]) < sizes.get(self.files[0], 0):
+            print(f"{self.files[0]} is shorter than its checkpoint; starting over.")
+            self.reset()
+            return {}
+        for path in self.files:
+            truncate_file(path, sizes.get(path, 0))
+        return state
+
+    def reset(self):
+        """Empty every tracked file, to start over; the next commit() records the fresh state."""
+        for path in self.files:
+            truncate_file(path, 0)
+
+    def commit(self, **state):
+        state["files"] = {path: file_size(path) for path in self.files}
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+            sync(f)
+        os.replace(tmp_path, self.path)
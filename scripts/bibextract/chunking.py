@@ -0,0 +1,189 @@
+import re
+from bisect import bisect_right
+
+# A boundary match has to end this many characters before the end of the
+# buffered text before we trust it; more input could still extend it.
+LOOKAHEAD = 1024
+# Segments are appended to the scan buffer in batches of about this size.
+SCAN_EVERY = 8192
+
+
+class SegmentBuffer:
+    """Text of the chunk being built, plus the source offset of every segment in it."""
+
+    def __init__(self):
+        self.text = ""
+        self.pending = []
+        self.pending_len = 0
+        self.positions = []
+        self.offsets = []
+
+    def add(self, offset, segment):
+        self.positions.append(len(self.text) + self.pending_len)
+        self.offsets.append(offset)
+        self.pending.append(segment)
+        self.pending_len += len(segment)
+
+    def flush(self):
+        if self.pending:
+            self.text += "".join(self.pending)
+            self.pending = []
+            self.pending_len = 0
+
+    def take(self, cut):
+        """Remove and return (source_offset, text[:cut])."""
+        chunk = (self.offsets[0] if self.offsets else 0, self.text[:cut])
+        k = max(0, bisect_right(self.positions, cut) - 1)
+        self.text = self.text[cut:]
+        self.positions = [max(0, p - cut) for p in self.positions[k:]]
+        self.offsets = self.offsets[k:]
+        return chunk
+
+
+def boundary_chunks(segments, pattern, target_size):
+    """
+    Cut a stream of (offset, segment) into ~target_size chunks, only ever at
+    a match of the entry-boundary pattern, and yield (offset, chunk_text).
+
+    Produces the same chunks as running the pattern over the whole text and
+    cutting at the first match past target_size, but only the chunk being
+    built (and a little lookahead) is ever held. A partial entry at the end
+    of the buffer simply stays there until the next boundary arrives.
+    Patterns should start with "\\n" so cuts land on segment starts and the
+    offsets are exact.
+    """
+    pattern = re.compile(pattern)
+    buf = SegmentBuffer()
+    scan_pos = 0
+
+    def scan(final):
+        nonlocal scan_pos
+        limit = len(buf.text) if final else len(buf.text) - LOOKAHEAD
+        while True:
+            m = pattern.search(buf.text, scan_pos)
+            if m is None or m.end() > limit:
+                return
+            if m.start() > target_size:
+                yield buf.take(m.start())
+                scan_pos = m.end() - m.start()
+            else:
+                scan_pos = m.end() if m.end() > m.start() else m.start() + 1
+
+    for offset, segment in segments:
+        buf.add(offset, segment)
+        if buf.pending_len >= SCAN_EVERY:
+            buf.flush()
+            yield from scan(False)
+    buf.flush()
+    yield from scan(True)
+    yield buf.take(len(buf.text))
+
+
+def split_entry(offset, entry, limit, count_tokens):
+    """
+    Yield (offset, text, tokens) pieces of entry, cut at line breaks to stay
+    within limit tokens. Later pieces' offsets count the cleaned text, so
+    they are approximate where noise removal shortened it.
+    """
+    n = count_tokens(entry)
+    if n <= limit:
+        yield offset, entry, n
+        return
+    piece = []
+    piece_tokens = 0
+    for line in entry.splitlines(keepends=True):
+        line_tokens = count_tokens(line)
+        if piece and piece_tokens + line_tokens > limit:
+            text = "".join(piece)
+            yield offset, text, piece_tokens
+            offset += len(text.encode("utf-8"))
+            piece = []
+            piece_tokens = 0
+        piece.append(line)
+        piece_tokens += line_tokens
+    if piece:
+        yield offset, "".join(piece), piece_tokens
+
+
+def token_chunks(segments, pattern, max_input_tokens, max_output_tokens, output_tokens_per_entry,
+                 count_tokens, overlap_entries=0):
+    """
+    Pack whole entries (text between matches of the boundary pattern) into
+    chunks and yield (offset, chunk_text).
+
+    An entry is added while the chunk stays within max_input_tokens and the
+    expected response within max_output_tokens; the response to an entry
+    is estimated as its own tokens (the fields echo the text) plus
+    output_tokens_per_entry for the JSON keys. A single entry over either
+    budget (typically front matter or an index the pattern never matches)
+    is split at line breaks into pieces that fit.
+
+    With overlap_entries, each chunk also starts with the last entries of
+    the one before, so an entry the boundary pattern cut badly is seen
+    whole at least once; the caller drops the repeated rows.
+    """
+    limit = min(max_input_tokens, max_output_tokens - output_tokens_per_entry)
+    chunk = []  # (offset, text, tokens)
+    carried = 0  # entries at the start of chunk repeated from the last one
+
+    def fits(n):
+        input_tokens = sum(t for _, _, t in chunk) + n
+        output_tokens = sum(t + output_tokens_per_entry for _, _, t in chunk) + n + output_tokens_per_entry
+        return input_tokens <= max_input_tokens and output_tokens <= max_output_tokens
+
+    for entry_offset, entry in boundary_chunks(segments, pattern, 0):
+        if not entry:
+            continue
+        for piece in split_entry(entry_offset, entry, limit, count_tokens):
+            if chunk and not fits(piece[2]):
+                if len(chunk) > carried:
+                    yield chunk[0][0], "".join(text for _, text, _ in chunk)
+                    chunk = chunk[-overlap_entries:] if overlap_entries else []
+                    carried = len(chunk)
+                while chunk and not fits(piece[2]):
+                    chunk.pop(0)
+                    carried -= 1
+            chunk.append(piece)
+    if len(chunk) > carried:
+        yield chunk[0][0], "".join(text for _, text, _ in chunk)
+
+
+def fixed_chunks(segments, chunk_size):
+    """chunk_size-character slices of the stream; offsets are those of the line each slice starts on."""
+    buf = SegmentBuffer()
+    for offset, segment in segments:
+        buf.add(offset, segment)
+        if buf.pending_len >= chunk_size:
+            buf.flush()
+            while len(buf.text) >= chunk_size:
+                yield buf.take(chunk_size)
+    buf.flush()
+    if buf.text:
+        yield buf.take(len(buf.text))
+
+
+def page_chunks(segments, pages_per_chunk):
+    """Join every pages_per_chunk form-feed separated pages with "\\n"; offsets are page starts."""
+    group = []
+    group_offset = 0
+    page = []
+    page_offset = 0
+    for offset, segment in segments:
+        parts = segment.split("\f")
+        page.append(parts[0])
+        consumed = len(parts[0].encode("utf-8"))
+        for part in parts[1:]:
+            if not group:
+                group_offset = page_offset
+            group.append("".join(page))
+            if len(group) == pages_per_chunk:
+                yield group_offset, "\n".join(group)
+                group = []
+            consumed += 1
+            page = [part]
+            page_offset = offset + consumed
+            consumed += len(part.encode("utf-8"))
+    if not group:
+        group_offset = page_offset
+    group.append("".join(page))
+    yield group_offset, "\n".join(group)
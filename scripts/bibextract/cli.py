@@ -0,0 +1,45 @@
+import os
+import sys
+import argparse
+
+from bibextract.profiles import load_profile, list_profiles
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Extract structured bibliography entries from text with an LLM.",
+        epilog="Profiles: " + ", ".join(list_profiles()),
+    )
+    parser.add_argument("profile", help="Bundled profile name or path to a profile .py file.")
+    parser.add_argument("inputs", nargs="*",
+                        help="Text files to process (default: the profile's INPUT_FILE).")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--batch", action="store_true",
+                      help="Submit chunks through the OpenAI Batch API instead of live requests.")
+    mode.add_argument("--stream", action="store_true",
+                      help="Stream live responses, so one that breaks off keeps the entries it completed.")
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help="Chunk requests kept in flight (default: EXTRACT_CONCURRENCY or 8).")
+    args = parser.parse_args(argv)
+
+    if "OPENAI_API_KEY" not in os.environ:
+        print("Error: OPENAI_API_KEY environment variable not set.")
+        return 1
+
+    # Imported here so --help works without the API dependencies configured
+    from bibextract.pipeline import run
+
+    profile = load_profile(args.profile)
+    inputs = []
+    for input_file in args.inputs or [None]:
+        if input_file and not os.path.exists(input_file):
+            print(f"File not found: {input_file}")
+            continue
+        inputs.append(input_file)
+    if inputs:
+        run(profile, inputs, batch=args.batch, concurrency=args.concurrency, stream=args.stream)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+import re
+
+# Small adjacent chunks (nearly empty pages, the tail of a file, what a
+# pre-parser left over), possibly from different input files, are sent
+# as one request. Each chunk becomes a numbered part of the text and the
+# model tags every entry with its part, so the entries can be handed back
+# to the chunk, and the file, they came from.
+
+# Worded without the part count so it is the same text on every
+# coalesced request, extending the prefix the provider can cache.
+PART_NOTE = ('The text below is split into parts, each starting with a "### Part N" line. '
+             'Give every entry a "part" key with the number of the part it is in.\n\n')
+PART_HEADER = "### Part {n}\n"
+_PART_HEADER_LINE = re.compile(r"^### Part \d+\n", re.M)
+
+_NON_BLANK_LINE = re.compile(r"\S[^\n]*")
+
+
+class Member:
+    """One chunk of one input file within a group."""
+
+    def __init__(self, source, index, text, wanted):
+        self.source = source
+        self.index = index
+        self.text = text
+        # False for chunks too short to send; they ride along with no text
+        self.wanted = wanted
+
+
+def group_text(group):
+    """The text to send for a group, or None if no member has any."""
+    parts = [m.text for m in group if m.wanted]
+    if not parts:
+        return None
+    if len(parts) == 1:
+        # Same request as an uncoalesced chunk, so cached answers still apply
+        return parts[0]
+    return PART_NOTE + "\n".join(
+        PART_HEADER.format(n=n) + text.strip("\n") + "\n" for n, text in enumerate(parts, 1))
+
+
+def expected_entries(text, pattern):
+    """Rough entry count for the output budget: boundary matches, else non-blank lines."""
+    if pattern:
+        return len(re.findall(pattern, "\n" + text)) or 1
+    return len(_NON_BLANK_LINE.findall(text)) or 1
+
+
+def coalesce(members, max_input_tokens, max_output_tokens, output_tokens_per_entry, count_tokens, pattern=None):
+    """
+    Pack adjacent members into groups (lists of Member) whose combined
+    text stays within max_input_tokens and whose expected response (its
+    tokens plus output_tokens_per_entry per expected entry, as in
+    chunking.token_chunks) stays within max_output_tokens. A member over
+    budget on its own is a group of its own; order is kept.
+    """
+    group, input_tokens, output_tokens = [], 0, 0
+    for member in members:
+        if not member.wanted:
+            group.append(member)
+            continue
+        tokens = count_tokens(member.text)
+        expected = tokens + output_tokens_per_entry * expected_entries(member.text, pattern)
+        if any(m.wanted for m in group) and (input_tokens + tokens > max_input_tokens
+                                             or output_tokens + expected > max_output_tokens):
+            yield group
+            group, input_tokens, output_tokens = [], 0, 0
+        group.append(member)
+        input_tokens += tokens
+        output_tokens += expected
+    if group:
+        yield group
+
+
+def split_results(group, entries):
+    """
+    Each member's entries, in group order. Entries with a missing or
+    unknown "part" are taken to belong with the entry before them.
+    """
+    wanted = [m for m in group if m.wanted]
+    results = {id(m): [] for m in group}
+    if len(wanted) == 1:
+        results[id(wanted[0])] = list(entries)
+    elif wanted:
+        part = 1
+        for entry in entries:
+            entry = dict(entry)
+            try:
+                tagged = int(entry.pop("part", part))
+            except (TypeError, ValueError):
+                tagged = part
+            if 1 <= tagged <= len(wanted):
+                part = tagged
+            results[id(wanted[part - 1])].append(entry)
+    return [results[id(m)] for m in group]
+
+
+def excerpt(text, spans):
+    """
+    The (start, end) spans of text, to ask again for just those parts of
+    it. For a coalesced group the part note is kept, and so is the header
+    of each part a span is in, so the entries still carry the right part
+    numbers.
+    """
+    pieces = [text[start:end] if text[start:end].endswith("\n") or end == len(text) else text[start:end] + "\n"
+              for start, end in spans]
+    if not text.startswith(PART_NOTE):
+        return "".join(pieces)
+    out, current = [PART_NOTE], None
+    for (start, _), piece in zip(spans, pieces):
+        headers = _PART_HEADER_LINE.findall(text, 0, start)
+        if headers and headers[-1] != current and not _PART_HEADER_LINE.match(piece):
+            out.append(headers[-1])
+            current = headers[-1]
+        out.append(piece)
+        current = (_PART_HEADER_LINE.findall(piece) or [current])[-1]
+    return "".join(out)
@@ -0,0 +1,31 @@
+import pandas as pd
+
+# Output schema shared by every bibliography.
+REQUIRED_COLUMNS = [
+    "author1_last_name", "author1_first_name", 
+    "author2_last_name", "author2_first_name",
+    "editor1_last_name", "editor1_first_name",
+    "title", 
+    "original_date_of_publication", "second_or_later_date_of_publication",
+    "volume", "publisher", "publisher_location", "number_of_pages",
+    "dictation", "name_of_transcriber",
+    "translation", "name_of_translator",
+    "summary", "occupations", 
+    "date_of_birth", "date_of_death", 
+    "place_of_birth", "other_places_lived"
+]
+
+
+def entries_to_frame(entries):
+    """DataFrame with exactly REQUIRED_COLUMNS, missing fields filled with "N/A"."""
+    df = pd.DataFrame(entries)
+    for col in REQUIRED_COLUMNS:
+        if col not in df.columns:
+            df[col] = "N/A"
+    return df[REQUIRED_COLUMNS]
+
+
+def entry_key(entry):
+    """Identity of an extracted entry, for spotting the same entry extracted twice."""
+    return "|".join(str(entry.get(col, "")).strip().lower()
+                    for col in ("author1_last_name", "author1_first_name", "title"))
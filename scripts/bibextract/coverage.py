@@ -0,0 +1,130 @@
+import re
+from difflib import SequenceMatcher
+
+from bibextract.columns import entry_key
+from bibextract.preparse import split_entries
+from bibextract.sorting import collation_key
+
+# Every match of a profile's BOUNDARY_PATTERN starts an entry the model
+# should have returned. The entries it did return are matched back to
+# those starts, and the text of any start left unmatched is sent again
+# on its own, so a skipped entry costs a small follow-up request rather
+# than a rerun of the book.
+
+# Surnames at least this similar count as the same (OCR slips such as
+# "Abbot"/"Abbott", or the model mending a broken name)
+SURNAME_RATIO = 0.8
+# How many of a title's first words are looked for in the entry text;
+# at least half of them must be there
+TITLE_WORDS = 4
+# Entry text shorter than this many words (a name the page layout cut
+# off from the rest of its entry) is matched on the surname alone
+SHORT_ENTRY_WORDS = 8
+# "Ball, Mrs. Alfred Lathrop. See Tempski, Arnive von." (or "see ..." on
+# one of the next two lines) points to another entry and is not one itself
+_CROSS_REFERENCE = re.compile(r"^[^\n\[]*?[.,)]\s+See\s+['A-Z]|^(?:[^\n]*\n){1,2}\s*see\s")
+_NAME_END = re.compile(r"[,\n]")
+
+
+def entry_spans(text, pattern):
+    """(start, end) of every entry in text that starts at a match of pattern."""
+    spans, keys, start = [], [], 0
+    for segment in split_entries(text, pattern):
+        # The text before the first match (the end of an entry from the
+        # previous chunk, a page header) isn't an entry start
+        if re.match(pattern, "\n" + segment) and not _CROSS_REFERENCE.match(segment):
+            key = collation_key(segment)
+            # A heading the layout doubled ("0007 Abeel, David" before
+            # "0007 Abeel, David 1804-1846 Memoir of ...") is part of the
+            # entry after it
+            if keys and keys[-1] and key.startswith(keys[-1]):
+                spans.pop()
+                keys.pop()
+            spans.append((start, start + len(segment)))
+            keys.append(key)
+        start += len(segment)
+    return spans
+
+
+def _name(segment):
+    """The surname an entry starts with, without a leading entry number ("0097 Ames, Edward")."""
+    return " ".join(w for w in collation_key(_NAME_END.split(segment, 1)[0]).split() if not w.isdigit())
+
+
+def _score(entry, name, words, letters):
+    """
+    How well entry matches an entry starting with name and containing
+    words (letters: the same without spaces, for words the OCR split,
+    "School- days"): surname similarity plus the share of the title's
+    first words found. None if it doesn't match at all.
+    """
+    surname = collation_key(str(entry.get("author1_last_name") or entry.get("editor1_last_name") or ""))
+    # A name with no comma after it ("Black Elk 1863-1950 Black Elk
+    # speaks") runs on into the entry
+    similarity = 1.0 if surname and name.startswith(surname) else SequenceMatcher(None, surname, name).ratio()
+    if surname and similarity < SURNAME_RATIO:
+        return None
+    title = collation_key(str(entry.get("title") or "")).split()[:TITLE_WORDS]
+    if not title or (surname and len(words) < SHORT_ENTRY_WORDS):
+        return similarity if surname else None
+    share = sum(word in words or word in letters for word in title) / len(title)
+    # Without a surname to go on, the title has to match in full
+    if share < (1 if not surname else 0.5):
+        return None
+    return (similarity if surname else 0) + share
+
+
+def align(text, spans, entries):
+    """
+    For each entry, the index in spans of the entry start it came from,
+    or None. Each start is matched at most once, to the entry that fits
+    it best; ties go to the first start after the last match, so entries
+    by one author are kept in order.
+    """
+    keys = []
+    for start, end in spans:
+        segment = text[start:end]
+        key = collation_key(segment)
+        keys.append((_name(segment), set(key.split()), key.replace(" ", "")))
+    taken, cursor, matches = set(), 0, []
+    for entry in entries:
+        best, match = None, None
+        for j in sorted(range(len(spans)), key=lambda j: (j < cursor, j)):
+            score = None if j in taken else _score(entry, *keys[j])
+            if score is not None and (best is None or score > best):
+                best, match = score, j
+        if match is not None:
+            taken.add(match)
+            cursor = match + 1
+        matches.append(match)
+    return matches
+
+
+def missing_spans(text, entries, pattern):
+    """(start, end) of each entry start in text that none of entries matches."""
+    spans = entry_spans(text, pattern)
+    matched = set(align(text, spans, entries))
+    return [span for j, span in enumerate(spans) if j not in matched]
+
+
+def merge_recovered(text, entries, recovered, pattern):
+    """
+    entries with those of recovered (the answer to a follow-up request
+    for the missing spans) that match one of them, each placed before the
+    first of entries from later in the text. Recovered entries already
+    among entries, or that match no missing span, are dropped.
+    """
+    missing = missing_spans(text, entries, pattern)
+    keys = {entry_key(e) for e in entries}
+    found = [(missing[j][0], n, entry) for n, (entry, j) in enumerate(zip(recovered, align(text, missing, recovered)))
+             if j is not None and entry_key(entry) not in keys]
+    if not found:
+        return entries
+    found.sort(key=lambda item: item[:2])
+    spans = entry_spans(text, pattern)
+    merged = []
+    for entry, j in zip(entries, align(text, spans, entries)):
+        while found and j is not None and found[0][0] < spans[j][0]:
+            merged.append(found.pop(0)[2])
+        merged.append(entry)
+    return merged + [entry for _, _, entry in found]
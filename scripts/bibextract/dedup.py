@@ -0,0 +1,134 @@
+import re
+
+import numpy as np
+
+from bibextract.columns import entry_key
+from bibextract.sorting import collation_key
+
+# Two entries are near-duplicates when the character 3-grams of
+# "surname forename title" overlap at least this much (Jaccard), and
+# their publication dates, volumes and the numbers in their titles don't
+# disagree (so "Letters, vol. 2" is not a repeat of "Letters, vol. 1").
+DEFAULT_THRESHOLD = 0.85
+
+# MinHash signature length and LSH banding: pairs whose 3-gram overlap is
+# above roughly (1 / BANDS) ** (1 / rows per band) ~ 0.6 share a bucket
+# and get compared exactly; the rest never meet, so the index stays
+# linear in the number of rows.
+NUM_PERM = 48
+BANDS = 6
+
+_NUMBER = re.compile(r"\d+")
+_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(20240501)
+_A = _rng.integers(1, _PRIME, NUM_PERM, dtype=np.uint64)[:, None]
+_B = _rng.integers(0, _PRIME, NUM_PERM, dtype=np.uint64)[:, None]
+
+
+def _fields(entry):
+    return [collation_key(str(entry.get(col) or "")) for col in
+            ("author1_last_name", "author1_first_name", "title", "original_date_of_publication", "volume")]
+
+
+def _compatible(a, b):
+    """True unless a and b are both known and differ."""
+    return not a or not b or a == b
+
+
+def _shingles(text):
+    """Distinct character 3-grams of text, each packed into one integer (code points fit in 21 bits)."""
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    if len(codes) < 3:
+        return np.unique(codes)
+    return np.unique((codes[:-2] << np.uint64(42)) | (codes[1:-1] << np.uint64(21)) | codes[2:])
+
+
+def _bands(grams):
+    signature = ((_A * (grams % _PRIME) + _B) % _PRIME).min(axis=1)
+    return [(band, rows.tobytes()) for band, rows in enumerate(signature.reshape(BANDS, -1))]
+
+
+class DedupIndex:
+    """
+    Entries seen so far, for dropping repeats as they arrive.
+
+    Exact duplicates match on normalized (case, accents and punctuation
+    ignored) surname, forename, title and date. With near=True, MinHash
+    LSH over the name and title also catches OCR and reading-order
+    variants of an entry already seen. Entries without a title are never
+    treated as duplicates.
+    """
+
+    def __init__(self, near=True, threshold=DEFAULT_THRESHOLD):
+        self.near = near
+        self.threshold = threshold
+        self.exact = {}
+        self.buckets = {}
+        self.shingles = []
+        self.details = []
+        self.labels = []
+
+    def __len__(self):
+        return len(self.labels)
+
+    def _match(self, entry):
+        last, first, title, date, volume = _fields(entry)
+        if not title:
+            return None, None
+        key = (last, first, title, date, volume)
+        details = (date, volume, tuple(_NUMBER.findall(title)))
+        if key in self.exact:
+            return ("exact", self.labels[self.exact[key]]), None
+        if not self.near:
+            return None, (key, details, None, None)
+        grams = _shingles(f"{last} {first} {title}")
+        shingles = frozenset(grams.tolist())
+        bands = _bands(grams)
+        seen = set()
+        for band in bands:
+            for j in self.buckets.get(band, ()):
+                if j in seen:
+                    continue
+                seen.add(j)
+                if not all(map(_compatible, details, self.details[j])):
+                    continue
+                other = self.shingles[j]
+                # Jaccard can't reach the threshold if the sizes are too far apart
+                if min(len(shingles), len(other)) < self.threshold * max(len(shingles), len(other)):
+                    continue
+                if len(shingles & other) >= self.threshold * len(shingles | other):
+                    return ("near", self.labels[j]), None
+        return None, (key, details, shingles, bands)
+
+    def add(self, entry):
+        """
+        Index entry unless it repeats an earlier one. Returns (kind, label
+        of the earlier entry) for a repeat, kind being "exact" or "near",
+        and None otherwise.
+        """
+        found, parts = self._match(entry)
+        if found or parts is None:
+            return found
+        key, details, shingles, bands = parts
+        i = len(self.labels)
+        self.exact[key] = i
+        self.labels.append(entry_key(entry))
+        self.details.append(details)
+        if self.near:
+            self.shingles.append(shingles)
+            for band in bands:
+                self.buckets.setdefault(band, []).append(i)
+        else:
+            self.shingles.append(None)
+        return None
+
+    def filter(self, entries):
+        """(new entries, [(entry, kind, label of the earlier entry), ...]) after indexing entries in order."""
+        kept, duplicates = [], []
+        for entry in entries:
+            found = self.add(entry)
+            if found:
+                duplicates.append((entry, *found))
+            else:
+                kept.append(entry)
+        return kept, duplicates
@@ -0,0 +1,61 @@
+import os
+import itertools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Number of chunk requests kept in flight. Override per run with
+# EXTRACT_CONCURRENCY=1 to get the old strictly serial behaviour.
+DEFAULT_CONCURRENCY = int(os.environ.get("EXTRACT_CONCURRENCY", "8"))
+
+
+def run_in_order(chunks, process_chunk, on_result, start_chunk=0, concurrency=None, dead_letter=None,
+                 executor=ThreadPoolExecutor):
+    """
+    Run process_chunk over chunks[start_chunk:] with up to `concurrency`
+    requests in flight at once.
+
+    on_result(i, entries) is called on the calling thread strictly in chunk
+    order, so CSV appends and progress writes stay sequential even though
+    the API calls overlap. A slow chunk holds back later results but never
+    more than `concurrency` chunks are outstanding.
+
+    If a DeadLetterLog is given, a chunk whose process_chunk raises is
+    recorded there and reported to on_result as an empty list, so the run
+    keeps going without losing the chunk. Without one the error propagates.
+
+    Pass executor=ProcessPoolExecutor for CPU-bound work; process_chunk and
+    the chunks must then be picklable.
+    """
+    if concurrency is None:
+        concurrency = DEFAULT_CONCURRENCY
+    concurrency = max(1, concurrency)
+
+    todo = itertools.islice(enumerate(chunks), start_chunk, None)
+    pending = deque()
+    with executor(max_workers=concurrency) as pool:
+        try:
+            while True:
+                while len(pending) < concurrency:
+                    item = next(todo, None)
+                    if item is None:
+                        break
+                    i, chunk = item
+                    pending.append((i, chunk, pool.submit(process_chunk, chunk)))
+                if not pending:
+                    break
+                i, chunk, future = pending.popleft()
+                try:
+                    entries = future.result()
+                except Exception as e:
+                    if dead_letter is None:
+                        raise
+                    print(f"  Chunk {i + 1} failed permanently ({e}); recorded in {dead_letter.path}")
+                    dead_letter.add(i, chunk, e)
+                    entries = []
+                on_result(i, entries)
+        except BaseException:
+            # Don't start anything new on Ctrl-C / errors; the pool still
+            # waits for requests that are already on the wire.
+            for _, _, future in pending:
+                future.cancel()
+            raise
@@ -0,0 +1,112 @@
+import os
+import json
+import hashlib
+
+from bibextract.checkpoint import sync
+from bibextract.prompts import prompt_version
+
+# When an input file is regenerated (re-OCRed, re-parsed), a rerun
+# re-chunks the new text and looks each chunk up here by content hash:
+# the rows of chunks that did not change are reused, and only changed or
+# new chunks are sent to the model.
+
+
+def rows_version(profile):
+    """
+    Short hash of everything besides the chunk text that decides a chunk's
+    rows: the prompt version, the model, and the PREPARSER and
+    VERIFY_COVERAGE settings the stored rows were produced with.
+    """
+    settings = json.dumps([prompt_version(profile), profile.model, profile.preparser, profile.verify_coverage])
+    return hashlib.sha256(settings.encode("utf-8")).hexdigest()[:12]
+
+
+def source_hash(path):
+    """sha256 of a file's bytes, read in blocks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class ChunkRows:
+    """
+    Persistent map from (chunk sha256, rows_version) to the rows
+    extracted for that chunk, kept beside the progress file.
+
+    Records are appended as JSON lines and never truncated by a
+    checkpoint, so they outlive a restart; only the byte offset of each
+    record is held in memory. A record half written by a crash is skipped
+    on load, and the latest record for a key wins.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.offsets = {}
+        self.records = 0
+        if not os.path.exists(path):
+            return
+        with open(path, "rb") as f:
+            offset = 0
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    self.offsets[(record["sha256"], record["version"])] = offset
+                    self.records += 1
+                except (ValueError, KeyError, TypeError):
+                    pass
+                offset += len(line)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def get(self, sha256, version):
+        """The rows stored for a chunk, or None."""
+        offset = self.offsets.get((sha256, version))
+        if offset is None:
+            return None
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return json.loads(f.readline())["entries"]
+
+    def put(self, sha256, version, entries):
+        if (sha256, version) in self.offsets:
+            return
+        # Start on a fresh line if a crash left the last record unfinished
+        with open(self.path, "ab") as f:
+            if f.tell() and not self._ends_with_newline():
+                f.write(b"\n")
+            self.offsets[(sha256, version)] = f.tell()
+            record = {"sha256": sha256, "version": version, "entries": entries}
+            f.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+            sync(f)
+        self.records += 1
+
+    def _ends_with_newline(self):
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def compact(self, keep):
+        """
+        Rewrite the file with only the records for the (sha256, version)
+        keys in keep, once it holds as many other records as kept ones.
+        Returns the number of records dropped.
+        """
+        keep = [key for key in dict.fromkeys(keep) if key in self.offsets]
+        dropped = self.records - len(keep)
+        if dropped < max(len(keep), 1):
+            return 0
+        tmp_path = self.path + ".tmp"
+        offsets = {}
+        with open(self.path, "rb") as src, open(tmp_path, "wb") as f:
+            for key in keep:
+                src.seek(self.offsets[key])
+                offsets[key] = f.tell()
+                f.write(src.readline())
+            sync(f)
+        os.replace(tmp_path, self.path)
+        self.offsets = offsets
+        self.records = len(keep)
+        return dropped
@@ -0,0 +1,99 @@
+import re
+
+# Title pages, prefaces, library-symbol tables, subject indexes and scan
+# banners hold no entries but cost as much to send as pages that do.
+# Each page is classified locally and only "entries" pages go on to the
+# chunker, so the model never sees the rest.
+
+ENTRIES = "entries"
+FRONT = "front matter"
+INDEX = "index"
+NOISE = "noise"
+
+# Index pages are mostly runs of entry numbers ("2934, 3105, 3165"):
+# more than this many "number, number" pairs per 1000 characters. Entry
+# pages, with their dates and page counts, stay under 7.
+INDEX_PAIRS_PER_KCHAR = 15
+_NUMBER_PAIR = re.compile(r"\d{2,4}\s*[,.]\s*\d{2,4}\b")
+
+# Pages with fewer letters than this and no entry start (blank pages,
+# shelf marks, scanner banners) are noise.
+NOISE_LETTERS = 100
+_LETTER = re.compile(r"[^\W\d_]")
+
+
+class PageClassifier:
+    """
+    Labels pages in reading order as ENTRIES, FRONT, INDEX or NOISE.
+
+    Everything before the first page with at least min_entries matches of
+    the boundary pattern, and no front-matter pattern match, is front
+    matter. From there pages are entries, however few starts they hold
+    (long annotations can fill a page), until the first index page: one
+    dense with number runs or matching an index pattern. Pages after it
+    are back matter until one matches a front-matter pattern (the title
+    page of a further volume, joined into the same file), which starts
+    front matter again, or one reads as entries again: min_entries starts
+    and nothing index-like. Near-empty pages are noise wherever they fall.
+    """
+
+    def __init__(self, boundary_pattern, min_entries=3, front_patterns=(), index_patterns=()):
+        self.boundary = re.compile(boundary_pattern)
+        self.min_entries = min_entries
+        self.front = [re.compile(p) for p in front_patterns]
+        self.index = [re.compile(p) for p in index_patterns]
+        self.state = FRONT
+
+    def classify(self, text):
+        starts = len(self.boundary.findall("\n" + text))
+        if not starts and len(_LETTER.findall(text)) < NOISE_LETTERS:
+            return NOISE
+        front = any(p.search(text) for p in self.front)
+        if self.state == FRONT:
+            if starts < self.min_entries or front:
+                return FRONT
+            self.state = ENTRIES
+        elif self.state == ENTRIES:
+            if self._index_like(text):
+                self.state = INDEX
+        elif front:
+            self.state = FRONT
+        elif starts >= self.min_entries and not self._index_like(text):
+            self.state = ENTRIES
+        return self.state
+
+    def _index_like(self, text):
+        pairs = len(_NUMBER_PAIR.findall(text))
+        return pairs * 1000 > INDEX_PAIRS_PER_KCHAR * len(text) or any(p.search(text) for p in self.index)
+
+
+def split_pages(lines, page_break):
+    """
+    Group a stream of (byte_offset, char_offset, segment) lines into
+    pages, yielding each page's list of lines. A line matching page_break
+    starts a new page.
+    """
+    page_break = re.compile(page_break)
+    page = []
+    for line in lines:
+        if page and page_break.search(line[2]):
+            yield page
+            page = []
+        page.append(line)
+    if page:
+        yield page
+
+
+def entry_pages(lines, classifier, page_break, clean=None, counts=None):
+    """
+    The lines of the pages classifier labels ENTRIES, unchanged, so
+    offsets still point into the source file. Pages are classified on
+    their text after clean(); counts, a Counter, gets one per page label.
+    """
+    for page in split_pages(lines, page_break):
+        text = "".join(segment for _, _, segment in page)
+        label = classifier.classify(clean(text) if clean else text)
+        if counts is not None:
+            counts[label] += 1
+        if label == ENTRIES:
+            yield from page
@@ -0,0 +1,585 @@
+import io
+import os
+import json
+import time
+import hashlib
+import threading
+from functools import partial
+from contextlib import contextmanager
+from types import SimpleNamespace
+from collections import Counter
+
+from openai import OpenAI
+
+from bibextract.columns import entry_key
+from bibextract.sanitize import SANITIZERS, compile_noise
+from bibextract.reader import read_lines, find_last, truncate
+from bibextract.pages import ENTRIES, PageClassifier, entry_pages
+from bibextract.chunking import boundary_chunks, fixed_chunks, page_chunks, token_chunks
+from bibextract.tokens import count_tokens
+from bibextract.engine import run_in_order
+from bibextract.scheduler import RequestScheduler, DeadLetterLog
+from bibextract.cache import ResponseCache
+from bibextract.batch import run_batch
+from bibextract.checkpoint import Checkpoint, sync, file_size
+from bibextract.sink import make_sink
+from bibextract.dedup import DedupIndex
+from bibextract.incremental import ChunkRows, rows_version, source_hash
+from bibextract.preparse import PREPARSERS, preparse, merge
+from bibextract.coalesce import Member, coalesce, group_text, split_results, excerpt
+from bibextract.streaming import read_completion, stream_completion, resume_position, repeated_entries
+from bibextract.coverage import missing_spans, merge_recovered
+from bibextract.wire import decode
+from bibextract.prompts import (CACHEABLE_PREFIX_TOKENS, build_messages, prompt_version, prefix_tokens, register,
+                                add_usage, usage_stats)
+
+# Shared across every profile and input file in one process, so the rate
+# limits and cache statistics cover the whole run.
+scheduler = RequestScheduler()
+cache = ResponseCache()
+_client = None
+
+# Wall-clock seconds the main thread spent reading/sanitizing/chunking
+# ("chunk") and writing rows and checkpoints ("write"), and CPU seconds
+# spent pre-parsing entries ("preparse"), looking chunks up in the
+# response cache and rows file ("lookup") and aligning answers to the
+# chunk text for the coverage check and cut-off answers ("align"); the
+# rest of a run is spent waiting on the API. The CPU stages partly run on
+# worker threads, where wall time would also count waiting for the GIL.
+# Summed over every run in the process.
+stage_times = Counter()
+# Prompt, cached-prompt and completion tokens reported by the API, also
+# summed over the process.
+usage = Counter()
+# Streamed responses: how soon their first entry arrived and how long the
+# whole answer took; and how many answers, streamed or not, were cut off
+# and finished with a request for the rest of the chunk.
+streamed = Counter()
+# VERIFY_COVERAGE: entry starts no returned entry matched, follow-up
+# requests sent for them, and the entries those recovered.
+coverage = Counter()
+_usage_lock = threading.Lock()
+
+
+def get_client():
+    global _client
+    if _client is None:
+        _client = OpenAI(max_retries=0) # retries and rate limits are handled by the scheduler
+    return _client
+
+
+def iter_chunks(profile, f, pages=None):
+    """
+    Yield (byte_offset, chunk_text) for a binary file, lazily.
+
+    The profile's cut-off, page classifier, sanitizer and noise patterns
+    are applied as the file streams past, so memory stays flat however
+    large the input is; only the page and the chunk being assembled are
+    held. With CLASSIFY_PAGES, pages are counted by label in the pages
+    Counter if one is given.
+    """
+    end = -1
+    if profile.end_marker:
+        end = find_last(read_lines(f), profile.end_marker)
+        f.seek(0)
+    lines = read_lines(f)
+    if end != -1 and end > profile.end_marker_min_offset:
+        lines = truncate(lines, end)
+
+    sanitizer = SANITIZERS.get(profile.sanitizer)
+    noise = compile_noise(tuple(profile.noise_patterns))
+
+    def clean(text):
+        if sanitizer:
+            text = sanitizer(text)
+        return noise.sub("", text) if noise else text
+
+    if profile.classify_pages:
+        classifier = PageClassifier(profile.boundary_pattern, profile.min_page_entries,
+                                    profile.front_matter_patterns, profile.index_patterns)
+        lines = entry_pages(lines, classifier, profile.page_break, clean, pages)
+
+    if profile.chunking == "pages":
+        # Sanitizers strip form feeds, so cut the pages first
+        for offset, chunk in page_chunks(((b, s) for b, _, s in lines), profile.pages_per_chunk):
+            yield offset, clean(chunk)
+        return
+
+    segments = ((b, clean(s)) for b, _, s in lines)
+    if profile.chunking == "tokens":
+        yield from token_chunks(segments, profile.boundary_pattern, profile.max_input_tokens,
+                                profile.max_output_tokens, profile.output_tokens_per_entry,
+                                lambda text: count_tokens(text, profile.model), profile.overlap_entries)
+    elif profile.chunking == "fixed":
+        yield from fixed_chunks(segments, profile.chunk_size_target)
+    else:
+        yield from boundary_chunks(segments, profile.boundary_pattern, profile.chunk_size_target)
+
+
+@contextmanager
+def timing(stage, clock=time.thread_time):
+    """Add the time the with block took by clock (this thread's CPU time by default) to stage_times[stage]."""
+    start = clock()
+    try:
+        yield
+    finally:
+        with _usage_lock:
+            stage_times[stage] += clock() - start
+
+
+def timed(iterable, stage):
+    """Yield from iterable, adding the time spent producing each item to stage_times[stage]."""
+    it = iter(iterable)
+    while True:
+        with timing(stage, time.perf_counter):
+            try:
+                item = next(it)
+            except StopIteration:
+                return
+        yield item
+
+
+def prepare_chunks(profile, text):
+    """All chunk texts for an in-memory string."""
+    return [chunk for _, chunk in iter_chunks(profile, io.BytesIO(text.encode("utf-8")))]
+
+
+def worth_sending(profile, chunk_text):
+    text = chunk_text.strip()
+    return bool(text) and len(text) >= profile.min_chunk_chars
+
+
+def build_request(profile, chunk_text):
+    """Chat completion request for one chunk, or None if it is too short to bother with."""
+    if not worth_sending(profile, chunk_text):
+        return None
+    return {
+        "model": profile.model,
+        "messages": build_messages(profile, chunk_text),
+        "response_format": {"type": "json_object"},
+        # Routes requests sharing this prefix to the same prompt cache
+        "prompt_cache_key": f"{profile.name}-{prompt_version(profile)}",
+    }
+
+
+def decode_entries(profile, entries):
+    """A response's entries as full rows; compact-format answers are expanded and validated."""
+    return decode(entries) if profile.response_format == "compact" else entries
+
+
+def request_completion(request, stream=False):
+    """Send one request; returns a streaming.Completion."""
+    create = get_client().chat.completions.create
+    if stream:
+        completion = scheduler.call(partial(stream_completion, create), **request)
+    else:
+        completion = read_completion(scheduler.call(create, **request))
+    with _usage_lock:
+        add_usage(usage, completion.usage)
+        if stream:
+            streamed["responses"] += 1
+            streamed["first_entry_s"] += completion.first_entry_s or completion.elapsed_s
+            streamed["elapsed_s"] += completion.elapsed_s
+    return completion
+
+
+def remaining_text(profile, chunk_text, entries, completion):
+    """The part of chunk_text after the last entry a cut-off answer completed."""
+    if completion.error is not None:
+        reason = f"stream broke ({completion.error.__class__.__name__}: {completion.error})"
+    else:
+        reason = "hit the output token limit"
+    position = resume_position(chunk_text, entries, profile.boundary_pattern)
+    if position is not None and not chunk_text[position:].strip():
+        return ""  # the cut came after the last entry
+    rest = excerpt(chunk_text, [(position, len(chunk_text))]) if position is not None else chunk_text
+    if len(rest) >= len(chunk_text):
+        # Don't let a partial answer pass for the whole chunk
+        raise ValueError(f"Response {reason} ({len(chunk_text)}-char chunk)")
+    print(f"  Response {reason} after {len(entries)} entries; requesting the rest of the chunk")
+    return rest
+
+
+def recover_skipped(profile, chunk_text, entries, stream=False):
+    """
+    entries plus any the model skipped: the entry starts (BOUNDARY_PATTERN
+    matches) none of them matches are sent again in one follow-up request.
+    """
+    with timing("align"):
+        spans = missing_spans(chunk_text, entries, profile.boundary_pattern)
+    if not spans:
+        return entries
+    recovered = process_chunk(profile, excerpt(chunk_text, spans), stream, verify=False)
+    with timing("align"):
+        merged = merge_recovered(chunk_text, entries, recovered, profile.boundary_pattern)
+    print(f"  {len(spans)} entry start(s) unmatched in the answer; follow-up recovered {len(merged) - len(entries)}")
+    with _usage_lock:
+        coverage["missing"] += len(spans)
+        coverage["requests"] += 1
+        coverage["recovered"] += len(merged) - len(entries)
+    return merged
+
+
+def process_chunk(profile, chunk_text, stream=False, verify=True):
+    request = build_request(profile, chunk_text)
+    if request is None:
+        return []
+    with timing("lookup"):
+        entries = cache.get(request)
+    if entries is not None:
+        return entries
+
+    completion = request_completion(request, stream)
+    if not completion.truncated:
+        entries = decode_entries(profile, json.loads(completion.text).get("entries", []))
+    else:
+        # Keep the entries that closed before the cut and ask again only
+        # for the text after the last of them, dropping any the answer to
+        # that repeats
+        entries = decode_entries(profile, completion.entries)
+        with timing("align"):
+            rest = remaining_text(profile, chunk_text, entries, completion)
+        rest = process_chunk(profile, rest, stream, verify=False)
+        entries += rest[repeated_entries(entries, rest):]
+        with _usage_lock:
+            streamed["resumed"] += 1
+    if verify and profile.verify_coverage:
+        entries = recover_skipped(profile, chunk_text, entries, stream)
+    with timing("lookup"):
+        cache.put(request, entries)
+    return entries
+
+
+def start_file(profile, input_file, stream=False):
+    """
+    Open (or resume) the outputs for one input file. Returns a namespace
+    with chunks() yielding its (index, text) still to extract,
+    write_chunk(index, entries) to be called for them in order, and
+    finish(); None if the file can't be run.
+    """
+    input_file = input_file or profile.input_file
+    if not input_file or not os.path.exists(input_file):
+        print(f"Missing input: {input_file}")
+        return None
+
+    output_csv, progress_file = profile.paths(input_file)
+    for path in (output_csv, progress_file):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+    failed_file = os.path.splitext(progress_file)[0] + ".failed.jsonl"
+    batch_file = os.path.splitext(progress_file)[0] + ".batch.json"
+    manifest_file = os.path.splitext(progress_file)[0] + ".manifest.jsonl"
+    duplicates_file = os.path.splitext(progress_file)[0] + ".duplicates.jsonl"
+    rows_file = os.path.splitext(progress_file)[0] + ".rows.jsonl"
+    prompt = prompt_version(profile)
+    version = rows_version(profile)
+
+    # The rows (CSV or Arrow stream), manifest, dead-letter and duplicates
+    # files are append-only; the progress file commits them all at once
+    # after each chunk.
+    sink = make_sink(profile.output_format, output_csv)
+    checkpoint = Checkpoint(progress_file, sink.files + [manifest_file, failed_file, duplicates_file])
+    state = checkpoint.load()
+    # Progress without a chunking key (a plain chunk count from before it
+    # was recorded) can't be trusted to count the same chunks
+    if state.get("chunks") and state.get("chunking") != profile.chunking_key():
+        changed = "changed since" if "chunking" in state else "were not recorded when"
+        print(f"{profile.name}'s chunking settings {changed} {progress_file} was written;"
+              f" remove it (and {output_csv}) to start over.")
+        return None
+    if state.get("sink", sink.format) != sink.format:
+        print(f"{progress_file} was written with {state['sink']} output, not {sink.format};"
+              f" remove it (and {sink.files[0]}) to start over.")
+        return None
+    # Rows are reused by chunk content, so a changed input is re-chunked
+    # from the start and only the chunks not seen before are extracted.
+    # Progress from before the input was hashed counts as changed.
+    source = source_hash(input_file)
+    if state.get("chunks") and state.get("source") != source:
+        print(f"{input_file} changed since {progress_file} was written; re-chunking it and"
+              f" extracting only chunks whose rows aren't in {rows_file}")
+        checkpoint.reset()
+        for path in (batch_file, os.path.splitext(batch_file)[0] + ".jsonl"):
+            if os.path.exists(path):
+                os.remove(path)
+        state = {}
+    else:
+        state = checkpoint.restore()
+    start_chunk = state.get("chunks", 0)
+    if start_chunk:
+        print(f"Resuming from chunk {start_chunk}...")
+    dead_letter = DeadLetterLog(failed_file, min(state.get("failed_from", 0), file_size(failed_file)))
+    rows = ChunkRows(rows_file)
+    # Chunks that failed this run; their empty results aren't kept as rows
+    failed = set()
+
+    def fail(i, chunk_text, error):
+        failed.add(i)
+        dead_letter.add(i, chunk_text, error)
+
+    # Rows of the last chunk written, to drop the ones the overlap repeats
+    previous_keys = set(state.get("previous_keys", []))
+
+    def commit(chunks):
+        checkpoint.commit(chunks=chunks, failed_from=dead_letter.start, chunking=profile.chunking_key(),
+                          sink=sink.format, source=source,
+                          previous_keys=sorted(previous_keys) if profile.overlap_entries else [])
+
+    if not file_size(sink.files[0]):
+        sink.start()
+        commit(start_chunk)
+
+    def append_rows(entries):
+        sink.write(entries)
+        print(f"  Saved {len(entries)} entries to {sink.files[0]}")
+
+    dedup = None
+    if profile.dedup:
+        dedup = DedupIndex(near=profile.dedup == "near", threshold=profile.dedup_threshold)
+        for entry in sink.read_entries():
+            dedup.add(entry)
+        if len(dedup):
+            print(f"Indexed {len(dedup)} entries already in {sink.files[0]} for deduplication")
+
+    def drop_duplicates(i, entries):
+        """Entries not already written; the others are logged to duplicates_file."""
+        if dedup is None:
+            return entries
+        entries, duplicates = dedup.filter(entries)
+        if duplicates:
+            print(f"  Dropped {len(duplicates)} duplicate entries")
+            with open(duplicates_file, 'a', encoding='utf-8') as f:
+                for entry, kind, of in duplicates:
+                    f.write(json.dumps({"chunk": i, "match": kind, "of": of, "entry": entry}) + "\n")
+                sync(f)
+        return entries
+
+    offsets = {}
+    hashes = {}
+    # Entries the profile's PREPARSER read locally, by chunk; only the
+    # entries it declined are sent to the model.
+    preparser = PREPARSERS[profile.preparser] if profile.preparser else None
+    parts = {}
+    preparsed = Counter()
+    # Rows from the rows file for chunks in flight, by chunk; they are
+    # sent with no text, so they cost no request
+    reused = {}
+    reuse = Counter()
+    # CLASSIFY_PAGES: pages of the input by label
+    pages = Counter()
+
+    def chunks():
+        print(f"Streaming {input_file} ({profile.name})...")
+        pages.clear()
+        with open(input_file, 'rb') as f:
+            for i, (offset, chunk) in enumerate(timed(iter_chunks(profile, f, pages), "chunk")):
+                if i < start_chunk:
+                    continue
+                offsets[i] = offset
+                with timing("lookup"):
+                    hashes[i] = hashlib.sha256(chunk.encode("utf-8")).hexdigest()
+                    entries = rows.get(hashes[i], version)
+                if entries is not None:
+                    reused[i] = entries
+                    yield i, ""
+                    continue
+                if preparser:
+                    with timing("preparse"):
+                        parts[i], chunk = preparse(preparser, chunk, profile.boundary_pattern)
+                yield i, chunk
+
+    def write_chunk(i, entries):
+        nonlocal previous_keys
+        start = time.perf_counter()
+        offset = offsets.pop(i, 0)
+        sha256 = hashes.pop(i, None)
+        if i in reused:
+            entries = reused.pop(i)
+            reuse["reused"] += 1
+        else:
+            if i in parts:
+                local = parts.pop(i)
+                preparsed["local"] += len(local) - (None in local)
+                preparsed["model"] += len(entries)
+                preparsed["skipped"] += None not in local
+                entries = merge(local, entries)
+            if i in failed:
+                failed.discard(i)
+            elif sha256:
+                rows.put(sha256, version, entries)
+            reuse["extracted"] += 1
+        print(f"Chunk {i + 1} (byte {offset}): found {len(entries)} entries")
+        if profile.overlap_entries:
+            keys = [entry_key(e) for e in entries]
+            repeated = sum(1 for k in keys if k in previous_keys)
+            if repeated:
+                print(f"  Dropped {repeated} entries repeated from the previous chunk")
+            entries = [e for e, k in zip(entries, keys) if k not in previous_keys]
+            previous_keys = set(keys)
+        entries = drop_duplicates(i, entries)
+        if entries:
+            append_rows(entries)
+        record = {"chunk": i, "offset": offset, "sha256": sha256, "entries": len(entries),
+                  "prompt": prompt, "rows": version}
+        with open(manifest_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + "\n")
+            sync(f)
+        commit(i + 1)
+        with _usage_lock:
+            stage_times["write"] += time.perf_counter() - start
+
+    def extract(chunk_text):
+        return process_chunk(profile, chunk_text, stream)
+
+    # Chunks that failed for good on an earlier run are retried first
+    def append_recovered(entries):
+        entries = drop_duplicates(None, entries)
+        if entries:
+            append_rows(entries)
+
+    if dead_letter.replay(extract, append_recovered):
+        commit(start_chunk)
+        if dead_letter.compact():
+            commit(start_chunk)
+
+    def finish():
+        sink.finish()
+        if pages:
+            skipped = ", ".join(f"{n} {label}" for label, n in pages.most_common() if label != ENTRIES)
+            print(f"Classified the {sum(pages.values())} pages of {input_file}: {pages[ENTRIES]} of entries"
+                  f" sent on, skipped {skipped or 'none'}")
+        if reuse["reused"]:
+            print(f"Reused the rows of {reuse['reused']} unchanged chunk(s) from {rows_file};"
+                  f" {reuse['extracted']} chunk(s) extracted")
+        if preparsed:
+            total = preparsed["local"] + preparsed["model"]
+            print(f"Pre-parsed {preparsed['local']} of {total} entries in {input_file} locally"
+                  f" ({preparsed['local'] / max(total, 1):.0%}); {preparsed['skipped']} chunk(s) needed no API call")
+        # Drop rows of chunks the input no longer has, once they pile up
+        if os.path.exists(manifest_file):
+            with open(manifest_file, 'r', encoding='utf-8') as f:
+                records = [json.loads(line) for line in f if line.strip()]
+            dropped = rows.compact((r["sha256"], r.get("rows")) for r in records if r.get("sha256"))
+            if dropped:
+                print(f"Dropped {dropped} stale chunk(s) from {rows_file}")
+
+    return SimpleNamespace(chunks=chunks, write_chunk=write_chunk, finish=finish, fail=fail,
+                           dead_letter=dead_letter, batch_file=batch_file)
+
+
+class GroupDeadLetter:
+    """Records a failed group's chunks in their own files' dead-letter logs, as if sent one by one."""
+
+    def __init__(self, files):
+        paths = list(dict.fromkeys(f.dead_letter.path for f in files))
+        self.path = paths[0] if len(paths) == 1 else "each input's .failed.jsonl"
+
+    def add(self, group_index, group, error):
+        for member in group:
+            if member.wanted:
+                member.source.fail(member.index, member.text, error)
+
+
+def run(profile, input_files=None, batch=False, concurrency=None, stream=False):
+    """
+    Extract one input file (the profile's INPUT_FILE by default) or a list
+    of them. With the profile's COALESCE setting, small adjacent chunks,
+    across files too, share a request. stream=True streams live responses
+    (ignored with batch), so one that breaks off keeps the entries it
+    completed; rows are still written only once a chunk's answer is whole.
+    """
+    if input_files is None or isinstance(input_files, str):
+        input_files = [input_files]
+    input_files = list(dict.fromkeys(input_files))
+    # Inputs sharing an output or progress file would overwrite each other
+    claimed = {}
+    for input_file in input_files:
+        input_file = input_file or profile.input_file
+        for path in profile.paths(input_file) if input_file else ():
+            if claimed.setdefault(path, input_file) != input_file:
+                print(f"{input_file} and {claimed[path]} would both write {path}; run them separately,"
+                      f" or give {profile.name} an OUTPUT_FILE and PROGRESS_FILE with {{stem}} in them.")
+                return
+    files = [f for f in (start_file(profile, path, stream) for path in input_files) if f]
+    if not files:
+        return
+    tokens = prefix_tokens(profile)
+    print(f"Prompt {register(profile)} ({profile.name}): {tokens}-token static prefix"
+          + (f", under the {CACHEABLE_PREFIX_TOKENS} tokens providers need to cache it"
+             if tokens < CACHEABLE_PREFIX_TOKENS else ""))
+    usage_before = usage.copy()
+    streamed_before = streamed.copy()
+    coverage_before = coverage.copy()
+
+    members = (Member(f, i, chunk, worth_sending(profile, chunk)) for f in files for i, chunk in f.chunks())
+    if profile.coalesce:
+        groups = coalesce(members, profile.max_input_tokens, profile.max_output_tokens,
+                          profile.output_tokens_per_entry, lambda text: count_tokens(text, profile.model),
+                          profile.boundary_pattern)
+    else:
+        groups = ([member] for member in members)
+
+    pending = {}
+    coalesced = Counter()
+
+    def numbered():
+        for g, group in enumerate(groups):
+            pending[g] = group
+            sent = sum(m.wanted for m in group)
+            coalesced["chunks"] += sent
+            coalesced["requests"] += sent > 0
+            yield group
+
+    def write_group(g, entries):
+        group = pending.pop(g)
+        for member, member_entries in zip(group, split_results(group, entries)):
+            member.source.write_chunk(member.index, member_entries)
+
+    def extract(group):
+        text = group_text(group)
+        return process_chunk(profile, text, stream) if text is not None else []
+
+    def verify_group(group, entries):
+        return recover_skipped(profile, group_text(group), entries, stream)
+
+    def group_request(group):
+        text = group_text(group)
+        return build_request(profile, text) if text is not None else None
+
+    # A group is named in a batch by its first chunk's place in the inputs,
+    # which a resumed run numbers the same way as the run that submitted it
+    position = {id(f): n for n, f in enumerate(files)}
+
+    def group_key(group):
+        return f"{position[id(group[0].source)]}-{group[0].index}"
+
+    dead_letter = GroupDeadLetter(files)
+    if batch:
+        run_batch(numbered(), group_request, write_group, files[0].batch_file,
+                  get_client(), cache=cache, dead_letter=dead_letter, usage=usage,
+                  decode=lambda entries: decode_entries(profile, entries), key=group_key,
+                  verify=verify_group if profile.verify_coverage else None)
+    else:
+        run_in_order(numbered(), extract, write_group, concurrency=concurrency, dead_letter=dead_letter)
+    for f in files:
+        f.finish()
+    if coalesced["requests"] < coalesced["chunks"]:
+        print(f"Coalesced {coalesced['chunks']} chunks into {coalesced['requests']} requests")
+    run_usage = usage.copy()
+    run_usage.subtract(usage_before)
+    if run_usage["prompt_tokens"]:
+        print(usage_stats(run_usage))
+    run_streamed = streamed.copy()
+    run_streamed.subtract(streamed_before)
+    if run_streamed["responses"]:
+        n = run_streamed["responses"]
+        print(f"Streamed {n} responses: first entry after {run_streamed['first_entry_s'] / n:.2f}s on average,"
+              f" whole response after {run_streamed['elapsed_s'] / n:.2f}s")
+    if run_streamed["resumed"]:
+        print(f"{run_streamed['resumed']} cut-off responses finished with a request for the rest of the chunk")
+    run_coverage = coverage.copy()
+    run_coverage.subtract(coverage_before)
+    if run_coverage["requests"]:
+        print(f"Coverage check: {run_coverage['missing']} skipped entries re-requested in {run_coverage['requests']}"
+              f" follow-ups, {run_coverage['recovered']} recovered")
+    print(cache.stats())
\ No newline at end of file
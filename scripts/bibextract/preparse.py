@@ -0,0 +1,170 @@
+import re
+
+# Local parsers for bibliographies whose clean entries follow a fixed
+# grammar. A parser takes one entry's text and returns an entry dict, or
+# None unless it is sure of every field; anything it declines goes to the
+# model as before. Each one fills the fields the way the profile's prompt
+# asks the model to.
+
+_ELLIPSIS = re.compile(r"\s*\.(?:\s?\.){2}\s*")
+# Word broken across a line end ("recol¬ lections")
+_SOFT_HYPHEN = re.compile(r"(\w)¬\s+(\w)")
+# Layout debris a clean entry never contains: stray symbols, running
+# heads ("ENTRIES 19-38", "8 Allison—Anderson"), cross-references,
+# words split by OCR ("acquisi - tion", "Matri- monial", "T exas") and
+# misread digits ("I860").
+_JUNK = re.compile(r"[\[\]{}|¬«»■^~<>\\]|\bENTRIES\b|\bSee [A-Z]|[a-z] ?- [a-z]|\b[B-HJ-Z] [a-z]|\d [A-Z][\w’']+ ?—|\bI\d|,,")
+# Titles naming people in other roles (fields the parsers don't fill),
+# running on into a second sentence ("... service. The memoirs of ..."),
+# giving an edition, or cut short at an initial ("Memoirs of John H")
+_TITLE_DECLINE = re.compile(r"\b(?:[Ee]dited|[Ee]d\.|[Tt]ranslated|[Tt]old to|[Dd]ictated|[Ww]ith|[Bb]y)\b|[a-z]{4}\. [A-Z]"
+                            r"|\b(?:ed|[Ee]dition)$|\b[A-Z]$")
+# Places that took in the sentence before them ("With Bill Libby. New York")
+_PLACE_DECLINE = re.compile(r"[a-z]{3}\. |^(?:With|Illustrated)\b")
+_INITIAL_END = re.compile(r"\b[A-Z]$")
+_SENTENCE_END = re.compile(r"[.?!)\"”’']$")
+
+_NAME = r"(?P<last>[A-Z][A-Za-z'’\-]+), (?P<first>[A-Z][A-Za-z.'’\- ]*?(?: \([A-Za-z.'’\- ]+\))?)"
+# A place is capitalized words: "Boston", "N.Y.", "Boston & N.Y.", "Portland, Oreg."
+_PLACE = r"(?P<place>[A-Z][A-Za-z.]*(?:,? (?:&|[A-Z][A-Za-z.]*))*)"
+_IMPRINT = _PLACE + r": (?P<publisher>[A-Z][^:]*?), (?P<year>1[5-9]\d\d)"
+
+# Kaplan: "Abbot, Willis John, 1863-1934. [3] Watching the world go by.
+# Boston: Little,Brown, 1934. 358 p. WU. Reporter in Chicago and N.Y."
+# The [id] column is interleaved with the text and is removed first.
+_KAPLAN_ID = re.compile(r"(\w-)?\s*\[\s*\d[\d ]*\]\s*")
+_KAPLAN = re.compile(
+    r"^" + _NAME +
+    r"(?:, (?:b\. (?P<born>1\d{3})|(?P<born2>1\d{3}) ?[-—–] ?(?P<died>1\d{3})))?"
+    r"\. (?P<title>[^:]+?)\. " + _IMPRINT +
+    r"\. (?P<pages>\d+) p\. (?P<library>[A-Z][A-Za-z]{0,5})\.(?: (?P<summary>.+))?$"
+)
+
+# Briscoe: "0010 Abraham, Abie 1913- Ghost of Bataan speaks. New York:
+# Vantage Press, 1971. (1948) 244 p. Index. An American soldier ..."
+_BRISCOE_DATES = r"(?:(?P<born>1\d{3})-(?P<died>1\d{3})?|b\. ?(?P<born2>1\d{3}))"
+_BRISCOE_REST = (
+    r" (?P<title>[^:]+?)\. " + _IMPRINT +
+    r"\. (?:\((?P<orig>1\d{3})\) )?(?P<pages>\d+) p\.(?: Index\.)?(?: (?P<summary>.+))?$"
+)
+# Tried in order: with the lifespan, so a name of several words
+# ("Acheson, Dean Gooderham 1893-1971") is read up to it, then without.
+_BRISCOE = [
+    re.compile(r"^(?P<id>\d{4}) \*?" + _NAME + " " + _BRISCOE_DATES + _BRISCOE_REST),
+    re.compile(r"^(?P<id>\d{4}) \*?" + _NAME + r"(?P<born>)(?P<died>)(?P<born2>)" + _BRISCOE_REST),
+]
+_LIFESPAN = r"(?:1\d{3}\??-(?:1\d{3})?|b\. ?1\d{3})"
+# The lifespan printed twice over ("1899-1951 1899-1951", "b.1879 b.1879")
+_BRISCOE_REPEAT = re.compile(r"(?<!\S)(" + _LIFESPAN + r")(?: \1)+(?!\S)")
+# A title that took in a date: a lifespan the patterns could not place
+# ("19272 Widow"), or one after a name they cut short
+_BRISCOE_TITLE_DECLINE = re.compile(r"^\W*(?:\d|b\. ?\d)|(?<!\S)" + _LIFESPAN + r"(?!\S)")
+# What follows the name on its own line, when that is more of the name
+# ("Clark, John Kenneth\nTelling it ..."): no lifespan, no full stop
+# other than an initial's
+_BRISCOE_NAME_TAIL = re.compile(r"^(?!.*(?:(?<!\S)" + _LIFESPAN + r"(?!\S)|[^A-Z\s]\. )).+")
+# Dates and ids of neighbouring entries that the layout dropped at the end of this one
+_BRISCOE_TAIL = re.compile(r"(?:\s+(?:1\d{3}-(?:1\d{3})?|\d{4}))+$")
+
+
+def _flatten(text):
+    text = _SOFT_HYPHEN.sub(r"\1\2", text)
+    return " ".join(text.split())
+
+
+def _confident(text, m):
+    if (_JUNK.search(text) or _TITLE_DECLINE.search(m["title"]) or " and " in m["first"]
+            or _PLACE_DECLINE.search(m["place"])):
+        return False
+    return not m["summary"] or bool(_SENTENCE_END.search(m["summary"]))
+
+
+def _entry(m, **fields):
+    first = m["first"]
+    # "Balaban, Abe J. Continuous ..." - the period after the initial
+    # doubled as the name's full stop
+    if _INITIAL_END.search(first):
+        first += "."
+    entry = {
+        "author1_last_name": m["last"],
+        "author1_first_name": first,
+        "title": m["title"].strip("“”\""),
+        "publisher_location": m["place"],
+        "publisher": m["publisher"],
+        "number_of_pages": f"{m['pages']} p",
+        "summary": m["summary"] or "N/A",
+    }
+    entry.update(fields)
+    return {k: v or "N/A" for k, v in entry.items()}
+
+
+def parse_kaplan(text):
+    text = _flatten(text)
+    ids = _KAPLAN_ID.findall(text)
+    if len(ids) != 1:
+        return None
+    # "Recol- [12] lections" -> "Recollections"
+    text = _KAPLAN_ID.sub(lambda m: m[1][:-1] if m[1] else " ", text).strip()
+    # "&r" is how this scan's OCR reads "&"
+    text = _ELLIPSIS.sub(". ", text).replace("&r ", "& ")
+    m = _KAPLAN.match(text)
+    if not m or not _confident(text, m):
+        return None
+    return _entry(m, date_of_birth=m["born"] or m["born2"], date_of_death=m["died"],
+                  original_date_of_publication=m["year"])
+
+
+def parse_briscoe(text):
+    name_line = _flatten(text.lstrip().split("\n", 1)[0])
+    text = _BRISCOE_TAIL.sub("", _ELLIPSIS.sub(". ", _flatten(text)))
+    text = _BRISCOE_REPEAT.sub(r"\1", text, count=1)
+    m = next(filter(None, (pattern.match(text) for pattern in _BRISCOE)), None)
+    if (not m or _BRISCOE_TITLE_DECLINE.search(m["title"])
+            or _BRISCOE_NAME_TAIL.match(name_line[m.end("first"):]) or not _confident(text, m)):
+        return None
+    # The prompt asks for the imprint year as the later date when a
+    # "(year)" gives the original one, and so the model files it there
+    # either way.
+    return _entry(m, date_of_birth=m["born"] or m["born2"], date_of_death=m["died"],
+                  original_date_of_publication=m["orig"], second_or_later_date_of_publication=m["year"])
+
+
+PREPARSERS = {
+    "kaplan": parse_kaplan,
+    "briscoe": parse_briscoe,
+}
+
+
+def split_entries(text, pattern):
+    """text cut just before each match of the profile's BOUNDARY_PATTERN."""
+    starts = [m.start() for m in re.finditer(pattern, "\n" + text) if m.start() > 0]
+    return [text[a:b] for a, b in zip([0] + starts, starts + [len(text)])]
+
+
+def preparse(parser, text, pattern):
+    """
+    (parts, residual) for a chunk: parts lists the entries parsed locally
+    in order, with a None where the model's entries for residual belong;
+    residual is the text of every entry the parser declined.
+    """
+    parts, residual = [], []
+    for segment in split_entries(text, pattern):
+        entry = parser(segment) if segment.strip() else None
+        if entry is not None:
+            parts.append(entry)
+            continue
+        if not residual:
+            parts.append(None)
+        residual.append(segment)
+    return parts, "".join(residual)
+
+
+def merge(parts, entries):
+    """The chunk's entries: parts with the model's entries in place of the None."""
+    merged = []
+    for part in parts:
+        if part is None:
+            merged.extend(entries)
+        else:
+            merged.append(part)
+    return merged
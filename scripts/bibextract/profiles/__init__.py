@@ -0,0 +1,154 @@
+"""
+Per-bibliography settings.
+
+A profile is a plain module of UPPERCASE constants, in this package or
+anywhere on disk (pass its .py path). Only SYSTEM_PROMPT is required; see
+DEFAULTS for everything else a profile can set. Adding a bibliography
+means adding one such file.
+"""
+import os
+import hashlib
+import importlib
+import importlib.util
+
+DEFAULTS = {
+    # Used when no input file is given on the command line.
+    "INPUT_FILE": None,
+    # Output/progress paths; {stem} and {basename} come from the input file.
+    "OUTPUT_FILE": "output/{stem}.csv",
+    "PROGRESS_FILE": "data/progress/{basename}.progress",
+    # "csv" appends rows to OUTPUT_FILE as they arrive. "parquet" appends
+    # them to a typed Arrow stream and, at the end of the run, writes a
+    # Parquet file beside OUTPUT_FILE and exports OUTPUT_FILE from it
+    # (needs pyarrow; falls back to "csv" without it).
+    "OUTPUT_FORMAT": "csv",
+    "MODEL": "gpt-4o-mini",
+    "SYSTEM_PROMPT": None,
+    # Keep {chunk} last: everything before it is the same on every request
+    # and can be served from the provider's prompt cache.
+    "USER_PROMPT": "Extract entries from this text:\n\n{chunk}",
+    # Few-shot (chunk text, [entry, ...]) pairs, sent as user/assistant
+    # turns between the system prompt and the chunk. The system prompt,
+    # examples and USER_PROMPT are versioned in data/prompts/<profile>.jsonl.
+    "EXAMPLES": [],
+    # "full" (entries as JSON objects keyed by column name) or "compact"
+    # (short field codes, "N/A" fields left out; see bibextract.wire),
+    # which needs about a third of the output tokens.
+    "RESPONSE_FORMAT": "full",
+    # "control_chars", "clean_for_api" or None (see bibextract.sanitize).
+    "SANITIZER": None,
+    # Regexes deleted from the text before chunking.
+    "NOISE_PATTERNS": [],
+    # Everything from the last occurrence of END_MARKER on is dropped, if
+    # it appears after END_MARKER_MIN_OFFSET (e.g. a trailing index).
+    "END_MARKER": None,
+    "END_MARKER_MIN_OFFSET": 0,
+    # "tokens" (whole BOUNDARY_PATTERN entries packed up to the token
+    # budgets below), "boundary" (cut at BOUNDARY_PATTERN near
+    # CHUNK_SIZE_TARGET chars), "fixed" (CHUNK_SIZE_TARGET-char slices) or
+    # "pages" (PAGES_PER_CHUNK form-feed pages per chunk).
+    "CHUNKING": "boundary",
+    "BOUNDARY_PATTERN": None,
+    "CHUNK_SIZE_TARGET": 6000,
+    "PAGES_PER_CHUNK": 2,
+    # Token budgets for "tokens" chunking. The expected response is the
+    # entries' own tokens plus OUTPUT_TOKENS_PER_ENTRY each for the JSON
+    # keys; gpt-4o-mini stops at 16384 output tokens, so leave headroom.
+    "MAX_INPUT_TOKENS": 4000,
+    "MAX_OUTPUT_TOKENS": 12000,
+    "OUTPUT_TOKENS_PER_ENTRY": 150,
+    # "tokens" chunking only: repeat this many entries from the end of each
+    # chunk at the start of the next; their duplicate rows are dropped.
+    "OVERLAP_ENTRIES": 0,
+    # Drop entries that repeat one already written: "exact" (same
+    # normalized author, title and date), "near" (also MinHash matches at
+    # DEDUP_THRESHOLD 3-gram similarity, e.g. OCR variants) or None.
+    # Dropped rows are logged next to the progress file.
+    "DEDUP": None,
+    "DEDUP_THRESHOLD": 0.85,
+    # Chunks with less text than this are skipped without an API call.
+    "MIN_CHUNK_CHARS": 0,
+    # Name of a rule-based parser in bibextract.preparse ("kaplan",
+    # "briscoe") that reads well-formed entries locally; only the entries
+    # it declines are sent to the model. Needs BOUNDARY_PATTERN.
+    "PREPARSER": None,
+    # After each answer, match its entries back to the BOUNDARY_PATTERN
+    # matches in the chunk and send any entry starts none of them matches
+    # again in one follow-up request, so skipped entries are recovered
+    # without rerunning the book. Needs BOUNDARY_PATTERN.
+    "VERIFY_COVERAGE": False,
+    # Classify each page before chunking and only pass on the pages of
+    # entries (see bibextract.pages): front matter until the first page
+    # with MIN_PAGE_ENTRIES BOUNDARY_PATTERN matches and no
+    # FRONT_MATTER_PATTERNS match, back matter from the first page that
+    # reads like an index or matches INDEX_PATTERNS, and near-empty pages
+    # anywhere are skipped. A line matching PAGE_BREAK starts a page:
+    # form feeds in pdftotext/OCR output, a blank line in Unstructured
+    # API text. Needs BOUNDARY_PATTERN.
+    "CLASSIFY_PAGES": False,
+    "PAGE_BREAK": r"\f",
+    "MIN_PAGE_ENTRIES": 3,
+    "FRONT_MATTER_PATTERNS": [],
+    "INDEX_PATTERNS": [],
+    # Send small adjacent chunks, across input files too, as one request
+    # within the token budgets above; the model tags each entry with the
+    # chunk it came from so its rows still go to the right file.
+    "COALESCE": False,
+}
+
+
+class Profile:
+    def __init__(self, name, module):
+        self.name = name
+        for key, default in DEFAULTS.items():
+            setattr(self, key.lower(), getattr(module, key, default))
+        if not self.system_prompt:
+            raise ValueError(f"Profile {name} does not define SYSTEM_PROMPT")
+        if self.chunking in ("boundary", "tokens") and not self.boundary_pattern:
+            raise ValueError(f"Profile {name} uses {self.chunking} chunking without a BOUNDARY_PATTERN")
+        if self.response_format not in ("full", "compact"):
+            raise ValueError(f"Profile {name} has unknown RESPONSE_FORMAT {self.response_format!r}")
+        if self.preparser and not self.boundary_pattern:
+            raise ValueError(f"Profile {name} sets PREPARSER without a BOUNDARY_PATTERN")
+        if self.verify_coverage and not self.boundary_pattern:
+            raise ValueError(f"Profile {name} sets VERIFY_COVERAGE without a BOUNDARY_PATTERN")
+        if self.classify_pages and not self.boundary_pattern:
+            raise ValueError(f"Profile {name} sets CLASSIFY_PAGES without a BOUNDARY_PATTERN")
+
+    def paths(self, input_file):
+        """Output CSV and progress file for input_file."""
+        basename = os.path.basename(input_file)
+        values = {"basename": basename, "stem": os.path.splitext(basename)[0]}
+        return self.output_file.format(**values), self.progress_file.format(**values)
+
+    def chunking_key(self):
+        """Hash of every setting that decides where chunks fall, so progress is only resumed onto the same chunks."""
+        keys = ["SANITIZER", "NOISE_PATTERNS", "END_MARKER", "END_MARKER_MIN_OFFSET", "CHUNKING",
+                "BOUNDARY_PATTERN", "CHUNK_SIZE_TARGET", "PAGES_PER_CHUNK", "MAX_INPUT_TOKENS",
+                "MAX_OUTPUT_TOKENS", "OUTPUT_TOKENS_PER_ENTRY", "OVERLAP_ENTRIES"]
+        if self.classify_pages:
+            # Only when on, so existing progress files still resume
+            keys += ["PAGE_BREAK", "MIN_PAGE_ENTRIES", "FRONT_MATTER_PATTERNS", "INDEX_PATTERNS"]
+        settings = repr([getattr(self, key.lower()) for key in keys])
+        return hashlib.sha256(settings.encode("utf-8")).hexdigest()[:16]
+
+    def __repr__(self):
+        return f"<Profile {self.name}>"
+
+
+def load_profile(name):
+    """Load a bundled profile by name, or any profile module by .py path."""
+    if name.endswith(".py"):
+        spec = importlib.util.spec_from_file_location(os.path.splitext(os.path.basename(name))[0], name)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return Profile(module.__name__, module)
+    return Profile(name, importlib.import_module(f"{__name__}.{name}"))
+
+
+def list_profiles():
+    here = os.path.dirname(__file__)
+    return sorted(
+        os.path.splitext(f)[0] for f in os.listdir(here)
+        if f.endswith(".py") and not f.startswith("_")
+    )
@@ -0,0 +1,44 @@
+# Stuhr et al., "Autobiographies by Americans of Color" (1980-1994 and
+# 1995-2000 volumes): data/text/stuhr-rommerein_1980.txt, data/text/sturh_iwabuchi.txt
+from bibextract.columns import REQUIRED_COLUMNS
+
+OUTPUT_FILE = "output/{stem}.csv"
+PROGRESS_FILE = "data/progress/{basename}.progress"
+RESPONSE_FORMAT = "compact"
+
+SANITIZER = "control_chars"
+CHUNKING = "tokens"
+
+# Numbered entries: "53. Boyd, Norma E. (1888-). A Love that..."
+BOUNDARY_PATTERN = r'\n[ \t]*\d{1,4}\.[ \t]+[A-Z]'
+
+# Anthologies with long annotations can fill a page with one entry
+CLASSIFY_PAGES = True
+MIN_PAGE_ENTRIES = 1
+
+# Running heads with page numbers on either side
+NOISE_PATTERNS = [
+    r"\n[ \t]*\d+[ \t]+Autobiographies by Americans of Color \d{4}-\d{4}[ \t]*",
+    r"\n[ \t]*The Bibliography[ \t]+\d+[ \t]*",
+]
+
+SYSTEM_PROMPT = """You are a helpful assistant that transforms bibliography text into structured JSON data.
+Extract independent bibliography entries from the provided text.
+Return a valid JSON object with a key "entries" containing a list of objects.
+Each object must have the following keys (use "N/A" if information is missing):
+""" + ", ".join(REQUIRED_COLUMNS) + """
+
+Rules:
+- author1_last_name/first_name: Extract first author. "With..." usually means author2.
+- author2_last_name/first_name: Second author. If none, "N/A".
+- editor1_last_name/first_name: Only if “Edited by”, “ed.”, etc. Ignore introductions.
+- title: Full title. Merge lines.
+- original_date_of_publication: Earliest date.
+- dictation: YES if "As told to", "Dictated by". "With" is NOT dictation.
+- translation: YES if "Translated by".
+- volume: "Volume II" etc or "N/A".
+- number_of_pages: e.g. "290pp". Original edition only.
+- occupations, bio dates, places: Extract if present in the text (some bibliographies include bio info).
+
+JSON format only. No markdown formatting.
+"""
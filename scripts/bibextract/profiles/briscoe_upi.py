@@ -0,0 +1,121 @@
+# Briscoe, "American Autobiography 1945-1980" (1982), Unstructured API text.
+INPUT_FILE = "data/text/briscoe_uAPI.txt"
+OUTPUT_FILE = "output/briscoe_UPI.csv"
+PROGRESS_FILE = "data/progress/briscoe_UPI.progress"
+OUTPUT_FORMAT = "parquet"
+PREPARSER = "briscoe"
+COALESCE = True
+RESPONSE_FORMAT = "compact"
+VERIFY_COVERAGE = True
+CHUNKING = "tokens"
+
+# Entries start with a four digit id
+BOUNDARY_PATTERN = r'\n(\d{4}\s+)'
+
+# Unstructured API text: a blank line between pages
+CLASSIFY_PAGES = True
+PAGE_BREAK = r"^\n[ \t]*$"
+
+NOISE_PATTERNS = [
+    r"Oversize",
+    r"016\.92",
+    r"Am3",
+    r"500[S6]199",
+    r"M\.L\.",
+    r"STO RA VN",
+    r"W=——= O== = N — N =z = —— = —— = = N=—— = ~===3 — — ——_",
+    r"This content downloaded from.*",
+    r"All use subject to.*",
+    r"American autobiography, 1980.*",
+    r"1945-.*"
+]
+
+USER_PROMPT = "Extract entries from this Briscoe text:\n\n{chunk}"
+
+SYSTEM_PROMPT = """You are a specialist in bibliographical data extraction for "American Autobiography 1945-1980".
+
+Example:
+Input: "0044 Adams, John Quincy 1767-1848\\nJohn Quincy Adams in Russia. Edited by Charles Francis Adams. New York: Praeger Publishers, 1970. (1874) 662 p.\\nA reprint of Volume II..."
+JSON Result:
+{
+  "entries": [
+    {
+      "author1_last_name": "Adams",
+      "author1_first_name": "John Quincy",
+      "date_of_birth": "1767",
+      "date_of_death": "1848",
+      "title": "John Quincy Adams in Russia",
+      "editor1_last_name": "Adams",
+      "editor1_first_name": "Charles Francis",
+      "publisher": "Praeger Publishers",
+      "publisher_location": "New York",
+      "original_date_of_publication": "1874",
+      "second_or_later_date_of_publication": "1970",
+      "number_of_pages": "662 p",
+      "summary": "A reprint of Volume II of his memoirs, comprising the record of his experiences during his successful mission to the court of Czar Alexander I..."
+    }
+  ]
+}
+
+Rules:
+1. Ignore OCR noise like "Oversize", "Am3", "500S199", "M.L.", "STO RA VN".
+2. Capture publication details: Location: Publisher, Year. (OrigYear) Pages.
+3. author1 dates: Extract birth-death years if listed next to the name.
+
+Return a JSON object with "entries" key. Use "N/A" for missing data.
+"""
+
+# Entries both the rule-based parser and the model read identically,
+# showing dates on their own line, a starred name with a maiden name, and
+# a neighbouring entry's dates left at the end of one. They also take
+# the prompt past the size providers cache.
+EXAMPLES = [
+    ("0006 Abbott, George 1887-\nMister Abbott. New York: Random House, 1963. 279 p.\n"
+     "A successful showman writes about Broadway, his memories of friends and enemies among the celebrities "
+     "of the entertainment world, including an honest appraisal of himself.\n"
+     "0010 Abraham, Abie\n1913-\nGhost of Bataan speaks. New York: Vantage Press, 1971. 244 p. An American "
+     "soldier describes the fall of Bataan, the Death March, the events at Camp O'Donnell and Cabanatuan, and "
+     "the sufferings of Filipino and American troops after they had made their hopeless stand in defense of "
+     "Bataan and Corregidor.\n"
+     "0056 Aherne, Brian\n1902-\nA proper job. Boston: Houghton Mifflin Co., 1969. 355 p. Born in England, "
+     "Aherne acted in movies and on the stage there before coming to the United States and making his debut "
+     "on Broadway (1931) and in American films (1933).\n1889-1973\n"
+     "0216 *Baker, Louise (Maxwell)\n1909-\nOut on a limb. New York: Whittlesey House, 1946. 213 p.\n"
+     "A humorous account of coping with life with only one leg, even roller skating and horseback riding.\n"
+     "0330 Bemelmans, Ludwig\n1898-1962\nMy life in art. New York: Harper and Brothers, 1958. 64 p. An "
+     "artist-writer discusses his early interest in painting and the years in Paris when he learned to use "
+     "oils.\n",
+     [
+         {"author1_last_name": "Abbott", "author1_first_name": "George", "date_of_birth": "1887",
+          "date_of_death": "N/A", "title": "Mister Abbott", "publisher": "Random House",
+          "publisher_location": "New York", "original_date_of_publication": "N/A",
+          "second_or_later_date_of_publication": "1963", "number_of_pages": "279 p",
+          "summary": "A successful showman writes about Broadway, his memories of friends and enemies among the "
+                     "celebrities of the entertainment world, including an honest appraisal of himself."},
+         {"author1_last_name": "Abraham", "author1_first_name": "Abie", "date_of_birth": "1913",
+          "date_of_death": "N/A", "title": "Ghost of Bataan speaks", "publisher": "Vantage Press",
+          "publisher_location": "New York", "original_date_of_publication": "N/A",
+          "second_or_later_date_of_publication": "1971", "number_of_pages": "244 p",
+          "summary": "An American soldier describes the fall of Bataan, the Death March, the events at Camp "
+                     "O'Donnell and Cabanatuan, and the sufferings of Filipino and American troops after they "
+                     "had made their hopeless stand in defense of Bataan and Corregidor."},
+         {"author1_last_name": "Aherne", "author1_first_name": "Brian", "date_of_birth": "1902",
+          "date_of_death": "N/A", "title": "A proper job", "publisher": "Houghton Mifflin Co.",
+          "publisher_location": "Boston", "original_date_of_publication": "N/A",
+          "second_or_later_date_of_publication": "1969", "number_of_pages": "355 p",
+          "summary": "Born in England, Aherne acted in movies and on the stage there before coming to the United "
+                     "States and making his debut on Broadway (1931) and in American films (1933)."},
+         {"author1_last_name": "Baker", "author1_first_name": "Louise (Maxwell)", "date_of_birth": "1909",
+          "date_of_death": "N/A", "title": "Out on a limb", "publisher": "Whittlesey House",
+          "publisher_location": "New York", "original_date_of_publication": "N/A",
+          "second_or_later_date_of_publication": "1946", "number_of_pages": "213 p",
+          "summary": "A humorous account of coping with life with only one leg, even roller skating and "
+                     "horseback riding."},
+         {"author1_last_name": "Bemelmans", "author1_first_name": "Ludwig", "date_of_birth": "1898",
+          "date_of_death": "1962", "title": "My life in art", "publisher": "Harper and Brothers",
+          "publisher_location": "New York", "original_date_of_publication": "N/A",
+          "second_or_later_date_of_publication": "1958", "number_of_pages": "64 p",
+          "summary": "An artist-writer discusses his early interest in painting and the years in Paris when he "
+                     "learned to use oils."},
+     ]),
+]
@@ -0,0 +1,113 @@
+# Kaplan, "A Bibliography of American Autobiographies" (1961), Unstructured API text.
+INPUT_FILE = "data/text/kaplan_uAPI.txt"
+OUTPUT_FILE = "output/kaplan_UPI.csv"
+PROGRESS_FILE = "data/progress/kaplan_UPI.progress"
+OUTPUT_FORMAT = "parquet"
+PREPARSER = "kaplan"
+COALESCE = True
+RESPONSE_FORMAT = "compact"
+VERIFY_COVERAGE = True
+CHUNKING = "tokens"
+MAX_INPUT_TOKENS = 2000 # Smaller chunks for higher accuracy
+
+# Kaplan entries start with Name at start of line
+BOUNDARY_PATTERN = r'\n[A-Z][a-z]+,\s[A-Z]'
+
+# Unstructured API text: a blank line between pages. The library-symbol
+# table reads like entries ("Dillard, New Orleans"); the subject index
+# opens with a note that has no entry numbers to give it away.
+CLASSIFY_PAGES = True
+PAGE_BREAK = r"^\n[ \t]*$"
+FRONT_MATTER_PATTERNS = [r"(?i)guide to symbols"]
+INDEX_PATTERNS = [r"(?im)^(a note on the )?subject index\s*$"]
+
+USER_PROMPT = "Extract ALL entries from this Kaplan text:\n\n{chunk}"
+
+SYSTEM_PROMPT = """You are a specialist in bibliographical data extraction for bibliographies of American Autobiographies.
+Extract ALL independent entries from the provided text. DO NOT SKIP ANY.
+
+Format Example:
+Input: "Abbot, Willis John, 1863-1934. [3] Watching the world go by. Boston: Little, Brown, 1934. 358 p. WU. Reporter in Chicago and N.Y."
+JSON Result:
+{
+  "entries": [
+    {
+      "author1_last_name": "Abbot",
+      "author1_first_name": "Willis John",
+      "date_of_birth": "1863",
+      "date_of_death": "1934",
+      "title": "Watching the world go by",
+      "publisher": "Little, Brown",
+      "publisher_location": "Boston",
+      "original_date_of_publication": "1934",
+      "number_of_pages": "358 p",
+      "summary": "Reporter in Chicago and N.Y."
+    }
+  ]
+}
+
+Extraction Rules:
+1. Author: Name is at the start of the entry. ID number is in brackets [ID].
+2. Publication: Location: Publisher, Year.
+3. Summary: The text following the publication details.
+
+Return a JSON object with "entries" key. Use "N/A" for missing data.
+"""
+
+# Entries both the rule-based parser and the model read identically,
+# showing an [id] inside the title or misread by OCR, a word broken
+# across a line end and an entry spread over several lines. They also
+# take the prompt past the size providers cache.
+EXAMPLES = [
+    ("Atwater, Francis, b. 1858. [2 13] Memoirs of Francis Atwater. Meriden, Conn.: Horton pr. co., 1922. "
+     "313 p. NN. Newspaper pro¬ prietor and businessman in Connecticut.\n"
+     "Bailey, Emma E., 1844—1921. [248] Happy day, or the confessions of a woman minister. N.Y.: "
+     "European pub. co., 1901. 480 p. DLC. Universalist in New York, Pa., and Ohio.\n"
+     "Balaban, Abe J. Continuous [263] performance. N.Y.: G. P. Put¬ nam’s sons, 1942. 240 p. NN. "
+     "Theatre chain owner in Chicago and motion picture magnate.\n"
+     "Baldwin, George Colfax, 1817— 1899.[266] Notes of a forty-one year’s pastorate. Phila.: American "
+     "Baptist publication society, 1888. 287 p. PCC. Baptist clergyman in New Jersey and New York, 1840-85.\n"
+     "Baldwin, Harold. “Holding the [267] line”. Chicago: McClurg, 1918. 305 p. NjP. First World War.\n"
+     "Ballon, Adin, 1803 — 1890. [280]\nAutobiography. . .Lowell, Mass.:\nVox populi, 1896. 586 p. WU.\n"
+     "Abolitionist and Universalist\nclergyman who founded Hopedale\nCommunity.\n"
+     "Barnard, Evan G., b. 1865. [303] A rider of the Cherokee strip. Boston: Houghton Mifflin, 1936. 224 p. "
+     "WHi. Cowboy.\n"
+     "Barrett, Fred W., b. 1858. [318] From a diary. Springfield, Ohio: F. W. Barrett, 1934. 103 p. WHi. "
+     "Travelling salesman.\n",
+     [
+         {"author1_last_name": "Atwater", "author1_first_name": "Francis", "date_of_birth": "1858",
+          "date_of_death": "N/A", "title": "Memoirs of Francis Atwater", "publisher": "Horton pr. co.",
+          "publisher_location": "Meriden, Conn.", "original_date_of_publication": "1922",
+          "number_of_pages": "313 p", "summary": "Newspaper proprietor and businessman in Connecticut."},
+         {"author1_last_name": "Bailey", "author1_first_name": "Emma E.", "date_of_birth": "1844",
+          "date_of_death": "1921", "title": "Happy day, or the confessions of a woman minister",
+          "publisher": "European pub. co.", "publisher_location": "N.Y.", "original_date_of_publication": "1901",
+          "number_of_pages": "480 p", "summary": "Universalist in New York, Pa., and Ohio."},
+         {"author1_last_name": "Balaban", "author1_first_name": "Abe J.", "date_of_birth": "N/A",
+          "date_of_death": "N/A", "title": "Continuous performance", "publisher": "G. P. Putnam’s sons",
+          "publisher_location": "N.Y.", "original_date_of_publication": "1942", "number_of_pages": "240 p",
+          "summary": "Theatre chain owner in Chicago and motion picture magnate."},
+         {"author1_last_name": "Baldwin", "author1_first_name": "George Colfax", "date_of_birth": "1817",
+          "date_of_death": "1899", "title": "Notes of a forty-one year’s pastorate",
+          "publisher": "American Baptist publication society", "publisher_location": "Phila.",
+          "original_date_of_publication": "1888", "number_of_pages": "287 p",
+          "summary": "Baptist clergyman in New Jersey and New York, 1840-85."},
+         {"author1_last_name": "Baldwin", "author1_first_name": "Harold", "date_of_birth": "N/A",
+          "date_of_death": "N/A", "title": "Holding the line", "publisher": "McClurg",
+          "publisher_location": "Chicago", "original_date_of_publication": "1918", "number_of_pages": "305 p",
+          "summary": "First World War."},
+         {"author1_last_name": "Ballon", "author1_first_name": "Adin", "date_of_birth": "1803",
+          "date_of_death": "1890", "title": "Autobiography", "publisher": "Vox populi",
+          "publisher_location": "Lowell, Mass.", "original_date_of_publication": "1896",
+          "number_of_pages": "586 p",
+          "summary": "Abolitionist and Universalist clergyman who founded Hopedale Community."},
+         {"author1_last_name": "Barnard", "author1_first_name": "Evan G.", "date_of_birth": "1865",
+          "date_of_death": "N/A", "title": "A rider of the Cherokee strip", "publisher": "Houghton Mifflin",
+          "publisher_location": "Boston", "original_date_of_publication": "1936", "number_of_pages": "224 p",
+          "summary": "Cowboy."},
+         {"author1_last_name": "Barrett", "author1_first_name": "Fred W.", "date_of_birth": "1858",
+          "date_of_death": "N/A", "title": "From a diary", "publisher": "F. W. Barrett",
+          "publisher_location": "Springfield, Ohio", "original_date_of_publication": "1934",
+          "number_of_pages": "103 p", "summary": "Travelling salesman."},
+     ]),
+]
@@ -0,0 +1,40 @@
+# Matthews pdftotext output, whose text layer carries control codes that
+# hang the API client. Rigorous sanitization, then whole entries packed
+# into chunks, each repeating the previous chunk's last entry in case the
+# damaged text layer hid a boundary.
+from bibextract.columns import REQUIRED_COLUMNS
+
+OUTPUT_FILE = "output/{stem}_sanitized.csv"
+PROGRESS_FILE = "data/progress/{basename}_sanitized.progress"
+OUTPUT_FORMAT = "parquet"
+DEDUP = "near"
+RESPONSE_FORMAT = "compact"
+
+SANITIZER = "clean_for_api"
+CHUNKING = "tokens"
+# Entries start with an ALL CAPS surname and a comma, as in matthews_upi
+BOUNDARY_PATTERN = r'\n\[?[A-Z\-]{3,},'
+OVERLAP_ENTRIES = 1
+# Skips the JSTOR cover and banner pages
+CLASSIFY_PAGES = True
+
+SYSTEM_PROMPT = """You are a helpful assistant that transforms bibliography text into structured JSON data.
+Extract independent bibliography entries from the provided text.
+Return a valid JSON object with a key "entries" containing a list of objects.
+Each object must have the following keys (use "N/A" if information is missing):
+""" + ", ".join(REQUIRED_COLUMNS) + """
+
+Rules:
+- author1_last_name/first_name: Extract first author. "With..." usually means author2.
+- author2_last_name/first_name: Second author. If none, "N/A".
+- editor1_last_name/first_name: Only if “Edited by”, “ed.”, etc. Ignore introductions.
+- title: Full title. Merge lines.
+- original_date_of_publication: Earliest date.
+- dictation: YES if "As told to", "Dictated by". "With" is NOT dictation.
+- translation: YES if "Translated by".
+- volume: "Volume II" etc or "N/A".
+- number_of_pages: e.g. "290pp". Original edition only.
+- occupations, bio dates, places: Extract if present in the text (some bibliographies include bio info).
+
+JSON format only. No markdown formatting.
+"""
@@ -0,0 +1,59 @@
+# Matthews, "British Autobiographies" (1955), Unstructured API text.
+INPUT_FILE = "data/text/matthews_uAPI.txt"
+OUTPUT_FILE = "output/matthews_UPI.csv"
+PROGRESS_FILE = "data/progress/matthews_UPI.progress"
+OUTPUT_FORMAT = "parquet"
+DEDUP = "near"
+RESPONSE_FORMAT = "compact"
+VERIFY_COVERAGE = True
+CHUNKING = "tokens"
+MAX_INPUT_TOKENS = 2000 # Smaller chunks for dense text
+
+# Entries start with an ALL CAPS surname and a comma
+BOUNDARY_PATTERN = r'\n\[?[A-Z\-]{3,},'
+
+# Unstructured API text: a blank line between pages
+CLASSIFY_PAGES = True
+PAGE_BREAK = r"^\n[ \t]*$"
+
+# JSTOR headers/footers
+NOISE_PATTERNS = [
+    r"This content downloaded from.*",
+    r"All use subject to.*",
+    r"https://about\.jstor\.org/terms",
+    r"BRITISH AUTOBIOGRAPHIES",
+    r"University of California Press",
+]
+
+USER_PROMPT = "Extract entries from this Matthews text:\n\n{chunk}"
+
+SYSTEM_PROMPT = """You are a specialist in bibliographical data extraction for British Autobiographies.
+
+Format Example:
+Input: "ABBOTT, Maj.Gen. Augustus. Military Journal, 1838-42; service with Bengal Artillery in the Afghan War; marches; military details. The Afghan War, ed. Charles R. Low (1879). 1"
+JSON Result:
+{
+  "entries": [
+    {
+      "author1_last_name": "ABBOTT",
+      "author1_first_name": "Augustus (Maj.Gen.)",
+      "title": "The Afghan War (Military Journal, 1838-42)",
+      "editor1_last_name": "Low",
+      "editor1_first_name": "Charles R.",
+      "original_date_of_publication": "1879",
+      "summary": "Service with Bengal Artillery in the Afghan War; marches; military details.",
+      "occupations": "Major-General; Bengal Artillery"
+    }
+  ]
+}
+
+Extraction Rules:
+1. Entry Boundary: Starts with ALL CAPS LAST NAME followed by a comma.
+2. Author: The ALL CAPS name is the last name. The following name is the first name.
+3. Title: Often appears at the end before the date in parentheses. 
+4. Summary: The descriptive text about their life.
+5. Index Number: The number at the VERY END of the entry (e.g. "1") is an ID, not a date.
+6. Occupation/Locations: Extract from the summary (e.g. "Leeds", "Surgeon").
+
+Return a JSON object with "entries" key. Use "N/A" for missing data.
+"""
@@ -0,0 +1,83 @@
+import os
+import json
+import hashlib
+
+from bibextract.tokens import count_tokens
+from bibextract.wire import FORMAT_NOTE, encode
+
+# Requests are laid out static-first: the system prompt, then the
+# profile's EXAMPLES as user/assistant turns, then the chunk. Everything
+# before the chunk is byte-identical across a profile's requests, so the
+# provider can serve it from its prompt cache. OpenAI only caches
+# prefixes of at least this many tokens.
+CACHEABLE_PREFIX_TOKENS = 1024
+
+# One JSONL file per profile recording every prompt version it has run
+# with, so a manifest's "prompt" field can be traced back to the text.
+REGISTRY_DIR = os.path.join("data", "prompts")
+
+
+def _user_message(profile, chunk_text):
+    return {"role": "user", "content": profile.user_prompt.format(chunk=chunk_text)}
+
+
+def prefix_messages(profile):
+    """The messages every request for profile starts with."""
+    compact = profile.response_format == "compact"
+    messages = [{"role": "system", "content": profile.system_prompt + (FORMAT_NOTE if compact else "")}]
+    for text, entries in profile.examples:
+        messages.append(_user_message(profile, text))
+        answer = {"entries": encode(entries) if compact else entries}
+        messages.append({"role": "assistant", "content": json.dumps(answer, ensure_ascii=False)})
+    return messages
+
+
+def build_messages(profile, chunk_text):
+    return prefix_messages(profile) + [_user_message(profile, chunk_text)]
+
+
+def prompt_version(profile):
+    """Short hash of the system prompt, examples and user prompt template."""
+    settings = json.dumps([prefix_messages(profile), profile.user_prompt], ensure_ascii=False)
+    return hashlib.sha256(settings.encode("utf-8")).hexdigest()[:12]
+
+
+def prefix_tokens(profile):
+    """Tokens shared by every request: the prefix messages and the user prompt up to the chunk."""
+    lead = profile.user_prompt.split("{chunk}", 1)[0]
+    return sum(count_tokens(m["content"], profile.model) for m in prefix_messages(profile)) + \
+        count_tokens(lead, profile.model)
+
+
+def register(profile, directory=None):
+    """Record profile's current prompt in the registry if it is new; returns its version."""
+    directory = directory or REGISTRY_DIR
+    version = prompt_version(profile)
+    path = os.path.join(directory, f"{profile.name}.jsonl")
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            if any(json.loads(line)["version"] == version for line in f if line.strip()):
+                return version
+    os.makedirs(directory, exist_ok=True)
+    record = {"version": version, "system_prompt": profile.system_prompt, "examples": profile.examples,
+              "user_prompt": profile.user_prompt}
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return version
+
+
+def add_usage(totals, usage):
+    """Add a response's usage (API object or batch-file dict) to a Counter."""
+    if usage is None:
+        return
+    if hasattr(usage, "model_dump"):
+        usage = usage.model_dump()
+    totals["prompt_tokens"] += usage.get("prompt_tokens") or 0
+    totals["completion_tokens"] += usage.get("completion_tokens") or 0
+    totals["cached_tokens"] += (usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0
+
+
+def usage_stats(totals):
+    prompt = totals["prompt_tokens"]
+    return (f"API tokens: {prompt} prompt ({totals['cached_tokens']} cached,"
+            f" {totals['cached_tokens'] / max(prompt, 1):.0%}), {totals['completion_tokens']} completion")
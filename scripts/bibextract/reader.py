@@ -0,0 +1,58 @@
+# Bytes read from disk per step; only one block plus one line is held at a time.
+BLOCK_SIZE = 1 << 20
+
+
+def read_lines(f, block_size=BLOCK_SIZE):
+    """
+    Yield (byte_offset, char_offset, segment) for each line of a binary file.
+
+    Every segment but the first starts with the newline that precedes it,
+    so patterns anchored on "\n" (entry boundaries, running heads) always
+    find it in the same segment as the line they describe, and joining the
+    segments gives back the decoded file. Offsets are those of the segment
+    start in the source file. CRLF line endings are read as "\n".
+    """
+    byte_offset = char_offset = 0
+    prefix = ""
+    tail = b""
+    while True:
+        block = f.read(block_size)
+        if not block:
+            break
+        lines = (tail + block).split(b"\n")
+        tail = lines.pop()
+        for raw in lines:
+            text = prefix + raw.rstrip(b"\r").decode("utf-8")
+            yield byte_offset, char_offset, text
+            byte_offset += len(prefix) + len(raw)
+            char_offset += len(text)
+            prefix = "\n"
+    yield byte_offset, char_offset, prefix + tail.decode("utf-8")
+
+
+def find_last(segments, marker):
+    """Char offset of the last occurrence of marker in the stream, or -1."""
+    last = -1
+    window = ""
+    window_start = 0
+    for _, _, segment in segments:
+        window += segment
+        pos = window.rfind(marker)
+        if pos != -1:
+            last = window_start + pos
+        # Keep just enough to catch a marker spanning two segments
+        keep = max(0, len(window) - len(marker) + 1)
+        window_start += keep
+        window = window[keep:]
+    return last
+
+
+def truncate(segments, end):
+    """Stop the stream at char offset end."""
+    for byte_offset, char_offset, segment in segments:
+        if char_offset + len(segment) <= end:
+            yield byte_offset, char_offset, segment
+            continue
+        if char_offset < end:
+            yield byte_offset, char_offset, segment[:end - char_offset]
+        return
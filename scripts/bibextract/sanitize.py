@@ -0,0 +1,91 @@
+import re
+import sys
+import functools
+import unicodedata
+
+# Everything below is built once at import; the per-call work is a single
+# precompiled regex pass (measurably faster here than str.translate, whose
+# fast path does not cover deletions - see scripts/bench_sanitize.py).
+
+# C0 controls except \t and \n
+_CONTROL_CHARS = re.compile(r"[\x00-\x08\x0B-\x1F]+")
+
+# C0/C1 controls except \t, \n and \r
+_API_CONTROLS = [c for c in range(0x20) if c not in (0x09, 0x0A, 0x0D)] + list(range(0x7F, 0xA0))
+
+
+def _char_class(codepoints):
+    """Regex character class matching any of codepoints, as runs of ranges."""
+    ranges = []
+    for c in sorted(codepoints):
+        if ranges and ranges[-1][1] == c - 1:
+            ranges[-1][1] = c
+        else:
+            ranges.append([c, c])
+    parts = "".join(
+        re.escape(chr(a)) if a == b else f"{re.escape(chr(a))}-{re.escape(chr(b))}"
+        for a, b in ranges
+    )
+    return f"[{parts}]+"
+
+
+# Unicode "format" characters (zero-width, bidi overrides, etc.)
+_FORMAT_CHARS = [c for c in range(sys.maxunicode + 1) if unicodedata.category(chr(c)) == "Cf"]
+
+_API_ASCII = re.compile(_char_class(c for c in _API_CONTROLS if c < 0x80))
+_API_ALL = re.compile(_char_class(_API_CONTROLS + _FORMAT_CHARS))
+
+
+def sanitize_text(text):
+    # Remove control characters but keep newlines and tabs
+    return _CONTROL_CHARS.sub("", text)
+
+
+def clean_for_api(s: str) -> str:
+    """
+    Rigorous sanitization for 'toxic' PDF text layers.
+    1. Normalize Unicode (NFKC)
+    2. Remove C0/C1 control codes (except \n\r\t)
+    3. Remove Unicode format chars (Cf category - zero width, bidi, etc)
+    4. Ensure UTF-8 roundtrip
+    """
+    if not s:
+        return ""
+
+    # Normalize to reduce weird composed characters / ligatures
+    s = unicodedata.normalize("NFKC", s)
+
+    # Steps 2 and 3 in one pass; ASCII text has no C1 or Cf characters
+    if s.isascii():
+        return _API_ASCII.sub("", s)
+    s = _API_ALL.sub("", s)
+
+    # Guarantee valid UTF-8 roundtrip
+    return s.encode("utf-8", "replace").decode("utf-8")
+
+
+@functools.lru_cache(maxsize=None)
+def compile_noise(patterns):
+    """
+    One regex matching any of patterns (a tuple), or None if there are none.
+
+    A single scan finds the same matches as one re.sub per pattern, unless
+    removing one pattern's match would create a match for another; none of
+    the bundled profiles' patterns interact that way.
+    """
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{p})" for p in patterns))
+
+
+def remove_noise(text, patterns):
+    # Running headers, JSTOR banners, library stamps... all in one pass
+    noise = compile_noise(tuple(patterns))
+    return noise.sub("", text) if noise else text
+
+
+# Names a profile can use for its SANITIZER setting.
+SANITIZERS = {
+    "control_chars": sanitize_text,
+    "clean_for_api": clean_for_api,
+}
@@ -0,0 +1,229 @@
+import os
+import json
+import time
+import random
+import threading
+from email.utils import parsedate_to_datetime
+
+import openai
+
+# Provider limits for the key in use. The defaults are the gpt-4o-mini
+# tier-1 numbers; raise them to run at a higher tier's ceiling.
+DEFAULT_RPM = int(os.environ.get("EXTRACT_RPM", "500"))
+DEFAULT_TPM = int(os.environ.get("EXTRACT_TPM", "200000"))
+DEFAULT_MAX_RETRIES = int(os.environ.get("EXTRACT_MAX_RETRIES", "6"))
+
+# Rough output budget charged against the token bucket before the real
+# usage is known; corrected from response.usage afterwards.
+EXPECTED_OUTPUT_TOKENS = 2000
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at per_minute / 60 per second."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.base_rate = per_minute / 60.0
+        self.rate = self.base_rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, amount=1):
+        amount = min(amount, self.capacity)
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def charge(self, amount):
+        # Positive amounts take tokens, negative amounts refund an over-estimate.
+        with self.lock:
+            self._refill()
+            self.tokens = max(-self.capacity, min(self.capacity, self.tokens - amount))
+
+    def slow_down(self):
+        with self.lock:
+            self._refill()
+            self.rate = max(self.base_rate / 16, self.rate / 2)
+
+    def speed_up(self):
+        with self.lock:
+            if self.rate < self.base_rate:
+                self._refill()
+                self.rate = min(self.base_rate, self.rate * 1.05)
+
+
+def retry_after_seconds(error):
+    """Seconds the server asked us to wait, from Retry-After(-Ms) headers, or None."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000.0
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error):
+    # APIConnectionError includes APITimeoutError; the builtins cover other HTTP clients
+    if isinstance(error, (openai.APIConnectionError, ConnectionError, TimeoutError)):
+        return True
+    status = getattr(error, "status_code", None)
+    return status in (408, 409, 429) or (status is not None and status >= 500)
+
+
+def estimate_tokens(messages):
+    # ~4 characters per token is close enough for budgeting English text.
+    return sum(len(m.get("content", "")) for m in messages) // 4 + EXPECTED_OUTPUT_TOKENS
+
+
+class RequestScheduler:
+    """
+    Wraps API calls with requests/min and tokens/min budgets plus retries.
+
+    Transient failures (429, 408/409, 5xx, connection errors and timeouts)
+    are retried with exponential backoff and full jitter, honouring
+    Retry-After when the server sends it. A 429 also halves the request
+    rate and pauses every worker until the retry window has passed; the
+    rate creeps back up on each success. Anything else, or a request that
+    is still failing after max_retries, is raised to the caller.
+    """
+
+    def __init__(self, rpm=None, tpm=None, max_retries=None, base_delay=1.0, max_delay=60.0):
+        self.requests = TokenBucket(rpm or DEFAULT_RPM)
+        self.tokens = TokenBucket(tpm or DEFAULT_TPM)
+        self.max_retries = DEFAULT_MAX_RETRIES if max_retries is None else max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.cooldown_until = 0.0
+        self.lock = threading.Lock()
+
+    def _wait_for_cooldown(self):
+        while True:
+            with self.lock:
+                wait = self.cooldown_until - time.monotonic()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def _backoff(self, attempt, error):
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        server_delay = retry_after_seconds(error)
+        if server_delay is not None:
+            delay = max(delay, server_delay)
+        if getattr(error, "status_code", None) == 429:
+            self.requests.slow_down()
+            with self.lock:
+                self.cooldown_until = max(self.cooldown_until, time.monotonic() + delay)
+        return delay
+
+    def call(self, fn, **kwargs):
+        """
+        Call fn(**kwargs) (e.g. client.chat.completions.create) under the
+        limits. Calls without chat messages only count against requests/min.
+        """
+        estimate = estimate_tokens(kwargs["messages"]) if "messages" in kwargs else 0
+        for attempt in range(self.max_retries + 1):
+            self._wait_for_cooldown()
+            self.requests.acquire()
+            self.tokens.acquire(estimate)
+            try:
+                response = fn(**kwargs)
+            except Exception as e:
+                self.tokens.charge(-estimate)
+                if attempt == self.max_retries or not is_retryable(e):
+                    raise
+                delay = self._backoff(attempt, e)
+                print(f"  Retrying in {delay:.1f}s after: {e.__class__.__name__} {getattr(e, 'status_code', '')}")
+                time.sleep(delay)
+                continue
+            usage = getattr(response, "usage", None)
+            if usage is not None and getattr(usage, "total_tokens", None):
+                self.tokens.charge(usage.total_tokens - estimate)
+            self.requests.speed_up()
+            return response
+
+
+class DeadLetterLog:
+    """
+    JSONL record of chunks that failed for good, so a run never loses them
+    silently. Each line holds the chunk index, the error and the chunk text.
+
+    The file is only appended to: records before byte `start` have already
+    been retried, so a checkpoint can commit the log together with the
+    output (see bibextract.checkpoint).
+    """
+
+    def __init__(self, path, start=0):
+        self.path = path
+        self.start = start
+        self.lock = threading.Lock()
+
+    def add(self, chunk_index, chunk_text, error):
+        record = {"chunk": chunk_index, "error": f"{error.__class__.__name__}: {error}", "text": chunk_text}
+        with self.lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, "rb") as f:
+            f.seek(self.start)
+            return [json.loads(line) for line in f if line.strip()]
+
+    def replay(self, process_chunk, on_entries):
+        """
+        Re-run chunks that failed on a previous run; ones that fail again
+        are re-recorded. Returns True if there was anything to retry.
+        """
+        records = self.load()
+        if not records:
+            return False
+        self.start = os.path.getsize(self.path)
+        print(f"Retrying {len(records)} failed chunk(s) from {self.path}...")
+        for record in records:
+            try:
+                entries = process_chunk(record["text"])
+            except Exception as e:
+                print(f"  Chunk {record['chunk'] + 1} failed again: {e}")
+                self.add(record["chunk"], record["text"], e)
+                continue
+            print(f"  Chunk {record['chunk'] + 1} recovered {len(entries)} entries.")
+            if entries:
+                on_entries(entries)
+        return True
+
+    def compact(self):
+        """Empty the file once every record in it has been retried. Returns True if it did."""
+        if not self.start or not os.path.exists(self.path) or os.path.getsize(self.path) > self.start:
+            return False
+        os.remove(self.path)
+        self.start = 0
+        return True
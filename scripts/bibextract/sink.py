@@ -0,0 +1,161 @@
+import os
+import csv
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:  # optional; without it every profile writes CSV
+    pa = None
+
+from bibextract.columns import REQUIRED_COLUMNS, entries_to_frame
+from bibextract.checkpoint import sync
+
+# Rows per Parquet row group in the finished file. Chunks only yield a few
+# dozen rows each, so they are gathered up rather than written one by one.
+ROW_GROUP_ROWS = 50000
+
+# Every column is a nullable string: "N/A" where the model left a field
+# out, null where it answered null.
+SCHEMA = pa.schema([(col, pa.string()) for col in REQUIRED_COLUMNS]) if pa else None
+
+
+def parquet_path(csv_path):
+    return os.path.splitext(csv_path)[0] + ".parquet"
+
+
+def stream_path(csv_path):
+    return os.path.splitext(csv_path)[0] + ".arrows"
+
+
+def _cell(value):
+    if value is None:
+        return None
+    return value if isinstance(value, str) else str(value)
+
+
+def entries_to_batch(entries):
+    """Arrow record batch with exactly SCHEMA, missing fields filled with "N/A"."""
+    columns = [[_cell(e.get(col, "N/A")) for e in entries] for col in REQUIRED_COLUMNS]
+    return pa.record_batch(columns, schema=SCHEMA)
+
+
+class CsvSink:
+    """Rows appended straight to the output CSV."""
+
+    format = "csv"
+
+    def __init__(self, csv_path):
+        self.path = csv_path
+        self.files = [csv_path]
+
+    def start(self):
+        entries_to_frame([]).to_csv(self.path, index=False)
+
+    def write(self, entries):
+        with open(self.path, 'a', encoding='utf-8', newline='') as f:
+            entries_to_frame(entries).to_csv(f, header=False, index=False)
+            sync(f)
+
+    def read_entries(self):
+        with open(self.path, 'r', encoding='utf-8', newline='') as f:
+            yield from csv.DictReader(f)
+
+    def finish(self):
+        pass
+
+
+class ArrowSink:
+    """
+    Rows appended to an Arrow IPC stream next to the output CSV, one record
+    batch per chunk.
+
+    The stream is the schema followed by self-contained batch messages, so
+    it stays append-only and Checkpoint can cut it back to any commit
+    (Parquet's footer can't be appended to). finish() rewrites it as a
+    Parquet file in ROW_GROUP_ROWS row groups and exports the CSV from that.
+    """
+
+    format = "parquet"
+
+    def __init__(self, csv_path):
+        self.path = csv_path
+        self.stream = stream_path(csv_path)
+        self.files = [self.stream]
+
+    def start(self):
+        with open(self.stream, 'wb') as f:
+            f.write(SCHEMA.serialize())
+            sync(f)
+
+    def write(self, entries):
+        with open(self.stream, 'ab') as f:
+            f.write(entries_to_batch(entries).serialize())
+            sync(f)
+
+    def read_entries(self):
+        with pa.memory_map(self.stream) as source:
+            for batch in pa.ipc.open_stream(source):
+                yield from batch.to_pylist()
+
+    def finish(self):
+        with pa.memory_map(self.stream) as source:
+            table = pa.ipc.open_stream(source).read_all()
+            write_outputs(table, self.path)
+        print(f"  Wrote {table.num_rows} rows to {parquet_path(self.path)} and {self.path}")
+
+
+def make_sink(output_format, csv_path):
+    if output_format == "parquet":
+        if pa is not None:
+            return ArrowSink(csv_path)
+        print("pyarrow is not installed; writing CSV only.")
+    return CsvSink(csv_path)
+
+
+def write_outputs(table, csv_path):
+    """Write table as csv_path's Parquet file and as the CSV itself, each replaced atomically."""
+    for path, write in ((parquet_path(csv_path), _write_parquet), (csv_path, _write_csv)):
+        tmp_path = path + ".tmp"
+        write(table, tmp_path)
+        os.replace(tmp_path, path)
+
+
+def _write_parquet(table, path):
+    pq.write_table(table, path, row_group_size=ROW_GROUP_ROWS, compression="zstd")
+
+
+def _write_csv(table, path):
+    # pandas quoting, so the CSV matches what CsvSink writes
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        table.schema.empty_table().to_pandas().to_csv(f, index=False)
+        for batch in table.to_batches(ROW_GROUP_ROWS):
+            batch.to_pandas().to_csv(f, header=False, index=False)
+        sync(f)
+
+
+def fresh_parquet(csv_path):
+    """csv_path's Parquet file if pyarrow is installed and it is at least as new as the CSV, else None."""
+    parquet = parquet_path(csv_path)
+    if pa is None or not os.path.exists(parquet):
+        return None
+    if os.path.exists(csv_path) and os.path.getmtime(parquet) < os.path.getmtime(csv_path):
+        return None
+    return parquet
+
+
+def read_table(csv_path):
+    """
+    An extraction output as an Arrow table: its Parquet file memory-mapped
+    if there is one at least as new as the CSV, otherwise the CSV parsed
+    with every column as a string.
+    """
+    parquet = fresh_parquet(csv_path)
+    if parquet:
+        return pq.read_table(parquet, memory_map=True)
+    with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+        header = next(csv.reader(f), [])
+    # Empty cells are null; "N/A" stays a string, as written
+    options = pa_csv.ConvertOptions(column_types={name: pa.string() for name in header},
+                                    null_values=[""], strings_can_be_null=True)
+    return pa_csv.read_csv(csv_path, convert_options=options)
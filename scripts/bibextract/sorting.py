@@ -0,0 +1,210 @@
+import os
+import re
+import csv
+import heapq
+import itertools
+import tempfile
+import unicodedata
+
+from bibextract import sink
+
+# Sort keys used when none are given: first author, surname first.
+DEFAULT_KEY_COLUMNS = ["author1_last_name", "author1_first_name"]
+# Rough ceiling on the rows held in memory at once; each sorted run is
+# spilled to disk when its rows reach it.
+DEFAULT_MAX_MEMORY_MB = 256
+# Runs merged at once. More runs than this are merged in several passes,
+# so the number of open files stays bounded.
+MERGE_FAN_IN = 64
+# Rows read from a Parquet input at a time.
+PARQUET_BATCH_ROWS = 10000
+
+# Cells that mean "no value" sort first, as the old pandas sort did.
+MISSING = {"", "n/a", "none", "null"}
+
+# Letters NFKD leaves alone but a reader files under a plain letter
+_FOLD = str.maketrans({"ø": "o", "æ": "ae", "œ": "oe", "ł": "l", "đ": "d", "ð": "d", "þ": "th", "ı": "i"})
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def collation_key(value):
+    """
+    Sort key for a name or title cell: diacritics dropped, case folded (so
+    Matthews' ALL-CAPS surnames file with everyone else's) and punctuation
+    such as a leading "[" treated as a space.
+    """
+    text = value or ""
+    if text.strip().casefold() in MISSING:
+        return ""
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", text)
+        text = "".join(ch for ch in text if not unicodedata.combining(ch)).casefold().translate(_FOLD)
+    return _NON_WORD.sub(" ", text.lower()).strip()
+
+
+def raw_key(value):
+    return value or ""
+
+
+def _row_bytes(row):
+    # Approximate CPython footprint of a list of short str cells, plus its key
+    return 120 + sum(110 + 2 * len(cell) for cell in row)
+
+
+def _require_pyarrow(path):
+    if sink.pa is None:
+        raise ValueError(f"{path}: Parquet files need pyarrow")
+
+
+def read_rows(path):
+    """(header, rows) for a CSV or Parquet file, rows streamed as lists of strings."""
+    if path.endswith(".parquet"):
+        _require_pyarrow(path)
+        parquet = sink.pq.ParquetFile(path)
+        header = parquet.schema_arrow.names
+
+        def parquet_rows():
+            for batch in parquet.iter_batches(PARQUET_BATCH_ROWS):
+                columns = [["" if v is None else v for v in col.to_pylist()] for col in batch.columns]
+                yield from (list(row) for row in zip(*columns))
+        return header, parquet_rows()
+
+    f = open(path, 'r', encoding='utf-8', newline='')
+    reader = csv.reader(f)
+    header = next(reader, [])
+
+    def csv_rows():
+        with f:
+            yield from reader
+    return header, csv_rows()
+
+
+class RowWriter:
+    """Writes rows to a .csv or, with pyarrow, a .parquet file via a temp file renamed on close()."""
+
+    def __init__(self, path, header):
+        self.path = path
+        self.tmp_path = path + ".tmp"
+        self.header = header
+        if path.endswith(".parquet"):
+            _require_pyarrow(path)
+            self.schema = sink.pa.schema([(col, sink.pa.string()) for col in header])
+            self.writer = sink.pq.ParquetWriter(self.tmp_path, self.schema, compression="zstd")
+            self.pending = []
+        else:
+            self.f = open(self.tmp_path, 'w', encoding='utf-8', newline='')
+            self.writer = csv.writer(self.f, lineterminator="\n")
+            self.writer.writerow(header)
+
+    def write(self, row):
+        if self.path.endswith(".parquet"):
+            self.pending.append(row)
+            if len(self.pending) >= sink.ROW_GROUP_ROWS:
+                self._flush_row_group()
+        else:
+            self.writer.writerow(row)
+
+    def _flush_row_group(self):
+        columns = [[row[i] if i < len(row) else "" for row in self.pending] for i in range(len(self.header))]
+        self.writer.write_batch(sink.pa.record_batch(columns, schema=self.schema))
+        self.pending = []
+
+    def close(self):
+        if self.path.endswith(".parquet"):
+            if self.pending:
+                self._flush_row_group()
+            self.writer.close()
+        else:
+            self.f.close()
+        os.replace(self.tmp_path, self.path)
+
+
+def _write_run(rows, directory, n):
+    path = os.path.join(directory, f"run{n:05d}.csv")
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        csv.writer(f, lineterminator="\n").writerows(rows)
+    return path
+
+
+def _read_run(path):
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        yield from csv.reader(f)
+
+
+def external_sort(inputs, outputs, key_columns=None, normalize=True, max_memory_mb=DEFAULT_MAX_MEMORY_MB,
+                  tmp_dir=None):
+    """
+    Sort the rows of one or more extractor outputs into each of outputs.
+
+    Rows are read as a stream and sorted in runs of about max_memory_mb,
+    each spilled to a temp CSV, then k-way merged, so the input can be far
+    larger than memory. The sort is stable: equal keys keep their input
+    order, file by file. Later inputs are matched to the first input's
+    header by column name, with missing columns left empty.
+    """
+    key_columns = key_columns or DEFAULT_KEY_COLUMNS
+    collate = collation_key if normalize else raw_key
+    budget = max_memory_mb * 1024 * 1024
+
+    header = None
+    with tempfile.TemporaryDirectory(dir=tmp_dir, prefix="sort-") as directory:
+        runs = []
+        run, run_bytes = [], 0
+        names = itertools.count()
+
+        def spill():
+            nonlocal run, run_bytes
+            run.sort(key=lambda item: item[0])
+            # Each run row is its key cells followed by the row itself
+            runs.append(_write_run((list(key) + row for key, row in run), directory, next(names)))
+            run, run_bytes = [], 0
+
+        total = 0
+        for path in inputs:
+            file_header, rows = read_rows(path)
+            if header is None:
+                header = file_header
+                missing = [col for col in key_columns if col not in header]
+                if missing:
+                    raise ValueError(f"{path} has no column(s) {', '.join(missing)}")
+                key_index = [header.index(col) for col in key_columns]
+            positions = [file_header.index(col) if col in file_header else None for col in header]
+            print(f"Reading {path}...")
+            for row in rows:
+                if file_header != header:
+                    row = [row[p] if p is not None and p < len(row) else "" for p in positions]
+                key = tuple(collate(row[i]) if i < len(row) else "" for i in key_index)
+                run.append((key, row))
+                run_bytes += _row_bytes(row)
+                total += 1
+                if run_bytes >= budget:
+                    spill()
+        if run or not runs:
+            spill()
+
+        spilled = len(runs)
+        width = len(key_columns)
+
+        def keyed(path):
+            for row in _read_run(path):
+                yield row[:width], row
+
+        # heapq.merge is stable across its inputs, and runs are in input order
+        while len(runs) > MERGE_FAN_IN:
+            merged = []
+            for start in range(0, len(runs), MERGE_FAN_IN):
+                group = runs[start:start + MERGE_FAN_IN]
+                rows = (row for _, row in heapq.merge(*map(keyed, group), key=lambda item: item[0]))
+                merged.append(_write_run(rows, directory, next(names)))
+                for path in group:
+                    os.remove(path)
+            runs = merged
+
+        print(f"Merging {total} rows from {spilled} sorted run(s)...")
+        writers = [RowWriter(path, header) for path in outputs]
+        for _, row in heapq.merge(*map(keyed, runs), key=lambda item: item[0]):
+            for writer in writers:
+                writer.write(row[width:])
+        for writer in writers:
+            writer.close()
+    return total
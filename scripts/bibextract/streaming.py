@@ -0,0 +1,170 @@
+import json
+import time
+
+from bibextract.columns import entry_key
+from bibextract.preparse import split_entries
+from bibextract.sorting import collation_key
+
+
+class EntryParser:
+    """
+    Incremental reader for a {"entries": [{...}, {...}]} response: feed()
+    it text as it arrives and it returns each entry object as soon as its
+    closing brace does. This is for recovering truncated answers: whatever
+    has closed when a response is cut off is kept, so only the rest of the
+    chunk needs asking for again. Entries are not passed on as they close;
+    the pipeline writes a chunk's rows once its whole answer is in.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.entries = []
+        self.done = False  # the root object has closed
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.string_start = None
+        self.last_string = None
+        self.key = None
+        self.in_entries = False
+        self.entry_start = None
+
+    def feed(self, text):
+        """Scan text; returns the entries it completed."""
+        self.buffer += text
+        found = []
+        buffer = self.buffer
+        for pos in range(self.pos, len(buffer)):
+            ch = buffer[pos]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == "\\":
+                    self.escaped = True
+                elif ch == '"':
+                    self.in_string = False
+                    if self.depth == 1:
+                        self.last_string = json.loads(buffer[self.string_start:pos + 1])
+                continue
+            if ch == '"':
+                self.in_string = True
+                self.string_start = pos
+            elif ch == ":" and self.depth == 1:
+                self.key = self.last_string
+            elif ch in "{[":
+                if ch == "[" and self.depth == 1 and self.key == "entries":
+                    self.in_entries = True
+                elif ch == "{" and self.depth == 2 and self.in_entries:
+                    self.entry_start = pos
+                self.depth += 1
+            elif ch in "}]":
+                self.depth -= 1
+                if ch == "}" and self.depth == 2 and self.entry_start is not None:
+                    found.append(json.loads(buffer[self.entry_start:pos + 1]))
+                    self.entry_start = None
+                elif ch == "]" and self.depth == 1:
+                    self.in_entries = False
+                elif self.depth == 0:
+                    self.done = True
+        self.pos = len(buffer)
+        self.entries.extend(found)
+        return found
+
+
+class Completion:
+    """What came back for one request: the text, the entries that closed in it, and how it ended."""
+
+    def __init__(self, parser, finish_reason, usage, first_entry_s=None, elapsed_s=None, error=None):
+        self.text = parser.buffer
+        self.entries = parser.entries
+        self.finish_reason = finish_reason
+        self.usage = usage
+        self.first_entry_s = first_entry_s
+        self.elapsed_s = elapsed_s
+        self.error = error
+        # Cut off at the output token limit or by a broken stream; an
+        # answer that simply isn't valid JSON is not "truncated" and fails
+        # as before.
+        self.truncated = finish_reason == "length" or error is not None
+
+
+def read_completion(response):
+    """Completion for a non-streamed response."""
+    choice = response.choices[0]
+    parser = EntryParser()
+    parser.feed(choice.message.content or "")
+    return Completion(parser, choice.finish_reason, response.usage)
+
+
+def stream_completion(create, **request):
+    """
+    Call create (chat.completions.create) with stream=True and parse the
+    deltas as they arrive. A stream that breaks after some entries have
+    closed returns them as an incomplete Completion instead of raising, so
+    the caller can ask for the rest rather than redo the whole chunk.
+    """
+    start = time.perf_counter()
+    parser = EntryParser()
+    finish_reason = usage = first_entry_s = None
+    try:
+        for event in create(stream=True, stream_options={"include_usage": True}, **request):
+            if getattr(event, "usage", None):
+                usage = event.usage
+            for choice in event.choices:
+                if choice.delta and choice.delta.content and parser.feed(choice.delta.content):
+                    if first_entry_s is None:
+                        first_entry_s = time.perf_counter() - start
+                if choice.finish_reason:
+                    finish_reason = choice.finish_reason
+    except Exception as e:
+        if not parser.entries:
+            raise
+        return Completion(parser, finish_reason, usage, first_entry_s, time.perf_counter() - start, error=e)
+    return Completion(parser, finish_reason, usage, first_entry_s, time.perf_counter() - start)
+
+
+def _needles(entry):
+    """Collation keys to find an entry by: its title's first words, then its surname."""
+    title = " ".join(collation_key(str(entry.get("title") or "")).split()[:3])
+    surname = collation_key(str(entry.get("author1_last_name") or ""))
+    return [needle for needle in (title, surname) if needle]
+
+
+def resume_position(text, entries, pattern=None):
+    """
+    Offset to ask for the rest of text from after a cut-off answer: the
+    end of the last of its complete entries that can be found, i.e. the
+    start of the next BOUNDARY_PATTERN segment (len(text) if there is
+    none), or without a pattern the end of that entry's line. Entries are
+    matched to lines in order, by their title's first words or else their
+    surname. None if none can be found.
+    """
+    lines = text.splitlines(keepends=True)
+    keys = [f" {collation_key(line)} " for line in lines]
+    cursor, found = 0, False
+    for entry in entries:
+        for needle in _needles(entry):
+            j = next((j for j in range(cursor, len(lines)) if f" {needle} " in keys[j]), None)
+            if j is not None:
+                cursor, found = j, True
+                break
+    if not found:
+        return None
+    line_end = sum(len(line) for line in lines[:cursor + 1])
+    if pattern:
+        starts = [0]
+        for segment in split_entries(text, pattern):
+            starts.append(starts[-1] + len(segment))
+        return min(start for start in starts if start >= line_end)
+    return line_end
+
+
+def repeated_entries(kept, rest):
+    """How many entries rest starts with that kept ends with (the answer for the rest starts over an entry)."""
+    kept_keys = [entry_key(e) for e in kept]
+    rest_keys = [entry_key(e) for e in rest]
+    for n in range(min(len(kept_keys), len(rest_keys)), 0, -1):
+        if kept_keys[-n:] == rest_keys[:n]:
+            return n
+    return 0
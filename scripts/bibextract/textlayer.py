@@ -0,0 +1,68 @@
+import os
+import re
+import unicodedata
+
+# A page's embedded text is used as-is only if at most this fraction of its
+# characters are control codes, U+FFFD or private-use glyphs (signs of a
+# broken font encoding)...
+MAX_BAD_CHAR_DENSITY = 0.01
+# ...and at least this fraction of its words are in the dictionary or
+# shaped like a name (indexes are mostly names). Real pages of the bundled
+# bibliographies score 0.3 and up even with only the built-in common
+# words; garbled layers score close to 0. Only missing or plainly broken
+# layers are caught: a mis-mapped font that still yields word-like text
+# passes and has to be forced through ocr_bibliographies.py.
+MIN_WORD_RATE = 0.2
+# Fewer words than this usually means a scanned page with no text layer.
+MIN_WORDS = 10
+
+SYSTEM_DICTIONARY = "/usr/share/dict/words"
+
+# Function words and the vocabulary of bibliography entries; enough to tell
+# real English from a garbled text layer when no system word list exists.
+COMMON_WORDS = """
+a about after all also an and any are as at autobiography be been before being between both but by
+can city co college company could day did do down during each early edited edition editor first
+for from had has have he her his history how i in into is it its john journal last life like
+london made man many may me memoir memoirs more most my new no not now of on one only or other
+our out over own part people press published publisher reminiscences said she should so some
+story such than that the their them then there these they this through time to translated
+under university up us vol was we were what when where which who will with world would years
+york you your account american british born career childhood family war work letters diary
+""".split()
+
+_WORD = re.compile(r"[^\W\d_]{2,}")
+_NAME = re.compile(r"[A-Z][a-z]*[aeiouy][a-z]*")
+
+
+def _load_dictionary():
+    words = set(COMMON_WORDS)
+    if os.path.exists(SYSTEM_DICTIONARY):
+        with open(SYSTEM_DICTIONARY, "r", encoding="utf-8", errors="replace") as f:
+            words.update(line.strip().lower() for line in f)
+    return words
+
+
+DICTIONARY = _load_dictionary()
+
+
+def _bad_char(ch):
+    if ch in "\n\r\t\f":
+        return False
+    return ch == "�" or unicodedata.category(ch) in ("Cc", "Co")
+
+
+def text_quality(text):
+    """(bad_char_density, word_rate, word_count) for a page of text."""
+    if not text:
+        return 0.0, 0.0, 0
+    bad = sum(1 for ch in text if _bad_char(ch))
+    words = _WORD.findall(text)
+    hits = sum(1 for w in words if w.lower() in DICTIONARY or _NAME.fullmatch(w))
+    return bad / len(text), (hits / len(words) if words else 0.0), len(words)
+
+
+def is_usable(quality, max_bad_char_density=MAX_BAD_CHAR_DENSITY, min_word_rate=MIN_WORD_RATE):
+    """True if a text_quality() score is good enough to skip OCR."""
+    bad_density, word_rate, words = quality
+    return words >= MIN_WORDS and bad_density <= max_bad_char_density and word_rate >= min_word_rate
@@ -0,0 +1,26 @@
+import functools
+
+try:
+    import tiktoken
+except ImportError:  # optional; fall back to a character estimate
+    tiktoken = None
+
+# Without tiktoken, assume this many characters per token. Bibliographic
+# text (names, initials, dates, page counts) tokenizes denser than prose,
+# so this errs on the side of smaller chunks.
+FALLBACK_CHARS_PER_TOKEN = 3
+
+
+@functools.lru_cache(maxsize=None)
+def _encoding(model):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text, model="gpt-4o-mini"):
+    """Tokens in text for model; exact with tiktoken installed, a conservative estimate otherwise."""
+    if tiktoken is None:
+        return -(-len(text) // FALLBACK_CHARS_PER_TOKEN)
+    return len(_encoding(model).encode(text, disallowed_special=()))
@@ -0,0 +1,64 @@
+from bibextract.columns import REQUIRED_COLUMNS
+
+# Compact response format: each entry is an object of short field codes,
+# leaving out every field that would be "N/A", instead of all 23 column
+# names with mostly "N/A" values. This cuts output tokens (the slow and
+# expensive part of a request) to about a third; decode() expands the
+# entries back into full rows.
+
+FIELD_CODES = {
+    "author1_last_name": "a1l", "author1_first_name": "a1f",
+    "author2_last_name": "a2l", "author2_first_name": "a2f",
+    "editor1_last_name": "e1l", "editor1_first_name": "e1f",
+    "title": "t",
+    "original_date_of_publication": "d1", "second_or_later_date_of_publication": "d2",
+    "volume": "v", "publisher": "pub", "publisher_location": "loc", "number_of_pages": "pp",
+    "dictation": "dic", "name_of_transcriber": "trs",
+    "translation": "tra", "name_of_translator": "trn",
+    "summary": "sum", "occupations": "occ",
+    "date_of_birth": "born", "date_of_death": "died",
+    "place_of_birth": "bp", "other_places_lived": "lived",
+}
+COLUMNS_BY_CODE = {code: column for column, code in FIELD_CODES.items()}
+# Kept as they are: coalesce's part number
+PASSTHROUGH_KEYS = ("part",)
+
+FORMAT_NOTE = """
+Response format: whatever field names are used above, write each entry with these short keys instead, and leave out every field that would be "N/A":
+""" + "\n".join(f"{code} = {column}" for column, code in FIELD_CODES.items()) + """
+e.g. {"entries": [{"a1l": "Abbot", "a1f": "Willis John", "t": "Watching the world go by", "d1": "1934"}]}
+"""
+
+
+def encode(entries):
+    """entries in the compact format (for few-shot examples)."""
+    return [{FIELD_CODES.get(k, k): v for k, v in entry.items() if v not in (None, "", "N/A")} for entry in entries]
+
+
+def decode(entries):
+    """
+    Full rows (every REQUIRED_COLUMNS key, "N/A" where absent) from a
+    compact response's entries. Full column names are accepted too and
+    unknown keys are ignored; anything that is not a list of flat objects
+    raises ValueError, failing the chunk like malformed JSON would.
+    """
+    if not isinstance(entries, list):
+        raise ValueError(f"Expected a list of entries, got {type(entries).__name__}")
+    rows = []
+    for entry in entries:
+        if not isinstance(entry, dict):
+            raise ValueError(f"Expected an entry object, got {str(entry)[:80]!r}")
+        row = dict.fromkeys(REQUIRED_COLUMNS, "N/A")
+        for key, value in entry.items():
+            if key in PASSTHROUGH_KEYS:
+                row[key] = value
+                continue
+            column = COLUMNS_BY_CODE.get(key) or (key if key in FIELD_CODES else None)
+            if column is None:
+                continue
+            if isinstance(value, (dict, list)):
+                raise ValueError(f"Field {key} should be a string, got {str(value)[:80]!r}")
+            if value is not None and str(value).strip():
+                row[column] = str(value)
+        rows.append(row)
+    return rows
@@ -0,0 +1,61 @@
+import sys
+import json
+import argparse
+
+from bibextract.dedup import DedupIndex, DEFAULT_THRESHOLD
+from bibextract.sorting import read_rows, RowWriter
+
+# Drop repeated entries from existing extractor outputs (or across
+# several bibliographies), keeping the first occurrence, e.g.
+#   python scripts/dedup_output.py output/matthews_UPI.csv -o output/matthews_dedup.csv
+#   python scripts/dedup_output.py output/kaplan_UPI.csv output/briscoe_UPI.csv -o output/combined.csv \
+#       --report output/combined_duplicates.jsonl
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Remove duplicate bibliography entries from extracted rows.")
+    parser.add_argument("inputs", nargs="+", help="CSV or Parquet files, read in order.")
+    parser.add_argument("-o", "--output", required=True, help=".csv or .parquet file for the kept rows.")
+    parser.add_argument("--report", help="JSONL file listing each dropped row and the entry it repeats.")
+    parser.add_argument("--exact", action="store_true",
+                        help="Only drop exact (normalized author, title and date) repeats.")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="3-gram similarity for near-duplicates (default: %(default)s).")
+    args = parser.parse_args(argv)
+
+    index = DedupIndex(near=not args.exact, threshold=args.threshold)
+    header, writer, report = None, None, None
+    kept = dropped = 0
+    try:
+        if args.report:
+            report = open(args.report, 'w', encoding='utf-8')
+        for path in args.inputs:
+            file_header, rows = read_rows(path)
+            if header is None:
+                header = file_header
+                writer = RowWriter(args.output, header)
+            print(f"Reading {path}...")
+            for row in rows:
+                entry = dict(zip(file_header, row))
+                found = index.add(entry)
+                if found:
+                    dropped += 1
+                    if report:
+                        report.write(json.dumps({"source": path, "match": found[0], "of": found[1],
+                                                 "entry": entry}) + "\n")
+                    continue
+                writer.write([entry.get(col, "") for col in header])
+                kept += 1
+        writer.close()
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+    finally:
+        if report:
+            report.close()
+    print(f"Kept {kept} rows, dropped {dropped} duplicates; saved to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,10 @@
+import sys
+
+from bibextract.cli import main
+
+# Single entry point for every bibliography, e.g.
+#   python scripts/extract.py kaplan_upi
+#   python scripts/extract.py generic data/text/briscoe.txt data/text/kaplan.txt
+#   python scripts/extract.py americans_of_color data/text/sturh_iwabuchi.txt --batch
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,330 @@
+import re
+import sys
+import json
+import time
+import random
+import threading
+import argparse
+import itertools
+from email import message_from_bytes
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-in for the OpenAI chat completions endpoint so the extractors
+# can be exercised without an API key or network access:
+#
+#   python scripts/mock_openai_server.py --port 8765 --latency 0.5
+#   OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=mock \
+#       python scripts/extract_kaplan_upi.py
+#
+# --rate-limit-rate / --server-error-rate inject 429s (with Retry-After) and
+# 503s so the scheduler's retry and dead-letter paths can be exercised.
+#
+# The Files and Batches endpoints used by --batch mode are also stubbed:
+# uploaded batch files are answered line by line with the same fake
+# completions and the job reports "completed" after --batch-delay seconds.
+#
+# Requests with "stream": true are answered as server-sent events, a few
+# characters per delta, spread over --latency. --truncate-rate cuts that
+# fraction of answers off halfway with finish_reason "length", as the
+# output token limit would. --skip-rate drops that fraction of entries
+# from answers, as a model that skips entries would.
+
+
+_PART = re.compile(r"### Part (\d+)$")
+_FIRST_PART = re.compile(r"\n### Part \d+\n")
+
+
+def fake_entries(user_text, compact=False):
+    # One entry per non-blank line of the chunk, enough to see rows land in
+    # the CSV in the right order. Coalesced requests ("### Part N" headers)
+    # get each entry tagged with its part, as the real model is asked to,
+    # and prompts asking for the compact format get short field codes.
+    body = user_text.split("\n\n", 1)[-1]
+    first_part = _FIRST_PART.search(body)
+    if first_part:
+        body = body[first_part.start():]
+    entries = []
+    part = None
+    for line in body.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        header = _PART.match(line)
+        if header:
+            part = int(header[1])
+            continue
+        head = line.split(",", 1)
+        first = head[1].strip()[:40] if len(head) > 1 else "N/A"
+        if compact:
+            entry = {"a1l": head[0][:40], "t": line[:80]}
+            if first != "N/A":
+                entry["a1f"] = first
+        else:
+            entry = {"author1_last_name": head[0][:40], "author1_first_name": first, "title": line[:80]}
+        if part is not None:
+            entry["part"] = part
+        entries.append(entry)
+    return entries
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    batch_delay = 0.0
+    files = {}
+    batches = {}
+    ids = itertools.count(1)
+    rate_limit_rate = 0.0
+    server_error_rate = 0.0
+    truncate_rate = 0.0
+    skip_rate = 0.0
+    retry_after = 1.0
+    rng = random.Random(0)
+    rng_lock = threading.Lock()
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_stream(self, completion, include_usage, piece=16):
+        content = completion["choices"][0]["message"]["content"]
+        finish_reason = completion["choices"][0]["finish_reason"]
+        pieces = [content[i:i + piece] for i in range(0, len(content), piece)] or [""]
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+
+        def event(choices, usage=None):
+            chunk = {"id": completion["id"], "object": "chat.completion.chunk", "created": completion["created"],
+                     "model": completion["model"], "choices": choices, "usage": usage}
+            self.wfile.write(b"data: " + json.dumps(chunk).encode("utf-8") + b"\n\n")
+            self.wfile.flush()
+
+        for n, text in enumerate(pieces):
+            if self.latency:
+                time.sleep(self.latency / len(pieces))
+            delta = {"content": text}
+            if n == 0:
+                delta["role"] = "assistant"
+            event([{"index": 0, "delta": delta, "finish_reason": None}])
+        event([{"index": 0, "delta": {}, "finish_reason": finish_reason}])
+        if include_usage:
+            event([], completion["usage"])
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_POST(self):
+        path = self.path.rstrip("/")
+        if path.endswith("/chat/completions"):
+            request = self.read_json()
+            if self.inject_fault():
+                return
+            if request.get("stream"):
+                self.send_stream(self.completion(request), (request.get("stream_options") or {}).get("include_usage"))
+                return
+            if self.latency:
+                time.sleep(self.latency)
+            self.send_json(200, self.completion(request))
+        elif path.endswith("/files"):
+            self.send_json(200, self.upload_file())
+        elif path.endswith("/batches"):
+            self.send_json(200, self.create_batch(self.read_json()))
+        else:
+            self.send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+
+    def do_GET(self):
+        parts = self.path.rstrip("/").split("/")
+        if len(parts) >= 2 and parts[-2] == "batches" and parts[-1] in self.batches:
+            self.send_json(200, self.batch_status(parts[-1]))
+        elif len(parts) >= 3 and parts[-1] == "content" and parts[-2] in self.files:
+            body = self.files[parts[-2]]["content"]
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self.send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+
+    def new_id(self, prefix):
+        return f"{prefix}-mock-{next(self.ids)}"
+
+    def store_file(self, content, filename, purpose):
+        file_id = self.new_id("file")
+        self.files[file_id] = {"content": content, "filename": filename, "purpose": purpose}
+        return {
+            "id": file_id, "object": "file", "bytes": len(content), "created_at": int(time.time()),
+            "filename": filename, "purpose": purpose, "status": "processed",
+        }
+
+    def upload_file(self):
+        length = int(self.headers.get("Content-Length", 0))
+        raw = b"Content-Type: " + self.headers["Content-Type"].encode() + b"\r\n\r\n" + self.rfile.read(length)
+        content, filename, purpose = b"", "upload.jsonl", "batch"
+        for part in message_from_bytes(raw).walk():
+            name = part.get_param("name", header="content-disposition")
+            if name == "file":
+                content = part.get_payload(decode=True)
+                filename = part.get_filename() or filename
+            elif name == "purpose":
+                purpose = part.get_payload(decode=True).decode()
+        return self.store_file(content, filename, purpose)
+
+    def create_batch(self, request):
+        lines = []
+        for line in self.files[request["input_file_id"]]["content"].decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            lines.append(json.dumps({
+                "id": self.new_id("batch_req"),
+                "custom_id": item["custom_id"],
+                "response": {"status_code": 200, "request_id": "mock", "body": self.completion(item["body"])},
+                "error": None,
+            }))
+        output = self.store_file(("\n".join(lines) + "\n").encode("utf-8"), "output.jsonl", "batch_output")
+        batch_id = self.new_id("batch")
+        self.batches[batch_id] = {
+            "id": batch_id, "object": "batch", "endpoint": request.get("endpoint"),
+            "input_file_id": request["input_file_id"], "completion_window": request.get("completion_window"),
+            "created_at": int(time.time()), "ready_at": time.monotonic() + self.batch_delay,
+            "output_file_id": output["id"], "total": len(lines),
+        }
+        return self.batch_status(batch_id)
+
+    def batch_status(self, batch_id):
+        batch = dict(self.batches[batch_id])
+        done = time.monotonic() >= batch.pop("ready_at")
+        total = batch.pop("total")
+        batch["status"] = "completed" if done else "in_progress"
+        batch["request_counts"] = {"total": total, "completed": total if done else 0, "failed": 0}
+        if not done:
+            batch["output_file_id"] = None
+        batch["error_file_id"] = None
+        return batch
+
+    def inject_fault(self):
+        with self.rng_lock:
+            roll = self.rng.random()
+        if roll < self.rate_limit_rate:
+            self.send_json(429, {"error": {"message": "Rate limit reached (mock)", "type": "requests"}},
+                           {"Retry-After": f"{self.retry_after:g}"})
+            return True
+        if roll < self.rate_limit_rate + self.server_error_rate:
+            self.send_json(503, {"error": {"message": "Service unavailable (mock)"}})
+            return True
+        return False
+
+    def completion(self, request):
+        user_text = ""
+        for message in request.get("messages", []):
+            if message.get("role") == "user":
+                user_text = message.get("content", "")
+        messages = request.get("messages", [])
+        compact = any("a1l = author1_last_name" in m.get("content", "") for m in messages if m.get("role") == "system")
+        entries = fake_entries(user_text, compact)
+        if self.skip_rate:
+            with self.rng_lock:
+                entries = [e for e in entries if self.rng.random() >= self.skip_rate]
+        content = json.dumps({"entries": entries})
+        finish_reason = "stop"
+        with self.rng_lock:
+            truncate = len(entries) > 1 and self.rng.random() < self.truncate_rate
+        if truncate:
+            # Halfway through an entry, with the ones before it complete
+            head = json.dumps({"entries": entries[:len(entries) // 2 + 1]})
+            content, finish_reason = head[:len(head) - 20], "length"
+        prompt_chars = sum(len(m.get("content", "")) for m in messages)
+        # Like the real prompt cache: a prefix (every message but the last)
+        # seen before is served from cache if it is at least 1024 tokens,
+        # counted in 128-token blocks.
+        prefix = json.dumps(messages[:-1])
+        prefix_tokens = sum(len(m.get("content", "")) for m in messages[:-1]) // 4
+        cached = 0
+        if prefix in self.prefixes and prefix_tokens >= 1024:
+            cached = prefix_tokens // 128 * 128
+        self.prefixes.add(prefix)
+        return {
+            "id": "chatcmpl-mock",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": finish_reason,
+            }],
+            "usage": {
+                "prompt_tokens": prompt_chars // 4,
+                "completion_tokens": len(content) // 4,
+                "total_tokens": (prompt_chars + len(content)) // 4,
+                "prompt_tokens_details": {"cached_tokens": cached},
+            },
+        }
+
+
+def make_server(port=8765, latency=0.0, host="127.0.0.1", rate_limit_rate=0.0,
+                server_error_rate=0.0, retry_after=1.0, seed=0, batch_delay=0.0, truncate_rate=0.0, skip_rate=0.0):
+    handler = type("ConfiguredMockHandler", (MockHandler,), {
+        "latency": latency,
+        "batch_delay": batch_delay,
+        "files": {},
+        "batches": {},
+        "prefixes": set(),
+        "rate_limit_rate": rate_limit_rate,
+        "server_error_rate": server_error_rate,
+        "truncate_rate": truncate_rate,
+        "skip_rate": skip_rate,
+        "retry_after": retry_after,
+        "rng": random.Random(seed),
+    })
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible stub server.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Seconds to sleep before answering each request.")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0,
+                        help="Fraction of requests answered with 429.")
+    parser.add_argument("--server-error-rate", type=float, default=0.0,
+                        help="Fraction of requests answered with 503.")
+    parser.add_argument("--retry-after", type=float, default=1.0,
+                        help="Retry-After seconds sent with injected 429s.")
+    parser.add_argument("--truncate-rate", type=float, default=0.0,
+                        help="Fraction of answers cut off halfway with finish_reason length.")
+    parser.add_argument("--skip-rate", type=float, default=0.0,
+                        help="Fraction of entries left out of answers.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-delay", type=float, default=0.0,
+                        help="Seconds before a submitted batch reports completed.")
+    args = parser.parse_args(argv)
+
+    server = make_server(args.port, args.latency, rate_limit_rate=args.rate_limit_rate,
+                         server_error_rate=args.server_error_rate,
+                         retry_after=args.retry_after, seed=args.seed,
+                         batch_delay=args.batch_delay, truncate_rate=args.truncate_rate, skip_rate=args.skip_rate)
+    print(f"Mock OpenAI server on http://127.0.0.1:{args.port}/v1 (latency {args.latency}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
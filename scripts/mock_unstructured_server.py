@@ -0,0 +1,129 @@
+import io
+import json
+import time
+import random
+import threading
+import argparse
+from email import message_from_bytes
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from pypdf import PdfReader
+
+# Local stand-in for the Unstructured partition endpoint, so
+# unstructured_parse.py can be exercised without an API key or quota:
+#
+#   python scripts/mock_unstructured_server.py --port 8766 --page-latency 0.5
+#   UNSTRUCTURED_API_URL=http://127.0.0.1:8766/general/v0/general \
+#       python scripts/unstructured_parse.py book.pdf
+#
+# Each uploaded page comes back as its pypdf text layer (or a placeholder
+# naming the page) followed by a PageBreak element. --page-latency models
+# hi_res parsing time, which grows with the pages in the upload;
+# --rate-limit-rate / --server-error-rate inject 429s and 503s.
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    page_latency = 0.0
+    rate_limit_rate = 0.0
+    server_error_rate = 0.0
+    retry_after = 1.0
+    rng = random.Random(0)
+    rng_lock = threading.Lock()
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        raw = b"Content-Type: " + self.headers["Content-Type"].encode() + b"\r\n\r\n" + self.rfile.read(length)
+        if not self.path.rstrip("/").endswith("/general/v0/general"):
+            self.send_json(404, {"detail": f"unknown path {self.path}"})
+            return
+        if self.inject_fault():
+            return
+        pdf, filename = None, "upload.pdf"
+        for part in message_from_bytes(raw).walk():
+            if part.get_param("name", header="content-disposition") == "files":
+                pdf = part.get_payload(decode=True)
+                filename = part.get_filename() or filename
+        if not pdf:
+            self.send_json(422, {"detail": "no files uploaded"})
+            return
+        elements = self.partition(pdf, filename)
+        pages = sum(1 for el in elements if el["type"] == "PageBreak")
+        if self.page_latency:
+            time.sleep(self.page_latency * pages)
+        self.send_json(200, elements)
+
+    def inject_fault(self):
+        with self.rng_lock:
+            roll = self.rng.random()
+        if roll < self.rate_limit_rate:
+            self.send_json(429, {"detail": "Too many requests (mock)"}, {"Retry-After": f"{self.retry_after:g}"})
+            return True
+        if roll < self.rate_limit_rate + self.server_error_rate:
+            self.send_json(503, {"detail": "Service unavailable (mock)"})
+            return True
+        return False
+
+    def partition(self, pdf, filename):
+        elements = []
+        for n, page in enumerate(PdfReader(io.BytesIO(pdf)).pages, 1):
+            text = (page.extract_text() or "").strip() or f"[{filename} page {n}]"
+            metadata = {"filename": filename, "page_number": n}
+            elements.append({"type": "NarrativeText", "text": text, "metadata": metadata})
+            elements.append({"type": "PageBreak", "text": "", "metadata": metadata})
+        return elements
+
+
+def make_server(port=8766, page_latency=0.0, host="127.0.0.1", rate_limit_rate=0.0,
+                server_error_rate=0.0, retry_after=1.0, seed=0):
+    handler = type("ConfiguredMockHandler", (MockHandler,), {
+        "page_latency": page_latency,
+        "rate_limit_rate": rate_limit_rate,
+        "server_error_rate": server_error_rate,
+        "retry_after": retry_after,
+        "rng": random.Random(seed),
+    })
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local Unstructured API stub server.")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--page-latency", type=float, default=0.0,
+                        help="Seconds of simulated parsing per uploaded page.")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0,
+                        help="Fraction of requests answered with 429.")
+    parser.add_argument("--server-error-rate", type=float, default=0.0,
+                        help="Fraction of requests answered with 503.")
+    parser.add_argument("--retry-after", type=float, default=1.0,
+                        help="Retry-After seconds sent with injected 429s.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    server = make_server(args.port, args.page_latency, rate_limit_rate=args.rate_limit_rate,
+                         server_error_rate=args.server_error_rate,
+                         retry_after=args.retry_after, seed=args.seed)
+    print(f"Mock Unstructured server on http://127.0.0.1:{args.port}/general/v0/general "
+          f"({args.page_latency}s per page)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,57 +1,87 @@
 import os
-import sys
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 from pdf2image import convert_from_path, pdfinfo_from_path
 import pytesseract
 
-def ocr_pdf_chunked(pdf_path, output_txt_path, chunk_size=10):
+from bibextract.engine import run_in_order
+from bibextract.checkpoint import Checkpoint, sync
+
+DEFAULT_DPI = 200
+
+
+def ocr_page(task):
+    # Runs in a worker process: rasterize a single page and OCR it.
+    pdf_path, page_num, dpi = task
+    images = convert_from_path(pdf_path, dpi=dpi, first_page=page_num, last_page=page_num)
+    return pytesseract.image_to_string(images[0]) if images else ""
+
+
+def ocr_pdf(pdf_path, output_txt_path, workers=None, dpi=DEFAULT_DPI):
     print(f"Processing {pdf_path}...")
     try:
         # Get total pages
         info = pdfinfo_from_path(pdf_path)
         total_pages = info["Pages"]
         print(f"  Total pages: {total_pages}")
-        
-        # clear output file
-        with open(output_txt_path, 'w', encoding='utf-8') as f:
-            f.write("")
-
-        for i in range(1, total_pages + 1, chunk_size):
-            last_page = min(i + chunk_size - 1, total_pages)
-            print(f"  Processing pages {i} to {last_page}...")
-            
-            images = convert_from_path(pdf_path, first_page=i, last_page=last_page)
-            
-            chunk_text = ""
-            for j, image in enumerate(images):
-                page_num = i + j
-                print(f"    OCR Page {page_num}")
-                text = pytesseract.image_to_string(image)
-                chunk_text += text + "\n\f"
-            
+
+        progress_dir = os.path.join("data", "progress")
+        os.makedirs(progress_dir, exist_ok=True)
+        progress_file = os.path.join(progress_dir, os.path.basename(pdf_path) + "_ocr.progress")
+
+        # Output is cut back to the last committed page, dropping a half-written one
+        checkpoint = Checkpoint(progress_file, [output_txt_path])
+        start_page = checkpoint.restore().get("pages", 0)
+        if start_page:
+            print(f"  Resuming from page {start_page + 1}...")
+        else:
+            # clear output file
+            with open(output_txt_path, 'w', encoding='utf-8') as f:
+                f.write("")
+
+        workers = workers or os.cpu_count() or 1
+        # One tesseract thread per worker; the pool provides the parallelism
+        os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+        tasks = [(pdf_path, page_num, dpi) for page_num in range(1, total_pages + 1)]
+
+        def write_page(i, text):
+            page_num = i + 1
             with open(output_txt_path, 'a', encoding='utf-8') as f:
-                f.write(chunk_text)
-                
+                f.write(text + "\n\f")
+                sync(f)
+            checkpoint.commit(pages=page_num)
+            print(f"    OCR Page {page_num}/{total_pages}")
+
+        print(f"  OCR with {workers} worker(s) at {dpi} dpi...")
+        run_in_order(tasks, ocr_page, write_page, start_page, workers, executor=ProcessPoolExecutor)
+
+        # Done - clear progress file
+        os.remove(progress_file)
         print(f"  Completed. Saved to {output_txt_path}")
-        
+
     except Exception as e:
         print(f"Error processing {pdf_path}: {e}")
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python ocr_bibliographies.py <pdf_file1> [pdf_file2 ...]")
-        sys.exit(1)
-        
-    for pdf_file in sys.argv[1:]:
+    parser = argparse.ArgumentParser(description="OCR PDFs to text, one form feed per page.")
+    parser.add_argument("pdf_files", nargs="+")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="OCR processes to run at once (default: all cores).")
+    parser.add_argument("--dpi", type=int, default=DEFAULT_DPI,
+                        help=f"Rasterization resolution (default: {DEFAULT_DPI}).")
+    args = parser.parse_args()
+
+    for pdf_file in args.pdf_files:
         if not os.path.exists(pdf_file):
             print(f"File not found: {pdf_file}")
             continue
-            
+
         base_name = os.path.basename(pdf_file)
         root_name = os.path.splitext(base_name)[0]
         # output to data/text if it exists, else same dir
         output_dir = "data/text"
         if not os.path.exists(output_dir):
             output_dir = os.path.dirname(pdf_file)
-            
+
         output_txt = os.path.join(output_dir, f"{root_name}_ocr.txt")
-        ocr_pdf_chunked(pdf_file, output_txt)
+        ocr_pdf(pdf_file, output_txt, workers=args.workers, dpi=args.dpi)
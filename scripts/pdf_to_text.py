@@ -0,0 +1,113 @@
+import os
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from pypdf import PdfReader
+
+from bibextract.engine import run_in_order
+from bibextract.checkpoint import Checkpoint, sync
+from bibextract.textlayer import text_quality, is_usable, MAX_BAD_CHAR_DENSITY, MIN_WORD_RATE
+
+# Local-first PDF to text: each page's embedded text layer is used when it
+# looks sound, and only the pages that fail the check are rasterized and
+# OCRed. Output matches ocr_bibliographies.py (one form feed per page), so
+# the generic profile reads either. pdf2image/pytesseract are only needed
+# once a page actually has to be OCRed.
+
+# As in ocr_bibliographies.py
+DEFAULT_DPI = 200
+
+_readers = {}
+
+
+def read_page(task):
+    # Runs in a worker process; each worker opens the PDF once.
+    pdf_path, page_num, dpi, max_bad_char_density, min_word_rate = task
+    if pdf_path not in _readers:
+        _readers[pdf_path] = PdfReader(pdf_path)
+    text = _readers[pdf_path].pages[page_num - 1].extract_text() or ""
+    quality = text_quality(text)
+    word_rate = quality[1]
+    if is_usable(quality, max_bad_char_density, min_word_rate):
+        return "text", word_rate, text
+    from ocr_bibliographies import ocr_page
+    return "ocr", word_rate, ocr_page((pdf_path, page_num, dpi))
+
+
+def pdf_to_text(pdf_path, output_txt_path, workers=None, dpi=DEFAULT_DPI,
+                max_bad_char_density=MAX_BAD_CHAR_DENSITY, min_word_rate=MIN_WORD_RATE):
+    print(f"Processing {pdf_path}...")
+    try:
+        total_pages = len(PdfReader(pdf_path).pages)
+        print(f"  Total pages: {total_pages}")
+
+        progress_dir = os.path.join("data", "progress")
+        os.makedirs(progress_dir, exist_ok=True)
+        progress_file = os.path.join(progress_dir, os.path.basename(pdf_path) + "_local.progress")
+
+        checkpoint = Checkpoint(progress_file, [output_txt_path])
+        state = checkpoint.restore()
+        start_page = state.get("pages", 0)
+        counts = {"text": state.get("text", 0), "ocr": state.get("ocr", 0)}
+        if start_page:
+            print(f"  Resuming from page {start_page + 1}...")
+        else:
+            # clear output file
+            with open(output_txt_path, 'w', encoding='utf-8') as f:
+                f.write("")
+
+        workers = workers or os.cpu_count() or 1
+        # One tesseract thread per worker; the pool provides the parallelism
+        os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+        tasks = [(pdf_path, page_num, dpi, max_bad_char_density, min_word_rate)
+                 for page_num in range(1, total_pages + 1)]
+
+        def write_page(i, result):
+            source, word_rate, text = result
+            page_num = i + 1
+            with open(output_txt_path, 'a', encoding='utf-8') as f:
+                f.write(text + "\n\f")
+                sync(f)
+            counts[source] += 1
+            checkpoint.commit(pages=page_num, **counts)
+            label = "text layer" if source == "text" else "OCR"
+            print(f"    Page {page_num}/{total_pages}: {label} (word rate {word_rate:.2f})")
+
+        run_in_order(tasks, read_page, write_page, start_page, workers, executor=ProcessPoolExecutor)
+
+        # Done - clear progress file
+        os.remove(progress_file)
+        print(f"  Completed: {counts['text']} page(s) from the text layer, {counts['ocr']} OCRed. "
+              f"Saved to {output_txt_path}")
+
+    except Exception as e:
+        print(f"Error processing {pdf_path}: {e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="PDF to text, one form feed per page: embedded text where usable, OCR elsewhere.")
+    parser.add_argument("pdf_files", nargs="+")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Pages to process at once (default: all cores).")
+    parser.add_argument("--dpi", type=int, default=DEFAULT_DPI,
+                        help=f"Rasterization resolution for OCRed pages (default: {DEFAULT_DPI}).")
+    parser.add_argument("--max-bad-chars", type=float, default=MAX_BAD_CHAR_DENSITY,
+                        help="Largest fraction of control/replacement characters a usable page may have.")
+    parser.add_argument("--min-word-rate", type=float, default=MIN_WORD_RATE,
+                        help="Smallest fraction of dictionary or name-like words a usable page needs.")
+    args = parser.parse_args()
+
+    for pdf_file in args.pdf_files:
+        if not os.path.exists(pdf_file):
+            print(f"File not found: {pdf_file}")
+            continue
+
+        root_name = os.path.splitext(os.path.basename(pdf_file))[0]
+        # output to data/text if it exists, else same dir
+        output_dir = "data/text"
+        if not os.path.exists(output_dir):
+            output_dir = os.path.dirname(pdf_file)
+
+        output_txt = os.path.join(output_dir, f"{root_name}_local.txt")
+        pdf_to_text(pdf_file, output_txt, workers=args.workers, dpi=args.dpi,
+                    max_bad_char_density=args.max_bad_chars, min_word_rate=args.min_word_rate)
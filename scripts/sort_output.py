@@ -0,0 +1,38 @@
+import sys
+import argparse
+
+from bibextract.sorting import external_sort, DEFAULT_KEY_COLUMNS, DEFAULT_MAX_MEMORY_MB
+
+# Sort any extractor output (or several, merged) by author without loading
+# it into memory, e.g.
+#   python scripts/sort_output.py output/matthews_sanitized.csv -o output/matthews_final.csv
+#   python scripts/sort_output.py output/kaplan_UPI.parquet output/briscoe_UPI.csv -o output/all.csv -o output/all.parquet
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sort extracted bibliography rows with a bounded-memory merge sort.")
+    parser.add_argument("inputs", nargs="+", help="CSV or Parquet files; rows of all of them are sorted together.")
+    parser.add_argument("-o", "--output", action="append", required=True,
+                        help="Sorted .csv or .parquet file to write (repeat for several).")
+    parser.add_argument("--key", default=",".join(DEFAULT_KEY_COLUMNS),
+                        help="Comma-separated columns to sort by (default: %(default)s).")
+    parser.add_argument("--exact", action="store_true",
+                        help="Compare cells as-is instead of ignoring case, accents and punctuation.")
+    parser.add_argument("--max-memory", type=int, default=DEFAULT_MAX_MEMORY_MB,
+                        help="Approximate MB of rows held in memory before spilling a run (default: %(default)s).")
+    parser.add_argument("--tmp-dir", default=None, help="Where to spill sorted runs (default: system temp).")
+    args = parser.parse_args(argv)
+
+    key_columns = [col.strip() for col in args.key.split(",") if col.strip()]
+    try:
+        rows = external_sort(args.inputs, args.output, key_columns, normalize=not args.exact,
+                             max_memory_mb=args.max_memory, tmp_dir=args.tmp_dir)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+    print(f"Sorted {rows} rows into {', '.join(args.output)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
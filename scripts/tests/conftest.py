@@ -0,0 +1,23 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bibextract.profiles import load_profile  # noqa: E402
+
+
+@pytest.fixture
+def make_profile(tmp_path):
+    """Write a profile module into tmp_path with outputs there too, and load it."""
+
+    def make(name="test_profile", **settings):
+        settings.setdefault("SYSTEM_PROMPT", "Extract entries.")
+        settings.setdefault("OUTPUT_FILE", str(tmp_path / "output" / "{stem}.csv"))
+        settings.setdefault("PROGRESS_FILE", str(tmp_path / "progress" / "{basename}.progress"))
+        path = tmp_path / f"{name}.py"
+        path.write_text("".join(f"{key} = {value!r}\n" for key, value in settings.items()))
+        return load_profile(str(path))
+
+    return make
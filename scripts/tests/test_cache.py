@@ -0,0 +1,42 @@
+import os
+
+from bibextract.cache import ResponseCache, request_key
+
+
+def request(n):
+    return {"model": "m", "messages": [{"role": "user", "content": f"chunk {n}"}]}
+
+
+def test_putting_an_answer_again_does_not_grow_the_cache(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_mb=1)
+    cache.put(request(0), [{"title": "first"}])
+    for _ in range(5):
+        cache.put(request(1), [{"title": "x" * 1000}])
+
+    assert cache.total_bytes == cache._scan_size()
+
+
+def test_overwrites_do_not_evict_early(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_mb=1)
+    entries = [{"title": "x" * 100_000}]
+    for n in range(5):
+        cache.put(request(n), entries)
+    # Rewriting the same five answers keeps the cache at ~0.5 MB
+    for _ in range(3):
+        for n in range(5):
+            cache.put(request(n), entries)
+
+    assert all(cache.get(request(n)) == entries for n in range(5))
+    assert cache.total_bytes == cache._scan_size()
+
+
+def test_least_recently_used_answers_are_evicted_past_max_mb(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_mb=1)
+    entries = [{"title": "x" * 300_000}]
+    for n in range(4):
+        cache.put(request(n), entries)
+        os.utime(cache._path(request_key(request(n))), (n, n))
+    cache.put(request(4), entries)
+
+    assert cache.get(request(0)) is None
+    assert cache.get(request(4)) == entries
@@ -0,0 +1,72 @@
+import json
+
+from bibextract.checkpoint import Checkpoint
+
+
+def append(path, text):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(text)
+
+
+def read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def tracked(tmp_path):
+    names = ("out.csv", "manifest.jsonl", "failed.jsonl", "duplicates.jsonl")
+    return [str(tmp_path / name) for name in names]
+
+
+def test_restore_truncates_writes_after_the_last_commit(tmp_path):
+    files = tracked(tmp_path)
+    checkpoint = Checkpoint(str(tmp_path / "book.progress"), files)
+    for path in files:
+        append(path, "committed\n")
+    checkpoint.commit(chunks=3)
+    # A crash after more rows, a manifest line, a failure and a duplicate
+    for path in files:
+        append(path, "half writ")
+
+    state = Checkpoint(str(tmp_path / "book.progress"), files).restore()
+
+    assert state == {"chunks": 3}
+    for path in files:
+        assert read(path) == "committed\n"
+
+
+def test_restore_goes_back_to_an_older_progress_file(tmp_path):
+    files = tracked(tmp_path)
+    progress_file = tmp_path / "book.progress"
+    checkpoint = Checkpoint(str(progress_file), files)
+    append(files[0], "row 1\n")
+    checkpoint.commit(chunks=1)
+    older = progress_file.read_text()
+    # Later chunks were written and committed, and the failed-chunk log
+    # was started, but the progress file is the one from chunk 1
+    append(files[0], "row 2\n")
+    append(files[1], "chunk 2\n")
+    append(files[2], "failed chunk 2\n")
+    checkpoint.commit(chunks=2)
+    append(files[0], "row 3\n")
+    progress_file.write_text(older)
+
+    state = checkpoint.restore()
+
+    assert state == {"chunks": 1}
+    assert read(files[0]) == "row 1\n"
+    assert read(files[1]) == "" and read(files[2]) == ""
+    assert json.loads(progress_file.read_text())["files"][files[0]] == len("row 1\n")
+
+
+def test_restore_starts_over_when_the_output_is_shorter_than_committed(tmp_path):
+    files = tracked(tmp_path)
+    checkpoint = Checkpoint(str(tmp_path / "book.progress"), files)
+    append(files[0], "row 1\nrow 2\n")
+    append(files[1], "chunk 1\n")
+    checkpoint.commit(chunks=2)
+    with open(files[0], "w") as f:
+        f.write("row 1\n")
+
+    assert checkpoint.restore() == {}
+    assert read(files[0]) == "" and read(files[1]) == ""
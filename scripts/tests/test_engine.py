@@ -0,0 +1,58 @@
+import time
+import threading
+
+import pytest
+
+from bibextract.engine import run_in_order
+
+
+class Jobs:
+    """Chunks that finish in reverse order, counting how many run at once."""
+
+    def __init__(self, n):
+        self.n = n
+        self.lock = threading.Lock()
+        self.running = 0
+        self.most = 0
+
+    def __call__(self, chunk):
+        with self.lock:
+            self.running += 1
+            self.most = max(self.most, self.running)
+        time.sleep(0.002 * (self.n - chunk))
+        with self.lock:
+            self.running -= 1
+        if chunk == 7:
+            raise RuntimeError("chunk 7 failed")
+        return [chunk * 10]
+
+
+class FakeDeadLetter:
+    path = "failed.jsonl"
+
+    def __init__(self):
+        self.added = []
+
+    def add(self, i, chunk, error):
+        self.added.append((i, chunk, str(error)))
+
+
+def test_results_come_back_in_order_with_at_most_concurrency_in_flight():
+    jobs = Jobs(20)
+    dead_letter = FakeDeadLetter()
+    results = []
+
+    run_in_order(range(20), jobs, lambda i, entries: results.append((i, entries)), concurrency=4,
+                 dead_letter=dead_letter)
+
+    assert [i for i, _ in results] == list(range(20))
+    assert results[3] == (3, [30]) and results[7] == (7, [])
+    assert dead_letter.added == [(7, 7, "chunk 7 failed")]
+    assert jobs.most == 4
+
+
+def test_start_chunk_skips_and_errors_propagate_without_a_dead_letter_log():
+    results = []
+    with pytest.raises(RuntimeError):
+        run_in_order(range(10), Jobs(10), lambda i, entries: results.append(i), start_chunk=5, concurrency=2)
+    assert results == [5, 6]
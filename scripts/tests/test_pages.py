@@ -0,0 +1,41 @@
+from collections import Counter
+
+from bibextract.pages import ENTRIES, FRONT, INDEX, PageClassifier, entry_pages
+
+
+def lines_of(text):
+    offset = 0
+    for segment in text.splitlines(keepends=True):
+        yield offset, offset, segment
+        offset += len(segment)
+
+
+def volume(n):
+    title = (f"BIBLIOGRAPHY OF MEMOIRS\nVolume {n}\nCompiled with an introduction on the memoirs it lists.\n"
+             "Guide to symbols used in the entries and the library codes below.\n")
+    entries = "".join(f"Author{n}{i}, A. Title {i} of volume {n}. Boston: Press, 1950.\n"
+                      for i in range(4))
+    index = "Subject index\n" + "".join(f"Topic {i}: 2934, 3105, 3165, 3201, 3307, 3412\n" for i in range(20))
+    return "\f".join([title, entries, index])
+
+
+def test_joined_volumes_each_have_their_entries_read():
+    text = "\f".join([volume(1), volume(2)])
+    classifier = PageClassifier(r"\nAuthor\d+, ", front_patterns=[r"(?i)guide to symbols"],
+                                index_patterns=[r"(?im)^subject index\s*$"])
+    counts = Counter()
+
+    kept = "".join(segment for _, _, segment in entry_pages(lines_of(text), classifier, r"\f", counts=counts))
+
+    assert counts == {FRONT: 2, ENTRIES: 2, INDEX: 2}
+    assert "Title 3 of volume 1" in kept and "Title 3 of volume 2" in kept
+    assert "2934" not in kept
+
+
+def test_entry_page_after_the_index_without_a_title_page():
+    classifier = PageClassifier(r"\nAuthor\d+, ", index_patterns=[r"(?im)^subject index\s*$"])
+    entries = "".join(f"Author{i}, A. Title {i}. Boston: Press, 1950.\n" for i in range(4))
+
+    labels = [classifier.classify(page) for page in (entries, "Subject index\n" + "x" * 200, entries)]
+
+    assert labels == [ENTRIES, INDEX, ENTRIES]
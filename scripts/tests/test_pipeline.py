@@ -0,0 +1,210 @@
+import os
+import re
+import csv
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from bibextract import pipeline
+from bibextract.cache import ResponseCache
+from bibextract.sink import CsvSink
+
+
+def test_legacy_integer_progress_is_not_resumed(tmp_path, make_profile, capsys):
+    profile = make_profile(CHUNKING="tokens", BOUNDARY_PATTERN=r"\n[A-Z][a-z]+, ")
+    input_file = tmp_path / "book.txt"
+    input_file.write_text("".join(f"Name{i}, A. Title {i}.\n" for i in range(50)))
+    output_csv, progress_file = profile.paths(str(input_file))
+    (tmp_path / "progress").mkdir()
+    with open(progress_file, "w") as f:
+        f.write("73")
+
+    assert pipeline.start_file(profile, str(input_file)) is None
+    assert "were not recorded" in capsys.readouterr().out
+    with open(progress_file) as f:
+        assert f.read() == "73"
+
+
+def test_progress_without_source_hash_restarts(tmp_path, make_profile, capsys):
+    profile = make_profile(CHUNKING="tokens", BOUNDARY_PATTERN=r"\n[A-Z][a-z]+, ")
+    input_file = tmp_path / "book.txt"
+    input_file.write_text("".join(f"Name{i}, A. Title {i}.\n" for i in range(50)))
+    output_csv, progress_file = profile.paths(str(input_file))
+    (tmp_path / "progress").mkdir()
+    with open(progress_file, "w") as f:
+        json.dump({"chunks": 1, "chunking": profile.chunking_key(), "sink": "csv"}, f)
+
+    source = pipeline.start_file(profile, str(input_file))
+    assert "changed since" in capsys.readouterr().out
+    assert [i for i, _ in source.chunks()] == [0]
+
+
+def test_inputs_sharing_an_output_are_refused(tmp_path, make_profile, capsys):
+    profile = make_profile(CHUNKING="fixed", OUTPUT_FILE=str(tmp_path / "out.csv"),
+                           PROGRESS_FILE=str(tmp_path / "out.progress"))
+    inputs = []
+    for name in ("a.txt", "b.txt"):
+        (tmp_path / name).write_text("Name, A. Title.\n")
+        inputs.append(str(tmp_path / name))
+
+    pipeline.run(profile, inputs)
+    assert "would both write" in capsys.readouterr().out
+    assert not (tmp_path / "out.csv").exists()
+
+
+_ENTRY_LINE = re.compile(r"^([A-Z][a-z]+), A\. (.+)\.$", re.M)
+
+
+class FakeClient:
+    """Answers requests locally: one entry per "Name, A. Title." line, less any titles in skip."""
+
+    def __init__(self, skip=(), cut_after=None):
+        self.files = SimpleNamespace(create=self.create_file, content=self.content)
+        self.batches = SimpleNamespace(create=self.create_batch, retrieve=self.retrieve)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create_completion))
+        self.skip = set(skip)
+        # Cut the next live answer off after this many entries, as at the output token limit
+        self.cut_after = cut_after
+        self.uploads = {}
+        self.submitted = 0
+        self.models = []
+
+    def answer(self, request):
+        chunk = request["messages"][-1]["content"]
+        entries = [{"author1_last_name": name, "title": title}
+                   for name, title in _ENTRY_LINE.findall(chunk) if title not in self.skip]
+        return json.dumps({"entries": entries})
+
+    def create_completion(self, **request):
+        # Follow-ups ask for what was skipped, so answer them in full
+        self.skip.clear()
+        self.models.append(request["model"])
+        content, finish_reason = self.answer(request), "stop"
+        if self.cut_after is not None:
+            entries = json.loads(content)["entries"]
+            cut = json.dumps({"entries": entries[:self.cut_after]})[:-2] + ", " + json.dumps(entries[self.cut_after])[:20]
+            content, finish_reason, self.cut_after = cut, "length", None
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason=finish_reason)], usage=None)
+
+    def create_file(self, file, purpose):
+        file_id = f"file-{len(self.uploads)}"
+        self.uploads[file_id] = file.read().decode("utf-8")
+        return SimpleNamespace(id=file_id)
+
+    def create_batch(self, input_file_id, endpoint, completion_window):
+        self.submitted += 1
+        lines = []
+        for line in self.uploads[input_file_id].splitlines():
+            request = json.loads(line)
+            body = {"choices": [{"message": {"content": self.answer(request["body"])}, "finish_reason": "stop"}]}
+            lines.append(json.dumps({"custom_id": request["custom_id"],
+                                     "response": {"status_code": 200, "body": body}}))
+        self.uploads["output"] = "\n".join(lines)
+        return SimpleNamespace(id="batch-0")
+
+    def retrieve(self, batch_id):
+        return SimpleNamespace(status="completed", request_counts=None,
+                               output_file_id="output", error_file_id=None)
+
+    def content(self, file_id):
+        return SimpleNamespace(text=self.uploads[file_id])
+
+
+def test_batch_resumed_after_a_crash_matches_answers_to_their_chunks(tmp_path, make_profile, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(pipeline, "cache", ResponseCache(str(tmp_path / "cache"), max_mb=0))
+    client = FakeClient()
+    monkeypatch.setattr(pipeline, "_client", client)
+    profile = make_profile(CHUNKING="boundary", BOUNDARY_PATTERN=r"\n[A-Z][a-z]+, ", CHUNK_SIZE_TARGET=60)
+    titles = [f"Title {i}" for i in range(30)]
+    input_file = tmp_path / "book.txt"
+    input_file.write_text("".join(f"Author, A. {title}.\n" for title in titles))
+    output_csv, _ = profile.paths(str(input_file))
+
+    write = CsvSink.write
+    writes = []
+
+    def crash_on_fourth_write(self, entries):
+        writes.append(entries)
+        if len(writes) == 4:
+            raise KeyboardInterrupt
+        write(self, entries)
+
+    monkeypatch.setattr(CsvSink, "write", crash_on_fourth_write)
+    with pytest.raises(KeyboardInterrupt):
+        pipeline.run(profile, str(input_file), batch=True)
+    monkeypatch.setattr(CsvSink, "write", write)
+    pipeline.run(profile, str(input_file), batch=True)
+
+    assert client.submitted == 1
+    with open(output_csv, newline="", encoding="utf-8") as f:
+        assert [row["title"] for row in csv.DictReader(f)] == titles
+
+
+def test_batch_answers_are_checked_for_skipped_entries(tmp_path, make_profile, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(pipeline, "cache", ResponseCache(str(tmp_path / "cache"), max_mb=0))
+    names = ["Abbot", "Baker", "Carter", "Dalton", "Emerson", "Fuller", "Garland", "Hughes"]
+    titles = [f"{word} days" for word in ("Early", "Prairie", "River", "Harbor", "Mountain", "Desert",
+                                          "Winter", "Summer")]
+    monkeypatch.setattr(pipeline, "_client", FakeClient(skip=[titles[5]]))
+    profile = make_profile(CHUNKING="boundary", BOUNDARY_PATTERN=r"\n[A-Z][a-z]+, ", VERIFY_COVERAGE=True)
+    input_file = tmp_path / "book.txt"
+    input_file.write_text("".join(f"{name}, A. {title}.\n" for name, title in zip(names, titles)))
+    output_csv, _ = profile.paths(str(input_file))
+
+    pipeline.run(profile, str(input_file), batch=True)
+
+    with open(output_csv, newline="", encoding="utf-8") as f:
+        assert [row["title"] for row in csv.DictReader(f)] == titles
+
+
+def test_rows_are_not_reused_for_another_model(tmp_path, make_profile, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(pipeline, "cache", ResponseCache(str(tmp_path / "cache"), max_mb=0))
+    client = FakeClient()
+    monkeypatch.setattr(pipeline, "_client", client)
+    settings = dict(CHUNKING="boundary", BOUNDARY_PATTERN=r"\n[A-Z][a-z]+, ", CHUNK_SIZE_TARGET=60)
+    input_file = tmp_path / "book.txt"
+    input_file.write_text("".join(f"Author, A. Title {i}.\n" for i in range(12)))
+
+    def rerun(model):
+        profile = make_profile(name=model.replace("-", "_"), MODEL=model, **settings)
+        output_csv, progress_file = profile.paths(str(input_file))
+        for path in (output_csv, progress_file):
+            if os.path.exists(path):
+                os.remove(path)
+        client.models.clear()
+        pipeline.run(profile, str(input_file))
+        return client.models
+
+    chunks = len(rerun("model-a"))
+    assert chunks > 1
+    assert rerun("model-a") == []
+    assert rerun("model-b") == ["model-b"] * chunks
+
+
+def test_cut_off_answer_is_finished_from_after_its_last_entry(tmp_path, make_profile, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(pipeline, "cache", ResponseCache(str(tmp_path / "cache"), max_mb=0))
+    client = FakeClient(cut_after=3)
+    monkeypatch.setattr(pipeline, "_client", client)
+    profile = make_profile(CHUNKING="boundary", BOUNDARY_PATTERN=r"\n[A-Z][a-z]+, ")
+    titles = [f"Title {i}" for i in range(8)]
+    input_file = tmp_path / "book.txt"
+    input_file.write_text("".join(f"Author, A. {title}.\n" for title in titles))
+    output_csv, _ = profile.paths(str(input_file))
+    requests = []
+    create = client.create_completion
+    monkeypatch.setattr(client.chat.completions, "create",
+                        lambda **request: requests.append(request["messages"][-1]["content"]) or create(**request))
+
+    pipeline.run(profile, str(input_file))
+
+    # The rest starts at the entry that was cut off, after the last complete one
+    assert len(requests) == 2
+    assert requests[1].endswith("\n\n" + "".join(f"Author, A. {title}.\n" for title in titles[3:]))
+    with open(output_csv, newline="", encoding="utf-8") as f:
+        assert [row["title"] for row in csv.DictReader(f)] == titles
@@ -0,0 +1,22 @@
+from bibextract.preparse import parse_briscoe
+
+
+def test_briscoe_repeated_lifespan_stays_out_of_the_title():
+    entry = parse_briscoe("0022 Adamic, Louis 1899-1951\n1899-1951\nDinner at the White House. New York:"
+                          " Harper & Brothers, 1946. 276 p. Starting with an account of a dinner.\n")
+    assert entry["title"] == "Dinner at the White House"
+    assert (entry["date_of_birth"], entry["date_of_death"]) == ("1899", "1951")
+
+
+def test_briscoe_name_of_several_words_is_read_up_to_the_lifespan():
+    entry = parse_briscoe("0059 Albert, David E. b.1878 Dear Grandson. Philadelphia: Olivier, Maney and Co.,"
+                          " 1950. 215 p. A letter to the author's grandson.")
+    assert (entry["author1_first_name"], entry["date_of_birth"]) == ("David E.", "1878")
+    assert entry["title"] == "Dear Grandson"
+
+
+def test_briscoe_declines_a_name_running_into_the_title():
+    assert parse_briscoe("0830 Clark, John Kenneth\nTelling it like it was. Halifax, Virginia:"
+                         " J. Kenneth Clark, 1974. 20 p.\n") is None
+    assert parse_briscoe("0224 *Baldridge, Letitia Katherine\n19262-\nRoman candle. Boston:"
+                         " Houghton Mifflin Co., 1956. 308 p.\n") is None
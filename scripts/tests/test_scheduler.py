@@ -0,0 +1,113 @@
+from types import SimpleNamespace
+
+import pytest
+
+from bibextract import scheduler
+from bibextract.engine import run_in_order
+from bibextract.scheduler import DeadLetterLog, RequestScheduler, TokenBucket
+
+
+class FakeClock:
+    """Stands in for the time module: sleep() only moves the clock on."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class APIError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(headers=headers or {})
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(scheduler, "time", clock)
+    # Backoff without jitter: the server's Retry-After, or nothing
+    monkeypatch.setattr(scheduler.random, "uniform", lambda low, high: low)
+    return clock
+
+
+def failing(*errors):
+    """A call that raises errors in turn, then answers."""
+    errors = list(errors)
+    calls = []
+
+    def call(**kwargs):
+        calls.append(kwargs)
+        if errors:
+            raise errors.pop(0)
+        return SimpleNamespace(usage=None)
+
+    call.calls = calls
+    return call
+
+
+def test_bucket_refills_at_its_per_minute_rate(clock):
+    bucket = TokenBucket(60)
+    for _ in range(60):
+        bucket.acquire()
+    assert clock.sleeps == []
+
+    bucket.acquire()
+    assert clock.sleeps == [pytest.approx(1.0)]
+
+    clock.now += 30
+    bucket.acquire(30)
+    assert len(clock.sleeps) == 1
+
+    # Refunds never take the bucket past its capacity
+    bucket.charge(-500)
+    assert bucket.tokens == 60
+
+
+def test_429_waits_for_retry_after_and_slows_requests(clock):
+    s = RequestScheduler(rpm=60, tpm=100000)
+    call = failing(APIError(429, {"retry-after": "7"}))
+
+    s.call(call, messages=[{"role": "user", "content": "text"}])
+
+    assert len(call.calls) == 2
+    assert 7 in clock.sleeps
+    assert s.cooldown_until == pytest.approx(1007.0)
+    assert s.requests.rate < s.requests.base_rate
+
+
+def test_retry_after_ms_is_preferred():
+    error = APIError(429, {"retry-after-ms": "1500", "retry-after": "9"})
+    assert scheduler.retry_after_seconds(error) == 1.5
+
+
+def test_non_retryable_errors_are_raised_at_once(clock):
+    s = RequestScheduler(rpm=60, tpm=100000)
+    call = failing(APIError(400))
+    with pytest.raises(APIError):
+        s.call(call)
+    assert len(call.calls) == 1
+
+
+def test_chunk_is_dead_lettered_after_the_retry_limit(clock, tmp_path):
+    s = RequestScheduler(rpm=60, tpm=100000, max_retries=2)
+    call = failing(*[APIError(500)] * 3)
+    dead_letter = DeadLetterLog(str(tmp_path / "failed.jsonl"))
+    results = []
+
+    run_in_order(["chunk text"], lambda chunk: s.call(call, messages=[{"role": "user", "content": chunk}]),
+                 lambda i, entries: results.append((i, entries)), concurrency=1, dead_letter=dead_letter)
+
+    assert len(call.calls) == 3
+    assert results == [(0, [])]
+    assert [(r["chunk"], r["text"], r["error"]) for r in dead_letter.load()] == [(0, "chunk text", "APIError: HTTP 500")]
@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from bibextract.streaming import EntryParser, repeated_entries, resume_position
+
+ANSWER = json.dumps({"entries": [
+    {"title": "A \"quoted\" {braced} life", "author1_last_name": "Abbot", "notes": {"pages": [1, 2]}},
+    {"title": "Back\\slash: the memoir", "author1_last_name": "Baker"},
+    {"title": "Chiefly } ] été", "author1_last_name": "Carter"},
+]})
+
+
+def feed_in(pieces):
+    parser = EntryParser()
+    found = [parser.feed(piece) for piece in pieces]
+    return parser, found
+
+
+@pytest.mark.parametrize("cut_after", [
+    'A \\"quo',        # inside a string
+    'Back\\',          # right after a backslash
+    '"notes": {"pa',   # inside a nested object
+    '[1, ',            # inside a nested array
+])
+def test_entries_survive_a_delta_split_anywhere(cut_after):
+    cut = ANSWER.index(cut_after) + len(cut_after)
+    parser, _ = feed_in([ANSWER[:cut], ANSWER[cut:]])
+    assert parser.entries == json.loads(ANSWER)["entries"]
+    assert parser.done
+
+
+def test_each_entry_is_returned_as_its_closing_brace_arrives():
+    parser, found = feed_in(ANSWER)
+    assert [entry for batch in found for entry in batch] == json.loads(ANSWER)["entries"]
+    closed_at = [n for n, batch in enumerate(found) if batch]
+    assert [ANSWER[n] for n in closed_at] == ["}", "}", "}"]
+
+
+def test_cut_off_answer_keeps_the_entries_that_closed():
+    cut = ANSWER.index('{"title": "Chiefly') + 12
+    parser, _ = feed_in([ANSWER[:cut]])
+    assert [e["author1_last_name"] for e in parser.entries] == ["Abbot", "Baker"]
+    assert not parser.done
+
+
+TEXT = ("0001 Abbot, A. 1900- Early days. Boston: Press, 1950. 200 p.\n"
+        "A life on the coast.\n"
+        "0002 Baker, B. 1901- Prairie years. New York: Press, 1951. 180 p.\n"
+        "Farming in Kansas.\n"
+        "0003 Carter, C. 1902- River towns. Chicago: Press, 1952. 150 p.\n")
+
+
+def test_resume_position_is_the_end_of_the_last_complete_entry():
+    entries = [{"author1_last_name": "Abbot", "title": "Early days"},
+               {"author1_last_name": "Baker", "title": "Prairie years"}]
+    position = resume_position(TEXT, entries, r"\n(\d{4}\s+)")
+    assert TEXT[position:].startswith("0003 Carter")
+
+
+def test_resume_position_without_a_pattern_is_the_end_of_the_entry_line():
+    position = resume_position(TEXT, [{"author1_last_name": "Baker", "title": "Prairie years"}])
+    assert TEXT[position:].startswith("Farming in Kansas")
+
+
+def test_resume_position_after_the_last_entry_and_when_nothing_matches():
+    entries = [{"author1_last_name": "Carter", "title": "River towns"}]
+    assert resume_position(TEXT, entries, r"\n(\d{4}\s+)") == len(TEXT)
+    assert resume_position(TEXT, [{"author1_last_name": "Dalton", "title": "Winter"}]) is None
+
+
+def test_repeated_entries_counts_the_overlap():
+    kept = [{"title": "Early days"}, {"title": "Prairie years"}]
+    assert repeated_entries(kept, [{"title": "Prairie years"}, {"title": "River towns"}]) == 1
+    assert repeated_entries(kept, [{"title": "River towns"}]) == 0
@@ -0,0 +1,51 @@
+import pytest
+
+from bibextract.columns import REQUIRED_COLUMNS
+from bibextract.wire import FIELD_CODES, decode, encode
+
+
+def row(**fields):
+    full = dict.fromkeys(REQUIRED_COLUMNS, "N/A")
+    full.update(fields)
+    return full
+
+
+@pytest.mark.parametrize("entry, expected", [
+    # Short keys
+    ({"a1l": "Abbot", "a1f": "Willis John", "t": "Watching the world go by", "d1": "1934"},
+     row(author1_last_name="Abbot", author1_first_name="Willis John", title="Watching the world go by",
+         original_date_of_publication="1934")),
+    ({"pub": "Little, Brown", "loc": "Boston", "pp": "358 p", "born": "1863", "died": "1934"},
+     row(publisher="Little, Brown", publisher_location="Boston", number_of_pages="358 p",
+         date_of_birth="1863", date_of_death="1934")),
+    # Full names, and both kinds mixed in one entry
+    ({"author1_last_name": "Baker", "title": "Prairie years"}, row(author1_last_name="Baker", title="Prairie years")),
+    ({"a1l": "Carter", "summary": "A river pilot.", "occ": "pilot"},
+     row(author1_last_name="Carter", summary="A river pilot.", occupations="pilot")),
+    # Blank and null values stay "N/A"; numbers become strings
+    ({"t": "Untitled", "v": None, "sum": "  ", "d2": 1951}, row(title="Untitled", second_or_later_date_of_publication="1951")),
+    # Unknown keys are dropped; the part number of a coalesced group is kept
+    ({"t": "Winter", "zz": "junk", "part": 2}, dict(row(title="Winter"), part=2)),
+    ({}, row()),
+])
+def test_decode(entry, expected):
+    assert decode([entry]) == [expected]
+
+
+@pytest.mark.parametrize("entries", [
+    {"entries": []},
+    "a1l: Abbot",
+    [["Abbot", "Watching the world go by"]],
+    ["Abbot"],
+    [{"t": {"main": "Watching the world go by"}}],
+    [{"a1l": ["Abbot", "Baker"]}],
+])
+def test_decode_rejects_malformed_answers(entries):
+    with pytest.raises(ValueError):
+        decode(entries)
+
+
+def test_every_code_round_trips():
+    full = row(**{column: f"value of {column}" for column in FIELD_CODES})
+    assert decode(encode([full])) == [full]
+    assert len(set(FIELD_CODES.values())) == len(FIELD_CODES) == len(REQUIRED_COLUMNS)
@@ -1,37 +1,81 @@
 import os
+import io
+import argparse
 import requests
-import sys
+from requests.adapters import HTTPAdapter
 from pypdf import PdfReader, PdfWriter
-import time
 
-# Unstructured API details provided by user
-API_KEY = "eK5BM6c10LhR1PsjruHvLfINdM1s1H"
-ENDPOINT = "https://api.unstructuredapp.io/general/v0/general"
+from bibextract.engine import run_in_order
+from bibextract.checkpoint import Checkpoint, sync
+from bibextract.scheduler import RequestScheduler
 
-def parse_chunk(pdf_chunk_path):
-    print(f"  Requesting API for {pdf_chunk_path}...")
-    headers = {
-        "unstructured-api-key": API_KEY,
-    }
+# Unstructured API details provided by user. UNSTRUCTURED_API_URL can point
+# at mock_unstructured_server.py for a local dry run.
+API_KEY = os.environ.get("UNSTRUCTURED_API_KEY", "eK5BM6c10LhR1PsjruHvLfINdM1s1H")
+ENDPOINT = os.environ.get("UNSTRUCTURED_API_URL", "https://api.unstructuredapp.io/general/v0/general")
+
+# Reduced chunk size for better visibility and reliability
+MAX_PAGES_PER_CHUNK = 20
+# Page ranges uploaded at once; hi_res parsing is slow server-side, so
+# the time goes on waiting, not on our end.
+DEFAULT_WORKERS = int(os.environ.get("UNSTRUCTURED_CONCURRENCY", "4"))
+# hi_res on 20 scanned pages can take minutes
+REQUEST_TIMEOUT = 900
+
+
+class UnstructuredAPIError(Exception):
+    def __init__(self, response):
+        super().__init__(f"Error from API: {response.status_code} - {response.text[:200]}")
+        self.status_code = response.status_code
+        self.response = response
+
+
+def make_session(workers):
+    """One keep-alive connection pool shared by every upload thread."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["unstructured-api-key"] = API_KEY
+    return session
+
+
+def page_range_pdf(reader, start, end):
+    """Pages [start, end) of reader as PDF bytes, without touching the disk."""
+    writer = PdfWriter()
+    for j in range(start, end):
+        writer.add_page(reader.pages[j])
+    buf = io.BytesIO()
+    writer.write(buf)
+    return buf.getvalue()
+
+
+def parse_chunk(session, scheduler, filename, pdf_bytes):
     data = {
         "strategy": "hi_res",
         "coordinates": "false",
         "include_page_breaks": "true",
     }
-    
-    with open(pdf_chunk_path, "rb") as f:
-        files = {"files": (os.path.basename(pdf_chunk_path), f, "application/pdf")}
-        response = requests.post(ENDPOINT, headers=headers, files=files, data=data)
-    
-    if response.status_code == 200:
+
+    def post():
+        try:
+            response = session.post(ENDPOINT, files={"files": (filename, pdf_bytes, "application/pdf")},
+                                    data=data, timeout=REQUEST_TIMEOUT)
+        except requests.Timeout as e:
+            raise TimeoutError(str(e)) from e
+        except requests.ConnectionError as e:
+            raise ConnectionError(str(e)) from e
+        if response.status_code != 200:
+            raise UnstructuredAPIError(response)
         return response.json()
-    else:
-        print(f"Error from API: {response.status_code} - {response.text}")
-        return None
 
-def parse_pdf(pdf_path, output_path):
+    # Retries 429/5xx/connection errors with backoff, honouring Retry-After
+    return scheduler.call(post)
+
+
+def parse_pdf(pdf_path, output_path, workers=None, pages_per_chunk=MAX_PAGES_PER_CHUNK):
     print(f"Parsing {pdf_path} using Unstructured API...")
-    
+
     if not os.path.exists(pdf_path):
         print(f"Error: {pdf_path} not found.")
         return
@@ -40,69 +84,59 @@ def parse_pdf(pdf_path, output_path):
     total_pages = len(reader.pages)
     print(f"Total pages: {total_pages}")
 
-    # Reduced chunk size for better visibility and reliability
-    MAX_PAGES_PER_CHUNK = 20
-    
     # Setup progress tracking
     basename = os.path.basename(pdf_path)
     progress_dir = os.path.join("data", "progress")
-    if not os.path.exists(progress_dir):
-        os.makedirs(progress_dir, exist_ok=True)
+    os.makedirs(progress_dir, exist_ok=True)
     progress_file = os.path.join(progress_dir, basename + "_uAPI.progress")
-
-    start_page = 0
-    if os.path.exists(progress_file):
-        try:
-            with open(progress_file, 'r') as pf:
-                start_page = int(pf.read().strip())
-            print(f"Resuming from page {start_page + 1}...")
-        except ValueError:
-            pass
-
-    # Initialize/Clear output file ONLY if starting from scratch
-    if start_page == 0:
+    if os.path.dirname(output_path):
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+    # Older progress files hold a bare page count, read as "chunks"
+    checkpoint = Checkpoint(progress_file, [output_path])
+    state = checkpoint.restore()
+    start_page = state.get("pages", state.get("chunks", 0))
+    if start_page:
+        print(f"Resuming from page {start_page + 1}...")
+    else:
+        # Initialize/Clear output file ONLY if starting from scratch
         with open(output_path, "w", encoding="utf-8") as f:
             f.write("")
 
-    for i in range(start_page, total_pages, MAX_PAGES_PER_CHUNK):
-        chunk_start = i
-        chunk_end = min(i + MAX_PAGES_PER_CHUNK, total_pages)
+    ranges = [(i, min(i + pages_per_chunk, total_pages)) for i in range(start_page, total_pages, pages_per_chunk)]
+    workers = workers or DEFAULT_WORKERS
+    session = make_session(workers)
+    scheduler = RequestScheduler()
+    stem = os.path.splitext(basename)[0]
+
+    def chunks():
+        # Built lazily on this thread (pypdf objects aren't shared across
+        # threads); at most `workers` ranges are held in memory at once.
+        for start, end in ranges:
+            yield f"{stem}_{start + 1}-{end}.pdf", page_range_pdf(reader, start, end)
+
+    def upload(chunk):
+        return parse_chunk(session, scheduler, *chunk)
+
+    def write_range(i, elements):
+        chunk_start, chunk_end = ranges[i]
+        chunk_text = "".join(el.get("text", "") + "\n" for el in elements)
+        # Save INCREMENTALLY so you can check the file while it runs
+        with open(output_path, "a", encoding="utf-8") as out:
+            out.write(chunk_text)
+            sync(out)
+        checkpoint.commit(pages=chunk_end)
         percent = (chunk_end / total_pages) * 100
-        print(f"[{percent:6.2f}%] Processing pages {chunk_start + 1} to {chunk_end}...")
-
-        chunk_pdf_path = f"temp_chunk_{chunk_start}_{chunk_end}.pdf"
-        writer = PdfWriter()
-        for j in range(chunk_start, chunk_end):
-            writer.add_page(reader.pages[j])
-        
-        with open(chunk_pdf_path, "wb") as f_out:
-            writer.write(f_out)
-
-        elements = parse_chunk(chunk_pdf_path)
-        
-        # Cleanup temp file
-        if os.path.exists(chunk_pdf_path):
-            os.remove(chunk_pdf_path)
-
-        if elements:
-            chunk_text = ""
-            for el in elements:
-                chunk_text += el.get("text", "") + "\n"
-            
-            # Save INCREMENTALLY so you can check the file while it runs
-            with open(output_path, "a", encoding="utf-8") as out:
-                out.write(chunk_text)
-            print(f"  Done. Segment saved to {output_path}")
-
-            # Save progress
-            with open(progress_file, 'w') as pf:
-                pf.write(str(chunk_end))
-        else:
-            print(f"  CRITICAL: Failed to parse pages {chunk_start + 1}-{chunk_end}. Stopping.")
-            return
-
-        # Small delay between chunks to be safe
-        time.sleep(2)
+        print(f"[{percent:6.2f}%] Saved pages {chunk_start + 1} to {chunk_end} to {output_path}")
+
+    print(f"Uploading {len(ranges)} range(s) of up to {pages_per_chunk} pages, {workers} at a time...")
+    try:
+        run_in_order(chunks(), upload, write_range, concurrency=workers)
+    except Exception as e:
+        print(f"  CRITICAL: {e}. Stopping; rerun to resume after the last saved page.")
+        return
+    finally:
+        session.close()
 
     # Done - clear progress file
     if os.path.exists(progress_file):
@@ -110,18 +144,20 @@ def parse_pdf(pdf_path, output_path):
 
     print(f"\nFinal combined text successfully saved to {output_path}")
 
+
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python scripts/unstructured_parse.py <pdf_path> [output_path]")
-        sys.exit(1)
-
-    pdf_file = sys.argv[1]
-    
-    if len(sys.argv) > 2:
-        out_file = sys.argv[2]
-    else:
-        basename = os.path.basename(pdf_file)
-        name = os.path.splitext(basename)[0]
+    parser = argparse.ArgumentParser(description="Convert a PDF to text with the Unstructured API.")
+    parser.add_argument("pdf_path")
+    parser.add_argument("output_path", nargs="?",
+                        help="Default: data/text/<name>_uAPI.txt")
+    parser.add_argument("--workers", type=int, default=None,
+                        help=f"Page ranges uploaded at once (default: {DEFAULT_WORKERS}).")
+    parser.add_argument("--pages-per-chunk", type=int, default=MAX_PAGES_PER_CHUNK)
+    args = parser.parse_args()
+
+    out_file = args.output_path
+    if not out_file:
+        name = os.path.splitext(os.path.basename(args.pdf_path))[0]
         out_file = os.path.join("data", "text", f"{name}_uAPI.txt")
 
-    parse_pdf(pdf_file, out_file)
+    parse_pdf(args.pdf_path, out_file, workers=args.workers, pages_per_chunk=args.pages_per_chunk)